@@ -0,0 +1,155 @@
+"""
+Cold versus warm per-task latency of DevSwarm.
+
+- cold: a fresh interpreter per task imports dev_swarm, builds the swarm
+  and runs the task, like `python example.py`
+- warm_cli: a fresh `python -m dev_swarm.client` per task sends it to a
+  running daemon
+- warm: the task is sent to the daemon from this process
+
+Every mode uses `FakeLLM` with the same latency, so the difference is the
+startup cost the daemon saves. Results are flat `{metric: seconds}` maps:
+
+    python benchmarks/daemon.py --tasks 5 --output daemon.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from dev_swarm.client import DaemonClient  # noqa: E402
+
+COLD_SCRIPT = """
+import sys
+from dev_swarm import DevSwarm
+from dev_swarm.fake_llm import use_fake_model
+
+latency = float(sys.argv[1])
+use_fake_model(latency=latency, time_to_first_token=latency)
+result = DevSwarm(project="cold", memory="reset").run(sys.argv[2])
+sys.exit(0 if result is not None and result.ok else 1)
+"""
+
+
+def timed(command: list, cwd: str, env: dict) -> float:
+    began = time.perf_counter()
+    subprocess.run(
+        command,
+        cwd=cwd,
+        env=env,
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+    return time.perf_counter() - began
+
+
+def wait_for(client: DaemonClient, timeout: float) -> float:
+    began = time.perf_counter()
+    while not client.ping():
+        if time.perf_counter() - began > timeout:
+            raise TimeoutError("The daemon did not start")
+        time.sleep(0.05)
+    return time.perf_counter() - began
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [ROOT, env.get("PYTHONPATH")])
+    )
+    tasks = [
+        f"Write function number {index}"
+        for index in range(args.tasks)
+    ]
+    latency = str(args.latency)
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        cold = [
+            timed(
+                [sys.executable, "-c", COLD_SCRIPT, latency, task],
+                workdir,
+                env,
+            )
+            for task in tasks
+        ]
+
+        socket_path = os.path.join(workdir, "daemon.sock")
+        daemon = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "dev_swarm.daemon",
+                "--socket",
+                socket_path,
+                "--project",
+                "warm",
+                "--fake-latency",
+                latency,
+            ],
+            cwd=workdir,
+            env=env,
+        )
+        try:
+            client = DaemonClient(socket_path)
+            results["daemon.startup_s"] = wait_for(
+                client, timeout=120
+            )
+            warm_cli = [
+                timed(
+                    [
+                        sys.executable,
+                        "-m",
+                        "dev_swarm.client",
+                        "--socket",
+                        socket_path,
+                        "--json",
+                        f"cli {task}",
+                    ],
+                    workdir,
+                    env,
+                )
+                for task in tasks
+            ]
+            warm = []
+            for task in tasks:
+                began = time.perf_counter()
+                response = client.run(f"warm {task}")
+                warm.append(time.perf_counter() - began)
+                if not response["ok"]:
+                    raise RuntimeError(response["error"])
+        finally:
+            daemon.terminate()
+            daemon.wait()
+
+    for name, samples in (
+        ("cold", cold),
+        ("warm_cli", warm_cli),
+        ("warm", warm),
+    ):
+        results[f"daemon.{name}.task_s"] = statistics.median(samples)
+    results["daemon.cold_over_warm_cli"] = (
+        results["daemon.cold.task_s"]
+        / results["daemon.warm_cli.task_s"]
+    )
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Compares the incremental code extractor with the previous regex extractor.
+
+Builds a synthetic LLM response of the requested size (prose interleaved
+with fenced python blocks) and times:
+
+- regex: the former `re.findall(r"```(?:\\w+\\n)?(.*?)```", DOTALL)` extractor
+- extractor: `extract_code_from_markdown` on the whole string
+- streamed: `CodeBlockExtractor.feed` over 64-byte chunks
+
+    python benchmarks/extract_code.py --megabytes 1 4 16
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(
+    0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+from dev_swarm.markdown import (  # noqa: E402
+    CodeBlockExtractor,
+    extract_code_from_markdown,
+)
+
+REGEX_PATTERN = r"```(?:\w+\n)?(.*?)```"
+
+
+def regex_extract(markdown_content: str) -> str:
+    matches = re.findall(REGEX_PATTERN, markdown_content, re.DOTALL)
+    return "\n".join(code.strip() for code in matches)
+
+
+def streamed_extract(
+    markdown_content: str, chunk_size: int = 64
+) -> str:
+    extractor = CodeBlockExtractor()
+    for start in range(0, len(markdown_content), chunk_size):
+        extractor.feed(markdown_content[start : start + chunk_size])
+    extractor.close()
+    return "\n".join(block.code for block in extractor.blocks)
+
+
+def make_response(size: int) -> str:
+    prose = (
+        "This function validates the input and returns a result.\n"
+        * 5
+    )
+    block = (
+        "```python\n"
+        + "".join(
+            f"def function_{i}(value: int) -> int:\n"
+            f"    return value * {i}\n\n"
+            for i in range(40)
+        )
+        + "```\n"
+    )
+    unit = prose + block
+    return unit * max(1, size // len(unit))
+
+
+def best_of(fn, argument, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        fn(argument)
+        timings.append(time.perf_counter() - began)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--megabytes", type=float, nargs="+", default=[1, 4, 16]
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    results = []
+    for megabytes in args.megabytes:
+        response = make_response(int(megabytes * 1024 * 1024))
+        assert regex_extract(response) == extract_code_from_markdown(
+            response
+        )
+        results.append(
+            {
+                "megabytes": megabytes,
+                "regex_s": best_of(
+                    regex_extract, response, args.repeat
+                ),
+                "extractor_s": best_of(
+                    extract_code_from_markdown, response, args.repeat
+                ),
+                "streamed_s": best_of(
+                    streamed_extract, response, args.repeat
+                ),
+            }
+        )
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Measures the startup cost of importing dev_swarm.
+
+Runs `python -X importtime -c "import <module>"` in fresh interpreters and
+reports the median cumulative import time of the requested module, so the
+numbers can be compared before and after a change:
+
+    python benchmarks/import_time.py --runs 10
+    git stash && python benchmarks/import_time.py --runs 10 && git stash pop
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+DEFAULT_MODULES = ["dev_swarm", "dev_swarm.prompts"]
+
+
+def measure_import(module: str, cwd: str) -> int:
+    """
+    Imports `module` in a fresh interpreter and returns its cumulative
+    import time in microseconds, or -1 if the import failed.
+    """
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            f"import {module}",
+        ],
+        cwd=cwd,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        return -1
+
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        parts = [part.strip() for part in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1])
+    return -1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--module", action="append", dest="modules", default=None
+    )
+    args = parser.parse_args()
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    report = {}
+    for module in args.modules or DEFAULT_MODULES:
+        samples = [
+            measure_import(module, root) for _ in range(args.runs)
+        ]
+        ok = [sample for sample in samples if sample >= 0]
+        report[module] = {
+            "median_us": statistics.median(ok) if ok else None,
+            "failed_runs": len(samples) - len(ok),
+        }
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Offline benchmarks of the DevSwarm pipeline on a deterministic fake model.
+
+Every agent uses `FakeLLM`, so no API key or network access is needed and
+the numbers measure the package itself:
+
+- orchestration: `DevSwarm.run` wall time minus the fake model latency on
+  the critical path (generate, then the slower of document and test)
+- extraction: `extract_code_from_markdown` on responses of growing size
+- file_io: `ArtifactStore.write` one by one versus `write_many`
+- scaling: `DevSwarm.run_many` throughput by task count and concurrency
+
+Results are flat `{metric: seconds}` maps, so two runs can be compared:
+
+    python benchmarks/pipeline.py --output baseline.json
+    python benchmarks/pipeline.py --compare baseline.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(
+    0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+from dev_swarm import DevSwarm  # noqa: E402
+from dev_swarm.artifacts import ArtifactStore  # noqa: E402
+from dev_swarm.fake_llm import (
+    make_response,
+    use_fake_model,
+)  # noqa: E402
+from dev_swarm.markdown import (
+    extract_code_from_markdown,
+)  # noqa: E402
+
+
+def median_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - began)
+    return statistics.median(timings)
+
+
+def bench_orchestration(repeat: int, latency: float) -> dict:
+    results = {}
+    for streaming in (False, True):
+        use_fake_model(
+            latency=latency,
+            time_to_first_token=latency,
+        )
+        swarm = DevSwarm(
+            project=f"orchestration_{streaming}",
+            streaming_pipeline=streaming,
+        )
+        counter = iter(range(10**9))
+        wall = median_of(
+            lambda: swarm.run(f"task {next(counter)}"), repeat
+        )
+        mode = "streaming" if streaming else "blocking"
+        results[f"orchestration.{mode}.run_s"] = wall
+        results[f"orchestration.{mode}.overhead_s"] = (
+            wall - 2 * latency
+        )
+    return results
+
+
+def bench_extraction(repeat: int) -> dict:
+    results = {}
+    for code_lines in (40, 400, 4000):
+        response = make_response(
+            code_lines, prose_lines=code_lines // 8
+        )
+        results[f"extraction.{code_lines}_lines_s"] = median_of(
+            lambda: extract_code_from_markdown(response), repeat
+        )
+    return results
+
+
+def bench_file_io(repeat: int, artifacts: int) -> dict:
+    content = make_response(400)
+    counter = iter(range(10**9))
+
+    def batch():
+        run = next(counter)
+        return [
+            ("code", f"{content}{run}", f"task-{index}")
+            for index in range(artifacts)
+        ]
+
+    store = ArtifactStore("file_io")
+
+    def sequential():
+        for stage, text, task_id in batch():
+            store.write(stage, text, task_id)
+
+    results = {
+        f"file_io.write_{artifacts}_s": median_of(sequential, repeat),
+        f"file_io.write_many_{artifacts}_s": median_of(
+            lambda: store.write_many(batch()), repeat
+        ),
+    }
+    store.close()
+    return results
+
+
+def bench_scaling(latency: float, task_counts, concurrencies) -> dict:
+    results = {}
+    use_fake_model(latency=latency)
+    swarm = DevSwarm(project="scaling")
+    for tasks in task_counts:
+        for concurrency in concurrencies:
+            began = time.perf_counter()
+            finished = list(
+                swarm.run_many(
+                    (
+                        f"scaling {tasks} {concurrency} {index}"
+                        for index in range(tasks)
+                    ),
+                    max_concurrency=concurrency,
+                )
+            )
+            assert all(result.ok for result in finished)
+            results[f"scaling.{tasks}_tasks_x{concurrency}_s"] = (
+                time.perf_counter() - began
+            )
+    return results
+
+
+def compare(results: dict, baseline: dict) -> None:
+    width = max(len(name) for name in results)
+    for name, value in results.items():
+        previous = baseline.get(name)
+        if previous:
+            change = f"{value / previous:6.2f}x"
+        else:
+            change = "   new"
+        print(f"{name:<{width}}  {value:10.5f}s  {change}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.02,
+        help="Fake model latency in seconds",
+    )
+    parser.add_argument("--artifacts", type=int, default=100)
+    parser.add_argument(
+        "--tasks", type=int, nargs="+", default=[8, 32]
+    )
+    parser.add_argument(
+        "--concurrency", type=int, nargs="+", default=[1, 2, 4, 8]
+    )
+    parser.add_argument("--output", help="Write the results as JSON")
+    parser.add_argument(
+        "--compare", help="Baseline JSON to compare with"
+    )
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output) if args.output else None
+    baseline_path = (
+        os.path.abspath(args.compare) if args.compare else None
+    )
+
+    # Artifacts, logs and journals of the benchmark stay out of the tree
+    with tempfile.TemporaryDirectory(
+        prefix="dev_swarm_bench_"
+    ) as root:
+        os.chdir(root)
+        results = {}
+        results.update(bench_orchestration(args.repeat, args.latency))
+        results.update(bench_extraction(args.repeat))
+        results.update(bench_file_io(args.repeat, args.artifacts))
+        results.update(
+            bench_scaling(args.latency, args.tasks, args.concurrency)
+        )
+
+    if baseline_path:
+        with open(baseline_path) as file:
+            compare(results, json.load(file))
+    else:
+        print(json.dumps(results, indent=2))
+
+    if output:
+        with open(output, "w") as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,27 @@
-from dev_swarm.documentor_agent import DocumentorAgent
-from dev_swarm.tester_agent import TesterAgent
-from dev_swarm.dev_swarm import DevSwarm
+import importlib
+
+# Agents pull in the full swarms stack, so they are only imported when
+# one of them is first accessed (PEP 562).
+_LAZY_IMPORTS = {
+    "DocumentorAgent": "dev_swarm.documentor_agent",
+    "TesterAgent": "dev_swarm.tester_agent",
+    "DevSwarm": "dev_swarm.dev_swarm",
+}
 
 __all__ = ["DocumentorAgent", "TesterAgent", "DevSwarm"]
+
+
+def __getattr__(name: str):
+    if name in _LAZY_IMPORTS:
+        value = getattr(
+            importlib.import_module(_LAZY_IMPORTS[name]), name
+        )
+        globals()[name] = value
+        return value
+    raise AttributeError(
+        f"module {__name__!r} has no attribute {name!r}"
+    )
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_IMPORTS))
@@ -0,0 +1,346 @@
+import contextvars
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from dev_swarm.utils import atomic_write
+
+# File name of every stage artifact inside a task directory
+STAGE_FILES = {
+    "code": "main.py",
+    "docs": "docs.md",
+    "tests": "test_main.py",
+}
+
+MANIFEST_NAME = ".manifest.json"
+
+_current_task_id: contextvars.ContextVar = contextvars.ContextVar(
+    "dev_swarm_task_id", default=None
+)
+
+
+def task_id_for(task: str) -> str:
+    """
+    Derives a stable directory name for a task.
+
+    Args:
+        task (str): The task text.
+
+    Returns:
+        str: A short slug of the task followed by a hash of the full text.
+    """
+    slug = "-".join(re.findall(r"[a-z0-9]+", task.lower())[:6])[:48]
+    digest = hashlib.sha256(task.encode("utf-8")).hexdigest()[:10]
+    return f"{slug}-{digest}" if slug else digest
+
+
+@contextmanager
+def artifact_scope(task_id: str) -> Iterator[str]:
+    """
+    Makes artifacts written inside the block go to the task's directory.
+
+    Args:
+        task_id (str): The task directory name, see `task_id_for`.
+
+    Yields:
+        str: The task id.
+    """
+    token = _current_task_id.set(task_id)
+    try:
+        yield task_id
+    finally:
+        _current_task_id.reset(token)
+
+
+def current_task_id() -> Optional[str]:
+    """Returns the task id of the enclosing `artifact_scope`, if any."""
+    return _current_task_id.get()
+
+
+@dataclass
+class ArtifactWrite:
+    """
+    Outcome of writing an artifact.
+
+    Attributes:
+        path (str): Path of the artifact.
+        sha256 (str): Hash of its content.
+        changed (bool): False when the file already had this content and
+            was left untouched.
+    """
+
+    path: str
+    sha256: str
+    changed: bool
+
+
+class ArtifactStore:
+    """
+    Writes stage outputs atomically to distinct, per-task paths.
+
+    Each task gets its own directory under `root` (see `artifact_scope`) and
+    each stage its own file name, so concurrent stages and tasks never write
+    the same file. Files are written to a temporary file and moved into
+    place with `os.replace`, so readers see either the old or the new
+    content. A `.manifest.json` in every directory records content hashes,
+    and writes whose content is unchanged are skipped.
+
+    Use `get_store` to share one store per root within the process.
+
+    Args:
+        root (str): The project directory.
+        max_workers (int, optional): Threads for `write_many`/`write_async`. Defaults to 4.
+    """
+
+    def __init__(self, root: str, max_workers: int = 4):
+        self.root = root
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._manifests: Dict[str, Dict[str, Dict]] = {}
+        self._executor = None
+
+    def path(self, stage: str, task_id: str = None) -> str:
+        """
+        Returns the path of a stage artifact.
+
+        Args:
+            stage (str): A key of STAGE_FILES, or a file name.
+            task_id (str, optional): The task directory. Defaults to the
+                enclosing `artifact_scope`, or the root when there is none.
+
+        Returns:
+            str: The artifact path.
+        """
+        task_id = task_id or current_task_id()
+        directory = (
+            os.path.join(self.root, task_id) if task_id else self.root
+        )
+        return os.path.join(directory, STAGE_FILES.get(stage, stage))
+
+    def _manifest(self, directory: str) -> Dict[str, Dict]:
+        if directory not in self._manifests:
+            path = os.path.join(directory, MANIFEST_NAME)
+            try:
+                with open(path) as file:
+                    self._manifests[directory] = json.load(file)
+            except (OSError, ValueError):
+                self._manifests[directory] = {}
+        return self._manifests[directory]
+
+    def _save_manifest(self, directory: str) -> None:
+        atomic_write(
+            os.path.join(directory, MANIFEST_NAME),
+            json.dumps(self._manifests[directory], indent=2),
+        )
+
+    def read_manifest(self, task_id: str = None) -> Dict[str, Dict]:
+        """
+        Returns the manifest entries of a task directory.
+
+        Args:
+            task_id (str, optional): The task directory. Defaults to the
+                enclosing `artifact_scope`.
+
+        Returns:
+            Dict[str, Dict]: Entries keyed by file name.
+        """
+        directory = os.path.dirname(self.path("code", task_id))
+        with self._lock:
+            return dict(self._manifest(directory))
+
+    def _write_file(
+        self, stage: str, content: str, task_id: str
+    ) -> Tuple[ArtifactWrite, bool]:
+        path = self.path(stage, task_id)
+        directory, name = os.path.split(path)
+        digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+        with self._lock:
+            entry = self._manifest(directory).get(name)
+        if (
+            entry is not None
+            and entry["sha256"] == digest
+            and os.path.exists(path)
+        ):
+            return ArtifactWrite(path, digest, changed=False), False
+
+        atomic_write(path, content)
+        with self._lock:
+            self._manifest(directory)[name] = {
+                "sha256": digest,
+                "size": len(content.encode("utf-8")),
+                "updated_at": time.time(),
+            }
+        return ArtifactWrite(path, digest, changed=True), True
+
+    def write(
+        self, stage: str, content: str, task_id: str = None
+    ) -> ArtifactWrite:
+        """
+        Writes a stage artifact unless it already has this content.
+
+        Args:
+            stage (str): A key of STAGE_FILES, or a file name.
+            content (str): The artifact content.
+            task_id (str, optional): The task directory. Defaults to the
+                enclosing `artifact_scope`.
+
+        Returns:
+            ArtifactWrite: The path, hash and whether the file changed.
+        """
+        task_id = task_id or current_task_id()
+        result, changed = self._write_file(stage, content, task_id)
+        if changed:
+            with self._lock:
+                self._save_manifest(os.path.dirname(result.path))
+        return result
+
+    def record_fingerprint(
+        self, stage: str, fingerprint: str, task_id: str = None
+    ) -> None:
+        """
+        Records the input fingerprint an existing artifact was built from.
+
+        Args:
+            stage (str): A key of STAGE_FILES, or a file name.
+            fingerprint (str): Hash of everything the artifact depends on.
+            task_id (str, optional): The task directory. Defaults to the
+                enclosing `artifact_scope`.
+        """
+        directory, name = os.path.split(self.path(stage, task_id))
+        with self._lock:
+            entry = self._manifest(directory).get(name)
+            if entry is None:
+                return
+            entry["fingerprint"] = fingerprint
+            self._save_manifest(directory)
+
+    def lookup(
+        self, stage: str, fingerprint: str, task_id: str = None
+    ) -> Optional[str]:
+        """
+        Returns an artifact's content if it was built from `fingerprint`.
+
+        Args:
+            stage (str): A key of STAGE_FILES, or a file name.
+            fingerprint (str): Hash of everything the artifact depends on.
+            task_id (str, optional): The task directory. Defaults to the
+                enclosing `artifact_scope`.
+
+        Returns:
+            Optional[str]: The content, or None if it is missing, was built
+                from other inputs or was modified since it was written.
+        """
+        path = self.path(stage, task_id)
+        directory, name = os.path.split(path)
+        with self._lock:
+            entry = self._manifest(directory).get(name)
+        if entry is None or entry.get("fingerprint") != fingerprint:
+            return None
+        try:
+            with open(path) as file:
+                content = file.read()
+        except OSError:
+            return None
+        digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        return content if digest == entry["sha256"] else None
+
+    def write_many(
+        self, artifacts: Iterable[Tuple[str, str, Optional[str]]]
+    ) -> List[ArtifactWrite]:
+        """
+        Writes many artifacts concurrently and saves each touched manifest
+        once.
+
+        Args:
+            artifacts (Iterable[Tuple[str, str, Optional[str]]]):
+                (stage, content, task_id) triples.
+
+        Returns:
+            List[ArtifactWrite]: One result per artifact, in input order.
+        """
+        artifacts = [
+            (stage, content, task_id or current_task_id())
+            for stage, content, task_id in artifacts
+        ]
+        results = list(
+            self._pool().map(
+                lambda artifact: self._write_file(*artifact),
+                artifacts,
+            )
+        )
+        directories = {
+            os.path.dirname(result.path)
+            for result, changed in results
+            if changed
+        }
+        with self._lock:
+            for directory in directories:
+                self._save_manifest(directory)
+        return [result for result, _ in results]
+
+    def write_async(
+        self, stage: str, content: str, task_id: str = None
+    ) -> Future:
+        """
+        Schedules a write on the store's thread pool.
+
+        Args:
+            stage (str): A key of STAGE_FILES, or a file name.
+            content (str): The artifact content.
+            task_id (str, optional): The task directory. Defaults to the
+                enclosing `artifact_scope` of the caller.
+
+        Returns:
+            Future: Resolves to the ArtifactWrite.
+        """
+        return self._pool().submit(
+            self.write, stage, content, task_id or current_task_id()
+        )
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="dev-swarm-artifacts",
+                )
+            return self._executor
+
+    def close(self) -> None:
+        """Waits for pending asynchronous writes to finish."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+_stores: Dict[str, ArtifactStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(root: str) -> ArtifactStore:
+    """
+    Returns the process-wide store for `root`, creating it on first use.
+
+    Sharing one store per directory keeps every writer on the same
+    manifest.
+
+    Args:
+        root (str): The project directory.
+
+    Returns:
+        ArtifactStore: The store.
+    """
+    key = os.path.abspath(root)
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = ArtifactStore(root)
+        return _stores[key]
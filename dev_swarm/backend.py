@@ -0,0 +1,385 @@
+import asyncio
+import http.client
+import json
+import os
+import queue
+import socket
+import threading
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator
+from urllib.parse import urlsplit
+
+from loguru import logger
+
+from dev_swarm.llm import (
+    DEFAULT_MODEL_NAME,
+    on_cancel,
+    register_model,
+)
+
+# Request fields passed on to the endpoint; agents call models with
+# their own keyword arguments, which the API would reject
+REQUEST_PARAMETERS = frozenset(
+    {
+        "frequency_penalty",
+        "logit_bias",
+        "max_completion_tokens",
+        "max_tokens",
+        "n",
+        "presence_penalty",
+        "response_format",
+        "seed",
+        "stop",
+        "temperature",
+        "tool_choice",
+        "tools",
+        "top_p",
+        "user",
+    }
+)
+
+# Raised when a pooled keep-alive connection was closed by the server
+_STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    BrokenPipeError,
+    ConnectionResetError,
+)
+
+
+def _interrupt(connection: http.client.HTTPConnection) -> None:
+    # Runs on the cancelling thread; shutting the socket down wakes up a
+    # read blocked on it, which closing it does not reliably do
+    sock = connection.sock
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+class BackendError(RuntimeError):
+    """
+    Raised when the completion endpoint answers with an error status.
+
+    Args:
+        status (int): The HTTP status.
+        body (str): The response body.
+    """
+
+    def __init__(self, status: int, body: str):
+        super().__init__(
+            f"Completion request failed ({status}): {body}"
+        )
+        self.status = status
+        self.body = body
+
+
+class ConnectionPool:
+    """
+    A bounded pool of keep-alive HTTP(S) connections to one host.
+
+    At most `size` requests are in flight at once; further callers wait
+    for a connection to be returned. Connections are reused across
+    requests, so only the first request on each pays for the TCP and TLS
+    handshakes. A connection that fails, or whose response was not read
+    to the end, is closed instead of being returned.
+
+    Args:
+        base_url (str): Scheme, host and optional port, e.g. "https://api.openai.com".
+        size (int, optional): Maximum open connections. Defaults to 8.
+        timeout (float, optional): Default socket timeout in seconds. Defaults to 60.
+    """
+
+    def __init__(
+        self, base_url: str, size: int = 8, timeout: float = 60
+    ):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port
+        self.secure = parts.scheme == "https"
+        self.size = size
+        self.timeout = timeout
+        self.created = 0
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+
+    def _new_connection(self) -> http.client.HTTPConnection:
+        with self._lock:
+            self.created += 1
+        factory = (
+            http.client.HTTPSConnection
+            if self.secure
+            else http.client.HTTPConnection
+        )
+        return factory(self.host, self.port, timeout=self.timeout)
+
+    @contextmanager
+    def connection(
+        self, timeout: float = None
+    ) -> Iterator[http.client.HTTPConnection]:
+        """
+        Borrows a connection for one request.
+
+        Args:
+            timeout (float, optional): Socket timeout for this request.
+                Defaults to the pool timeout.
+
+        Yields:
+            http.client.HTTPConnection: The connection.
+        """
+        self._slots.acquire()
+        try:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                connection = self._new_connection()
+            connection.timeout = timeout or self.timeout
+            if connection.sock is not None:
+                connection.sock.settimeout(connection.timeout)
+            try:
+                yield connection
+            except BaseException:
+                connection.close()
+                raise
+            self._idle.put(connection)
+        finally:
+            self._slots.release()
+
+    def close(self) -> None:
+        """Closes every idle connection."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class ChatBackend:
+    """
+    Client for OpenAI-compatible chat completion endpoints with pooled
+    keep-alive connections and sync and async interfaces.
+
+    Instances are callable like the other models of the package, so they
+    can be passed to any agent as `llm`, or registered with `use_backend`.
+    The async methods run the blocking calls on worker threads, and are
+    bounded by the same connection pool.
+
+    Args:
+        base_url (str, optional): API root. Defaults to "https://api.openai.com/v1".
+        api_key (str, optional): Bearer token. Defaults to $OPENAI_API_KEY.
+        model_name (str, optional): Model to request. Defaults to DEFAULT_MODEL_NAME.
+        pool_size (int, optional): Maximum concurrent connections. Defaults to 8.
+        timeout (float, optional): Default per-request timeout in seconds. Defaults to 60.
+        max_tokens (int, optional): Completion limit. Defaults to 4000.
+        temperature (float, optional): Sampling temperature. Defaults to the server's.
+    """
+
+    def __init__(
+        self,
+        base_url: str = "https://api.openai.com/v1",
+        api_key: str = None,
+        model_name: str = DEFAULT_MODEL_NAME,
+        pool_size: int = 8,
+        timeout: float = 60,
+        max_tokens: int = 4000,
+        temperature: float = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.path = urlsplit(self.base_url).path + "/chat/completions"
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.model_name = model_name
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.pool = ConnectionPool(self.base_url, pool_size, timeout)
+
+    def _body(self, prompt: Any, stream: bool, params: Dict) -> bytes:
+        body = {
+            "model": self.model_name,
+            "messages": [{"role": "user", "content": str(prompt)}],
+            "max_tokens": self.max_tokens,
+            "stream": stream,
+        }
+        if self.temperature is not None:
+            body["temperature"] = self.temperature
+        dropped = sorted(params.keys() - REQUEST_PARAMETERS)
+        if dropped:
+            logger.debug(
+                f"Not sending unsupported request fields {dropped}"
+            )
+        body.update(
+            (name, value)
+            for name, value in params.items()
+            if name in REQUEST_PARAMETERS
+        )
+        return json.dumps(body).encode("utf-8")
+
+    def _headers(self) -> Dict[str, str]:
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        return headers
+
+    @contextmanager
+    def _response(
+        self, prompt: Any, stream: bool, timeout: float, params: Dict
+    ) -> Iterator[http.client.HTTPResponse]:
+        body = self._body(prompt, stream, params)
+        for attempt in range(2):
+            with self.pool.connection(timeout) as connection:
+                reused = connection.sock is not None
+                if not reused:
+                    connection.connect()
+                # A hedged call that lost is cancelled from another
+                # thread, possibly while it waits for the first byte
+                with on_cancel(lambda: _interrupt(connection)):
+                    try:
+                        connection.request(
+                            "POST",
+                            self.path,
+                            body=body,
+                            headers=self._headers(),
+                        )
+                        response = connection.getresponse()
+                    except _STALE_CONNECTION_ERRORS:
+                        # Retry once on a fresh socket if the server
+                        # dropped an idle connection
+                        connection.close()
+                        if reused and attempt == 0:
+                            continue
+                        raise
+                    if response.status >= 400:
+                        raise BackendError(
+                            response.status,
+                            response.read().decode(
+                                "utf-8", "replace"
+                            ),
+                        )
+                    yield response
+                    return
+
+    def complete(
+        self, prompt: Any, timeout: float = None, **params
+    ) -> str:
+        """
+        Requests a completion.
+
+        Args:
+            prompt (Any): The user message.
+            timeout (float, optional): Timeout of this request in seconds.
+            **params: Extra request fields, e.g. `stop`. Fields not in
+                `REQUEST_PARAMETERS` are dropped.
+
+        Returns:
+            str: The completion text.
+
+        Raises:
+            BackendError: If the endpoint answers with an error status.
+        """
+        with self._response(
+            prompt, False, timeout, params
+        ) as response:
+            data = json.loads(response.read())
+        return data["choices"][0]["message"]["content"] or ""
+
+    def stream(
+        self, prompt: Any, timeout: float = None, **params
+    ) -> Iterator[str]:
+        """
+        Streams a completion as server-sent events.
+
+        Args:
+            prompt (Any): The user message.
+            timeout (float, optional): Timeout between received chunks in seconds.
+            **params: Extra request fields.
+
+        Yields:
+            str: The next piece of the completion.
+
+        Raises:
+            BackendError: If the endpoint answers with an error status.
+        """
+        with self._response(
+            prompt, True, timeout, params
+        ) as response:
+            for line in response:
+                line = line.strip()
+                if not line.startswith(b"data:"):
+                    continue
+                payload = line[5:].strip()
+                if payload == b"[DONE]":
+                    break
+                delta = json.loads(payload)["choices"][0].get(
+                    "delta", {}
+                )
+                if delta.get("content"):
+                    yield delta["content"]
+            # Drain the rest so the connection can be reused
+            response.read()
+
+    def __call__(self, prompt: Any, *args, **kwargs) -> str:
+        return self.complete(prompt, **kwargs)
+
+    def run(self, prompt: Any, *args, **kwargs) -> str:
+        return self.complete(prompt, **kwargs)
+
+    async def acomplete(
+        self, prompt: Any, timeout: float = None, **params
+    ) -> str:
+        """
+        Async version of `complete`.
+
+        Args:
+            prompt (Any): The user message.
+            timeout (float, optional): Timeout of this request in seconds.
+            **params: Extra request fields.
+
+        Returns:
+            str: The completion text.
+        """
+        return await asyncio.to_thread(
+            self.complete, prompt, timeout, **params
+        )
+
+    async def astream(
+        self, prompt: Any, timeout: float = None, **params
+    ) -> AsyncIterator[str]:
+        """
+        Async version of `stream`.
+
+        Args:
+            prompt (Any): The user message.
+            timeout (float, optional): Timeout between received chunks in seconds.
+            **params: Extra request fields.
+
+        Yields:
+            str: The next piece of the completion.
+        """
+        chunks = self.stream(prompt, timeout, **params)
+        done = object()
+        try:
+            while True:
+                chunk = await asyncio.to_thread(next, chunks, done)
+                if chunk is done:
+                    return
+                yield chunk
+        finally:
+            chunks.close()
+
+    def close(self) -> None:
+        """Closes the pooled connections."""
+        self.pool.close()
+
+
+def use_backend(name: str = "default", **kwargs) -> ChatBackend:
+    """
+    Registers a `ChatBackend` so agents built afterwards share it.
+
+    Args:
+        name (str, optional): Registry key. Defaults to "default".
+        **kwargs: Arguments forwarded to `ChatBackend`.
+
+    Returns:
+        ChatBackend: The registered backend.
+    """
+    return register_model(ChatBackend(**kwargs), name)
@@ -0,0 +1,310 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+from dev_swarm.llm import get_model, stream_model
+from dev_swarm.metrics import record_cache_hit
+
+# Model attributes that change the completion for an identical prompt
+SAMPLING_PARAMETERS = (
+    "model_name",
+    "temperature",
+    "top_p",
+    "max_tokens",
+    "frequency_penalty",
+    "presence_penalty",
+    "n",
+    "stop",
+)
+
+
+class ResponseCache:
+    """
+    Content-addressed, sqlite-backed store of LLM completions.
+
+    Entries are evicted least-recently-used first once the cache holds more
+    than `max_entries` entries or `max_bytes` bytes of responses, and are
+    treated as missing once they are older than `ttl` seconds.
+
+    Args:
+        path (str, optional): Location of the sqlite database.
+            Defaults to "dev_swarm_cache/responses.sqlite".
+        max_entries (int, optional): Maximum number of entries. Defaults to 10,000.
+        max_bytes (int, optional): Maximum total response size. Defaults to 256 MiB.
+        ttl (float, optional): Entry lifetime in seconds. Defaults to None (no expiry).
+    """
+
+    def __init__(
+        self,
+        path: str = os.path.join(
+            "dev_swarm_cache", "responses.sqlite"
+        ),
+        max_entries: int = 10_000,
+        max_bytes: int = 256 * 1024 * 1024,
+        ttl: Optional[float] = None,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " response TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS responses_accessed_at"
+            " ON responses (accessed_at)"
+        )
+        self._db.commit()
+
+    @staticmethod
+    def make_key(prompt: Any, model: str, parameters: Dict) -> str:
+        """
+        Hashes a prompt, model name and sampling parameters into a cache key.
+
+        Args:
+            prompt (Any): The prompt sent to the model.
+            model (str): The model name.
+            parameters (Dict): Sampling parameters of the request.
+
+        Returns:
+            str: The hex SHA-256 digest identifying the request.
+        """
+        payload = json.dumps(
+            {
+                "prompt": prompt,
+                "model": model,
+                "parameters": parameters,
+            },
+            sort_keys=True,
+            default=repr,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Returns the cached response for `key`, or None on a miss.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            Optional[str]: The cached response.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is not None and self.ttl is not None:
+                if now - row[1] > self.ttl:
+                    self._db.execute(
+                        "DELETE FROM responses WHERE key = ?", (key,)
+                    )
+                    self._db.commit()
+                    self.evictions += 1
+                    row = None
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self._db.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?",
+                (now, key),
+            )
+            self._db.commit()
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, response: str) -> None:
+        """
+        Stores a response and evicts old entries if the cache is over budget.
+
+        Args:
+            key (str): The cache key.
+            response (str): The completion to store.
+        """
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses"
+                " (key, response, size, created_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (
+                    key,
+                    response,
+                    len(response.encode("utf-8")),
+                    now,
+                    now,
+                ),
+            )
+            self._evict(now)
+            self._db.commit()
+
+    def _evict(self, now: float) -> None:
+        if self.ttl is not None:
+            self.evictions += self._db.execute(
+                "DELETE FROM responses WHERE created_at < ?",
+                (now - self.ttl,),
+            ).rowcount
+
+        entries, size = self._db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        if entries <= self.max_entries and size <= self.max_bytes:
+            return
+
+        rows = self._db.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at"
+        )
+        stale = []
+        for key, entry_size in rows:
+            if entries <= self.max_entries and size <= self.max_bytes:
+                break
+            stale.append((key,))
+            entries -= 1
+            size -= entry_size
+        self._db.executemany(
+            "DELETE FROM responses WHERE key = ?", stale
+        )
+        self.evictions += len(stale)
+
+    def clear(self) -> None:
+        """Removes every entry and resets the statistics."""
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns hit/miss counters and the current size of the cache.
+
+        Returns:
+            Dict[str, Any]: hits, misses, hit_rate, evictions, entries and bytes.
+        """
+        with self._lock:
+            entries, size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": size,
+        }
+
+
+class CachedModel:
+    """
+    Wraps a model so identical requests are answered from a `ResponseCache`.
+
+    Calls whose prompt, model name, sampling parameters and extra arguments
+    match an earlier call return the stored completion without invoking the
+    wrapped model. Every other attribute is forwarded to the wrapped model.
+
+    Args:
+        model (Any): The model to wrap, e.g. the shared registry model.
+        cache (ResponseCache): The cache to read from and write to.
+    """
+
+    def __init__(self, model: Any, cache: ResponseCache):
+        self.model = model
+        self.cache = cache
+
+    def _key(self, task: Any, args: tuple, kwargs: dict) -> str:
+        parameters = {
+            name: getattr(self.model, name, None)
+            for name in SAMPLING_PARAMETERS
+        }
+        parameters["args"] = args
+        parameters["kwargs"] = kwargs
+        return self.cache.make_key(
+            task, parameters.pop("model_name"), parameters
+        )
+
+    def _cached_call(self, call, task, *args, **kwargs):
+        key = self._key(task, args, kwargs)
+        response = self.cache.get(key)
+        if response is not None:
+            logger.debug("LLM cache hit {:.12}", key)
+            record_cache_hit()
+            return response
+
+        response = call(task, *args, **kwargs)
+        if isinstance(response, str):
+            self.cache.set(key, response)
+        return response
+
+    def __call__(self, task: Any, *args, **kwargs):
+        return self._cached_call(self.model, task, *args, **kwargs)
+
+    def run(self, task: Any, *args, **kwargs):
+        return self._cached_call(
+            self.model.run, task, *args, **kwargs
+        )
+
+    def stream(self, task: Any, *args, **kwargs):
+        key = self._key(task, args, kwargs)
+        response = self.cache.get(key)
+        if response is not None:
+            record_cache_hit()
+            yield response
+            return
+
+        chunks = []
+        for chunk in stream_model(self.model, task, *args, **kwargs):
+            chunks.append(chunk)
+            yield chunk
+        self.cache.set(key, "".join(chunks))
+
+    def __getattr__(self, name: str):
+        if name in ("model", "cache"):
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+
+def enable_cache(
+    name: str = "default", **cache_kwargs
+) -> CachedModel:
+    """
+    Returns the registry model `name` wrapped in a `CachedModel` with its
+    own cache. The registry itself is left unchanged, so only the agents
+    given the returned model are cached.
+
+    Args:
+        name (str, optional): Registry key of the model. Defaults to "default".
+        **cache_kwargs: Arguments forwarded to `ResponseCache`.
+
+    Returns:
+        CachedModel: The cached model.
+    """
+    model = get_model(name)
+    if isinstance(model, CachedModel):
+        model = model.model
+    return CachedModel(model, ResponseCache(**cache_kwargs))
@@ -0,0 +1,168 @@
+import ast
+import copy
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+DEFINITIONS = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+
+
+@dataclass
+class CodeChunk:
+    """
+    A top-level definition of a module, with what it needs for context.
+
+    Attributes:
+        name (str): The class or function name, or "<module>" for the preamble.
+        kind (str): "class", "function" or "module".
+        source (str): The source code of the chunk, decorators included.
+        lineno (int): First line of the chunk in the module.
+        references (List[str]): Other top-level symbols the chunk uses.
+    """
+
+    name: str
+    kind: str
+    source: str
+    lineno: int
+    references: List[str] = field(default_factory=list)
+
+
+def _stub(node: ast.AST, summary: bool) -> ast.AST:
+    stub = copy.copy(node)
+    body = []
+    if summary and ast.get_docstring(node) is not None:
+        body.append(node.body[0])
+    if isinstance(node, ast.ClassDef):
+        body.extend(
+            _stub(child, summary)
+            for child in node.body
+            if isinstance(child, DEFINITIONS)
+            and not (
+                summary
+                and child.name.startswith("_")
+                and child.name != "__init__"
+            )
+        )
+    elif not summary:
+        stub.decorator_list = []
+    stub.body = body or [ast.Expr(ast.Constant(...))]
+    return stub
+
+
+def signature(node: ast.AST, summary: bool = False) -> str:
+    """
+    Renders the signature of a function or class without its body.
+
+    Classes are rendered with the signatures of their methods.
+
+    Args:
+        node (ast.AST): A FunctionDef, AsyncFunctionDef or ClassDef node.
+        summary (bool, optional): Also keep the decorators of functions
+            and every docstring, and leave out private methods, to
+            describe the public API. Defaults to False.
+
+    Returns:
+        str: The signature source, e.g. "def add(a: int, b: int) -> int: ...".
+    """
+    source = ast.unparse(_stub(node, summary))
+    # ast.unparse puts bodies on their own line and blank lines before
+    # nested definitions
+    source = re.sub(
+        r":\n\s+\.\.\.$", ": ...", source, flags=re.MULTILINE
+    )
+    return re.sub(
+        r"\n\n(?=\s*(?:@|def |async def |class ))", "\n", source
+    )
+
+
+def _referenced_names(node: ast.AST) -> List[str]:
+    names = []
+    for child in ast.walk(node):
+        if isinstance(child, ast.Name) and child.id not in names:
+            names.append(child.id)
+    return names
+
+
+def split_code(code: str) -> List[CodeChunk]:
+    """
+    Splits a module into its top-level classes and functions.
+
+    Imports, constants and other top-level statements are grouped into a
+    single "<module>" chunk placed first.
+
+    Args:
+        code (str): The module source.
+
+    Returns:
+        List[CodeChunk]: The chunks, in source order.
+
+    Raises:
+        SyntaxError: If the code cannot be parsed.
+    """
+    tree = ast.parse(code)
+    lines = code.splitlines(keepends=True)
+    definitions = {
+        node.name
+        for node in tree.body
+        if isinstance(node, DEFINITIONS)
+    }
+
+    preamble = []
+    chunks = []
+    for node in tree.body:
+        decorators = getattr(node, "decorator_list", [])
+        start = min(
+            [node.lineno]
+            + [decorator.lineno for decorator in decorators]
+        )
+        source = "".join(lines[start - 1 : node.end_lineno])
+        if not isinstance(node, DEFINITIONS):
+            preamble.append(source)
+            continue
+
+        references = [
+            name
+            for name in _referenced_names(node)
+            if name in definitions and name != node.name
+        ]
+        kind = (
+            "class" if isinstance(node, ast.ClassDef) else "function"
+        )
+        chunks.append(
+            CodeChunk(
+                name=node.name,
+                kind=kind,
+                source=source,
+                lineno=start,
+                references=references,
+            )
+        )
+
+    if preamble:
+        chunks.insert(
+            0,
+            CodeChunk(
+                name="<module>",
+                kind="module",
+                source="".join(preamble),
+                lineno=1,
+            ),
+        )
+    return chunks
+
+
+def reference_signatures(code: str) -> Dict[str, str]:
+    """
+    Maps every top-level class and function of a module to its signature.
+
+    Args:
+        code (str): The module source.
+
+    Returns:
+        Dict[str, str]: Signatures keyed by symbol name.
+    """
+    return {
+        node.name: signature(node)
+        for node in ast.parse(code).body
+        if isinstance(node, DEFINITIONS)
+    }
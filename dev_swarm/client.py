@@ -0,0 +1,155 @@
+import argparse
+import json
+import os
+import socket
+import sys
+from typing import Any, Dict, List
+
+DEFAULT_SOCKET_PATH = os.path.join("dev_swarm_state", "daemon.sock")
+
+
+class DaemonError(RuntimeError):
+    """Raised when the daemon cannot be reached or rejects a request."""
+
+
+class DaemonClient:
+    """
+    Sends requests to the daemon over its Unix socket.
+
+    Requests and responses are single lines of JSON. Every request opens
+    its own connection, so a client can be shared between threads. Only
+    the standard library is imported, so a task is sent without paying
+    for the swarms stack, the model client or the agents:
+
+        python -m dev_swarm.client "Write an add function"
+
+    Args:
+        path (str, optional): The daemon socket. Defaults to
+            "dev_swarm_state/daemon.sock".
+        timeout (float, optional): Seconds to wait for a response.
+            Defaults to None (no limit).
+    """
+
+    def __init__(
+        self, path: str = DEFAULT_SOCKET_PATH, timeout: float = None
+    ):
+        self.path = path
+        self.timeout = timeout
+
+    def request(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Sends one request and waits for its response.
+
+        Args:
+            payload (Dict[str, Any]): The request, with an "op" key.
+
+        Returns:
+            Dict[str, Any]: The response.
+
+        Raises:
+            DaemonError: If the daemon is not running or closed the
+                connection without responding.
+        """
+        try:
+            with socket.socket(
+                socket.AF_UNIX, socket.SOCK_STREAM
+            ) as conn:
+                conn.settimeout(self.timeout)
+                conn.connect(self.path)
+                conn.sendall(
+                    json.dumps(payload).encode("utf-8") + b"\n"
+                )
+                with conn.makefile("rb") as file:
+                    line = file.readline()
+        except (FileNotFoundError, ConnectionRefusedError) as error:
+            raise DaemonError(
+                f"No DevSwarm daemon is listening on {self.path}"
+            ) from error
+        if not line:
+            raise DaemonError("The daemon closed the connection")
+        return json.loads(line)
+
+    def run(
+        self, task: str, project: str = None, force: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Runs a task on the daemon's warm swarm.
+
+        Args:
+            task (str): The task text.
+            project (str, optional): Project of the task. Defaults to the
+                daemon's default project.
+            force (bool, optional): Rerun every stage. Defaults to False.
+
+        Returns:
+            Dict[str, Any]: ok, outputs and timings by stage, duration and
+                error of the run, and server_s, the time the daemon spent
+                on the request.
+        """
+        payload = {"op": "run", "task": task, "force": force}
+        if project is not None:
+            payload["project"] = project
+        return self.request(payload)
+
+    def ping(self) -> bool:
+        """Tells whether the daemon is up."""
+        try:
+            return bool(self.request({"op": "ping"}).get("ok"))
+        except (DaemonError, OSError):
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the daemon's request counters."""
+        return self.request({"op": "stats"})
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m dev_swarm.client",
+        description="Send tasks to a running DevSwarm daemon.",
+    )
+    parser.add_argument("tasks", nargs="*", help="task texts")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET_PATH)
+    parser.add_argument("--project")
+    parser.add_argument("--force", action="store_true")
+    parser.add_argument(
+        "--json", action="store_true", help="print raw responses"
+    )
+    parser.add_argument("--ping", action="store_true")
+    parser.add_argument("--stats", action="store_true")
+    args = parser.parse_args(argv)
+
+    client = DaemonClient(args.socket)
+    if args.ping:
+        up = client.ping()
+        print("up" if up else "down")
+        return 0 if up else 1
+    if not args.stats and not args.tasks:
+        parser.error("no tasks given")
+    try:
+        if args.stats:
+            print(json.dumps(client.stats(), indent=2))
+            return 0
+        return _run_tasks(client, args)
+    except (DaemonError, OSError) as error:
+        print(f"error: {error}", file=sys.stderr)
+        return 1
+
+
+def _run_tasks(client: DaemonClient, args: argparse.Namespace) -> int:
+    failed = 0
+    for task in args.tasks:
+        response = client.run(task, args.project, args.force)
+        failed += not response.get("ok")
+        if args.json:
+            print(json.dumps(response))
+            continue
+        for stage, output in (response.get("outputs") or {}).items():
+            print(f"# {stage}\n\n{output}\n")
+        if response.get("error"):
+            print(f"error: {response['error']}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
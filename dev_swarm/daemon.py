@@ -0,0 +1,312 @@
+import argparse
+import json
+import os
+import signal
+import socketserver
+import threading
+import time
+from typing import Any, Dict, Iterable, List
+
+from loguru import logger
+
+from dev_swarm.client import DEFAULT_SOCKET_PATH, DaemonClient
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("expected a JSON object")
+            except ValueError as error:
+                response = {
+                    "ok": False,
+                    "error": f"Invalid request: {error}",
+                }
+            else:
+                try:
+                    response = self.server.swarm_daemon.handle(
+                        request
+                    )
+                except Exception as error:
+                    # Answer instead of dropping the connection
+                    logger.exception(f"Request failed: {error}")
+                    response = {
+                        "ok": False,
+                        "error": f"{type(error).__name__}: {error}",
+                    }
+            self.wfile.write(
+                json.dumps(response, default=str).encode("utf-8")
+                + b"\n"
+            )
+            self.wfile.flush()
+
+
+class _Server(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+class SwarmDaemon:
+    """
+    Serves DevSwarm runs over a Unix socket, one thread per connection.
+
+    Importing swarms, building the model client and constructing the
+    agents happens once at startup instead of once per task; tasks then
+    arrive from `DaemonClient`:
+
+        python -m dev_swarm.daemon --project my_project &
+        python -m dev_swarm.client --project my_project "Write an add function"
+
+    A DevSwarm is built per project on its first task, or at startup for
+    the `projects` given, and reused for every later task of the project.
+    Since the agents live for the whole daemon, their memory policy
+    defaults to "reset" so conversations do not grow with every task.
+
+    Args:
+        path (str, optional): The socket to listen on. Defaults to
+            "dev_swarm_state/daemon.sock".
+        swarm_options (Dict[str, Any], optional): Arguments for DevSwarm,
+            besides the project.
+        projects (Iterable[str], optional): Projects warmed up at startup;
+            the first is the default project. Defaults to ("dev_swarm",).
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_SOCKET_PATH,
+        swarm_options: Dict[str, Any] = None,
+        projects: Iterable[str] = ("dev_swarm",),
+    ):
+        self.path = path
+        self.swarm_options = dict(swarm_options or {})
+        self.swarm_options.setdefault("memory", "reset")
+        self.projects = list(projects) or ["dev_swarm"]
+        self.default_project = self.projects[0]
+        self._swarms: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._server = None
+        self.started_at = time.time()
+        self.requests = 0
+        self.tasks = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+
+    def warm_up(self) -> float:
+        """
+        Imports the swarm stack, builds the swarms of the startup projects
+        and resolves the default model.
+
+        Returns:
+            float: Seconds spent.
+        """
+        from dev_swarm.llm import LazyModel, get_model
+
+        began = time.perf_counter()
+        for project in self.projects:
+            self.swarm(project)
+        if self.swarm_options.get("llm") is None:
+            model = get_model()
+            if isinstance(model, LazyModel):
+                model.resolve()
+        return time.perf_counter() - began
+
+    def swarm(self, project: str) -> Any:
+        """
+        Returns the swarm of a project, building it on first use.
+
+        Args:
+            project (str): The project.
+
+        Returns:
+            DevSwarm: The project's swarm.
+        """
+        with self._lock:
+            if project not in self._swarms:
+                from dev_swarm.dev_swarm import DevSwarm
+
+                logger.info(
+                    f"Building the swarm of project {project}"
+                )
+                self._swarms[project] = DevSwarm(
+                    project=project, **self.swarm_options
+                )
+            return self._swarms[project]
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Answers one request.
+
+        Requests:
+            - {"op": "run", "task", "project"?, "force"?}
+            - {"op": "ping"}
+            - {"op": "stats"}
+
+        Args:
+            request (Dict[str, Any]): The request.
+
+        Returns:
+            Dict[str, Any]: The response; "ok" is false on failure, with
+                the reason in "error", including errors raised while
+                building the project's swarm or running the task.
+        """
+        with self._lock:
+            self.requests += 1
+        op = request.get("op", "run")
+        if op == "ping":
+            return {"ok": True, "pid": os.getpid()}
+        if op == "stats":
+            return {"ok": True, **self.stats()}
+        if op != "run":
+            return {"ok": False, "error": f"Unknown op {op!r}"}
+        if not request.get("task"):
+            return {"ok": False, "error": "The request has no task"}
+
+        began = time.perf_counter()
+        try:
+            swarm = self.swarm(
+                request.get("project") or self.default_project
+            )
+            result = swarm.run(
+                request["task"], force=bool(request.get("force"))
+            )
+        except Exception as error:
+            logger.exception(f"Task failed: {error}")
+            response = {
+                "ok": False,
+                "error": f"{type(error).__name__}: {error}",
+            }
+        else:
+            response = {
+                "ok": result.ok,
+                "outputs": result.outputs,
+                "timings": result.timings,
+                "duration": result.duration,
+                "error": result.error
+                or "; ".join(
+                    f"{stage.name}: {stage.error}"
+                    for stage in result.stages.values()
+                    if stage.error
+                )
+                or None,
+            }
+        elapsed = time.perf_counter() - began
+        response["server_s"] = elapsed
+        with self._lock:
+            self.tasks += 1
+            self.failed += not response["ok"]
+            self.busy_seconds += elapsed
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns request counters.
+
+        Returns:
+            Dict[str, Any]: uptime_s, requests, tasks, failed tasks, the
+                mean time per task and the warm projects.
+        """
+        with self._lock:
+            return {
+                "uptime_s": time.time() - self.started_at,
+                "requests": self.requests,
+                "tasks": self.tasks,
+                "failed": self.failed,
+                "task_s_mean": (
+                    self.busy_seconds / self.tasks
+                    if self.tasks
+                    else None
+                ),
+                "projects": sorted(self._swarms),
+            }
+
+    def _bind(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self.path):
+            if DaemonClient(self.path, timeout=1).ping():
+                raise RuntimeError(
+                    f"A daemon is already listening on {self.path}"
+                )
+            # Left behind by a daemon that did not shut down cleanly
+            os.unlink(self.path)
+        self._server = _Server(self.path, _Handler)
+        self._server.swarm_daemon = self
+
+    def serve_forever(self) -> None:
+        """
+        Warms up, then serves requests until `shutdown` is called.
+
+        Raises:
+            RuntimeError: If another daemon already listens on the socket.
+        """
+        self._bind()
+        try:
+            logger.info(
+                f"Warmed up in {self.warm_up():.2f}s, listening on"
+                f" {self.path}"
+            )
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+
+    def shutdown(self) -> None:
+        """Stops `serve_forever`; safe to call from any thread."""
+        if self._server is not None:
+            self._server.shutdown()
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m dev_swarm.daemon",
+        description="Serve DevSwarm runs from a warm process.",
+    )
+    parser.add_argument("--socket", default=DEFAULT_SOCKET_PATH)
+    parser.add_argument(
+        "--project",
+        action="append",
+        dest="projects",
+        help="project to warm up; the first one is the default",
+    )
+    parser.add_argument(
+        "--options",
+        default="{}",
+        help="DevSwarm arguments as a JSON object",
+    )
+    parser.add_argument(
+        "--fake-latency",
+        type=float,
+        help="answer with FakeLLM of this latency instead of the API",
+    )
+    args = parser.parse_args(argv)
+
+    if args.fake_latency is not None:
+        from dev_swarm.fake_llm import use_fake_model
+
+        use_fake_model(
+            latency=args.fake_latency,
+            time_to_first_token=args.fake_latency,
+        )
+    daemon = SwarmDaemon(
+        args.socket,
+        swarm_options=json.loads(args.options),
+        projects=args.projects or ["dev_swarm"],
+    )
+
+    def stop(signum: int, frame: Any) -> None:
+        # shutdown() waits for serve_forever, so it cannot run on the
+        # thread that serves
+        threading.Thread(target=daemon.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    daemon.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,76 @@
+import os
+import resource
+import threading
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ThreadPoolExecutor,
+    wait,
+)
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    Optional,
+    Union,
+)
+
+from dev_swarm.artifacts import artifact_scope, get_store, task_id_for
+from dev_swarm.cache import CachedModel, ResponseCache, enable_cache
 from dev_swarm.documentor_agent import DocumentorAgent
 from dev_swarm.tester_agent import TesterAgent
 from dev_swarm.function_generator_agent import FunctionGeneratorAgent
+from dev_swarm.hedging import HedgedModel, hedge_model
+from dev_swarm.flow import (
+    FlowResult,
+    FlowScheduler,
+    StageResult,
+    current_stage,
+    parse_flow,
+)
+from dev_swarm.incremental import (
+    force_rebuild,
+    rebuild_scope,
+    stage_fingerprint,
+)
+from dev_swarm.journal import get_journal
+from dev_swarm.llm import get_model
+from dev_swarm.log import log_payload
+from dev_swarm.memory import (
+    MemoryPolicy,
+    MemoryUsage,
+    memory_policy,
+    memory_usage,
+)
+from dev_swarm.metrics import MetricsRegistry, export_jsonl, span
+from dev_swarm.markdown import (
+    CodeBlockExtractor,
+    extract_code_from_markdown,
+)
+from dev_swarm.prompt_builder import PromptTemplate
+from dev_swarm.rate_limit import (
+    DEFAULT_PRIORITY,
+    GENERATOR_PRIORITY,
+    RateLimiter,
+    get_rate_limiter,
+    limit_model,
+)
+from dev_swarm.prompts import (
+    CHUNK_DOCUMENTATION_TEMPLATE,
+    DOCUMENTATION_TEMPLATE,
+    INVALID_CODE_FEEDBACK,
+    TEST_WRITER_TEMPLATE,
+)
+from dev_swarm.similarity import SimilarTaskIndex
+from dev_swarm.test_runner import SandboxedTestRunner
+from dev_swarm.validation import (
+    InvalidCodeError,
+    ValidationResult,
+    symbol_summary,
+    validate_code,
+)
 from swarms.utils.loguru_logger import logger
 
 
@@ -14,10 +84,76 @@ class DevSwarm:
         tester_agent_name (str): The name of the TesterAgent.
         function_generator_agent_name (str): The name of the FunctionGeneratorAgent.
         max_loops (int): The maximum number of loops for the agents.
+        refinement (str): With "delta", the documentor's and tester's
+            loops after the first ask for a unified diff or replacement
+            definitions against their previous output, applied and
+            validated locally, instead of regenerating it; edits that do
+            not apply fall back to a full regeneration. Chunked
+            documentation is not refined. Defaults to None (full loops).
         module (str): The module path for the agents.
         docs_folder_path (str): The path to the documentation folder.
         tests_folder_path (str): The path to the tests folder.
-        flow (str): The flow configuration for rearranging the agents.
+        flow (str): The flow configuration for the agents. Stages separated by
+            "->" run one after the other and stages separated by "," run at the
+            same time, e.g. "FunctionGenerator -> DocumentorAgent, TesterAgent".
+        cache_path (str): Path of an sqlite LLM response cache shared by the
+            agents. Caching is disabled when None.
+        llm (Any): Model shared by every agent, e.g. a pooled `ChatBackend`.
+            Defaults to the registry model.
+        rate_limiter (RateLimiter): Keeps the agents' model calls within
+            RPM/TPM limits, admitting generator calls first. Defaults to
+            the process-wide limiter of `set_rate_limits`, if any.
+        hedging (Union[bool, dict]): Send a duplicate request when an
+            agent's first token is later than usual for that agent, and
+            keep whichever answers first. A dict is forwarded to
+            `HedgedModel`, e.g. `{"percentile": 90, "max_hedge_ratio": 0.05}`.
+        candidates (int): Generations launched at once; the first whose
+            code compiles and whose imports resolve is used. See
+            `FunctionGeneratorAgent.speculate`. Ignored by the streaming
+            pipeline.
+        task_index_path (str): Path of an sqlite index of earlier tasks and
+            their validated generations. Disabled when None.
+        reuse_threshold (float): Task similarity above which an indexed
+            generation is reused without calling the model. None disables
+            reuse.
+        reference_threshold (float): Task similarity above which the
+            closest indexed code is added to the generator prompt as a
+            reference. None disables references.
+        streaming_pipeline (bool): Stream the generator's response and start the
+            downstream stages on its code as soon as the stream ends.
+        validation_gate (bool): Check the generated code before the
+            downstream stages run: it must compile and define a function
+            or class. Invalid code is regenerated up to
+            `validation_retries` times, then the run fails without
+            calling the downstream agents. The generator stage then
+            outputs the extracted code rather than the full response.
+        validation_retries (int): Regenerations after failed validation.
+        summarize_code (bool): Give the tester a summary of the generated
+            code (signatures and docstrings) instead of the whole code.
+        memory (Union[str, MemoryPolicy, dict]): How agents' conversation
+            histories are bounded across tasks: "reset", "window",
+            "summarize" or a `MemoryPolicy`, applied before each task of
+            the agent. A dict maps agent names to policies. The histories
+            grow without bound when None.
+        chunked_docs (bool): Document each top-level class and function of the
+            generated code concurrently instead of in a single request.
+        execute_tests (bool): Run the generated tests against the generated code
+            in sandboxed subprocesses after the tester stage. The report is
+            stored in the tester stage's `details["test_report"]`.
+        repair_tests (bool): When executed tests fail, ask the tester to fix
+            them once and run them again.
+        test_runner (SandboxedTestRunner): Runner used by `execute_tests`.
+        incremental (bool): Reuse the documentation and tests of a previous
+            run when the generated code, prompt template, model and stage
+            options are unchanged. Pass `force=True` to `run` to rebuild.
+        journal_path (str): Path of an append-only JSONL journal of agent
+            turns and completed stages. A run of a task that crashed or
+            failed resumes after its last completed stage. Journaling is
+            disabled when None.
+        metrics_path (str): JSON lines file every run appends its metrics
+            spans to. Disabled when None.
+        prometheus_path (str): Prometheus text file rewritten after every
+            run with the counters of `self.metrics`. Disabled when None.
     """
 
     def __init__(
@@ -27,7 +163,29 @@ class DevSwarm:
         tester_agent_name: str = "TesterAgent",
         function_generator_agent_name: str = "FunctionGeneratorAgent",
         max_loops: int = 1,
+        refinement: str = None,
         project: str = "dev_swarm",
+        cache_path: str = None,
+        streaming_pipeline: bool = False,
+        chunked_docs: bool = False,
+        validation_gate: bool = False,
+        validation_retries: int = 1,
+        summarize_code: bool = False,
+        memory: Union[str, MemoryPolicy, dict] = None,
+        execute_tests: bool = False,
+        repair_tests: bool = False,
+        test_runner: SandboxedTestRunner = None,
+        incremental: bool = False,
+        journal_path: str = None,
+        llm=None,
+        rate_limiter: RateLimiter = None,
+        hedging: Union[bool, dict] = False,
+        candidates: int = 1,
+        task_index_path: str = None,
+        reuse_threshold: Optional[float] = 0.9,
+        reference_threshold: Optional[float] = 0.6,
+        metrics_path: str = None,
+        prometheus_path: str = None,
         *args,
         **kwargs,
     ):
@@ -36,10 +194,75 @@ class DevSwarm:
         self.function_generator_agent_name = (
             function_generator_agent_name
         )
+        if refinement not in (None, "delta"):
+            raise ValueError(
+                f"Unknown refinement {refinement!r}; expected 'delta'"
+            )
         self.max_loops = max_loops
+        self.refinement = refinement
         self.flow = flow
         self.max_loops = max_loops
         self.project = project
+        self.cache_path = cache_path
+        self.streaming_pipeline = streaming_pipeline
+        self.chunked_docs = chunked_docs
+        self.execute_tests = execute_tests
+        self.repair_tests = repair_tests
+        self.validation_gate = validation_gate
+        self.validation_retries = validation_retries
+        self.summarize_code = summarize_code
+        self.test_runner = test_runner or SandboxedTestRunner()
+        self.incremental = incremental
+        self.metrics_path = metrics_path
+        self.prometheus_path = prometheus_path
+        self.metrics = MetricsRegistry()
+        self.journal = (
+            get_journal(journal_path)
+            if journal_path is not None
+            else None
+        )
+        self.task_index = (
+            SimilarTaskIndex(task_index_path)
+            if task_index_path is not None
+            else None
+        )
+
+        if cache_path is not None:
+            if llm is None:
+                llm = enable_cache(path=cache_path)
+            elif not isinstance(llm, CachedModel):
+                llm = CachedModel(llm, ResponseCache(path=cache_path))
+        self.llm = llm
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        generator_llm = downstream_llm = llm
+        if self.rate_limiter is not None:
+            model = llm if llm is not None else get_model()
+            generator_llm = limit_model(
+                model, self.rate_limiter, GENERATOR_PRIORITY
+            )
+            downstream_llm = limit_model(
+                model, self.rate_limiter, DEFAULT_PRIORITY
+            )
+        documentor_llm = tester_llm = downstream_llm
+
+        # Each agent gets its own hedged model, so hedging thresholds
+        # follow that agent's latencies. Hedging wraps the limited model:
+        # hedges count against the limits, and the hedge clock stops
+        # while a call waits for the limiter.
+        if hedging:
+            options = hedging if isinstance(hedging, dict) else {}
+            generator_llm, documentor_llm, tester_llm = (
+                hedge_model(model or get_model(), name, **options)
+                for model, name in (
+                    (generator_llm, function_generator_agent_name),
+                    (downstream_llm, documentor_agent_name),
+                    (downstream_llm, tester_agent_name),
+                )
+            )
+
+        # One store for the project, so each task gets its own directory
+        # and every writer shares the same manifest
+        self.artifact_store = get_store(project)
 
         # Initialize the agents
         self.documentor_agent = DocumentorAgent(
@@ -47,6 +270,10 @@ class DevSwarm:
             max_loops=max_loops,
             module=project,
             docs_folder_path=project,
+            artifact_store=self.artifact_store,
+            llm=documentor_llm,
+            refinement=refinement,
+            journal=self.journal,
         )
 
         self.tester_agent = TesterAgent(
@@ -54,10 +281,21 @@ class DevSwarm:
             max_loops=max_loops,
             module=project,
             tests_folder_path=project,
+            artifact_store=self.artifact_store,
+            llm=tester_llm,
+            refinement=refinement,
+            journal=self.journal,
         )
 
         self.function_generator_agent = FunctionGeneratorAgent(
-            folder_path=project
+            folder_path=project,
+            artifact_store=self.artifact_store,
+            llm=generator_llm,
+            journal=self.journal,
+            candidates=candidates,
+            task_index=self.task_index,
+            reuse_threshold=reuse_threshold,
+            reference_threshold=reference_threshold,
         )
 
         self.agents = [
@@ -66,38 +304,560 @@ class DevSwarm:
             self.function_generator_agent,
         ]
 
-    def run(self, task: str) -> str:
+        # Stage names usable in the flow string. Agents keep conversation
+        # state, so each one handles a single task at a time; concurrent
+        # tasks are pipelined through the stages instead.
+        if streaming_pipeline:
+            generate = self._stream_generate
+        elif validation_gate:
+            generate = self._validated_generate
+        else:
+            generate = self.function_generator_agent.run
+        generate = self._serialized(
+            generate,
+            self.function_generator_agent,
+            self._memory_policy(
+                memory, function_generator_agent_name
+            ),
+            publishes=streaming_pipeline,
+        )
+        document = (
+            self.documentor_agent.run_chunked
+            if chunked_docs
+            else self.documentor_agent.run
+        )
+        write_tests = (
+            self._test_and_execute
+            if execute_tests
+            else self._write_tests
+        )
+        if incremental:
+            document = self._incremental(
+                document,
+                "docs",
+                self.documentor_agent,
+                (
+                    CHUNK_DOCUMENTATION_TEMPLATE
+                    if chunked_docs
+                    else DOCUMENTATION_TEMPLATE
+                ),
+                chunked=chunked_docs,
+                refinement=refinement,
+                max_loops=max_loops,
+            )
+            write_tests = self._incremental(
+                write_tests,
+                "tests",
+                self.tester_agent,
+                TEST_WRITER_TEMPLATE,
+                execute=execute_tests,
+                repair=repair_tests,
+                summarize=summarize_code,
+                refinement=refinement,
+                max_loops=max_loops,
+            )
+        self.stages = {
+            self.function_generator_agent.agent_name: generate,
+            function_generator_agent_name: generate,
+            documentor_agent_name: self._serialized(
+                document,
+                self.documentor_agent,
+                self._memory_policy(memory, documentor_agent_name),
+            ),
+            tester_agent_name: self._serialized(
+                write_tests,
+                self.tester_agent,
+                self._memory_policy(memory, tester_agent_name),
+            ),
+        }
+        self.scheduler = FlowScheduler(parse_flow(flow), self.stages)
+
+    @staticmethod
+    def _memory_policy(
+        memory, agent_name: str
+    ) -> Optional[MemoryPolicy]:
+        if isinstance(memory, dict):
+            memory = memory.get(agent_name)
+        return memory_policy(memory)
+
+    @staticmethod
+    def _serialized(
+        stage: Callable,
+        agent=None,
+        policy: MemoryPolicy = None,
+        publishes: bool = False,
+    ) -> Callable:
+        lock = threading.Lock()
+
+        def run_stage(task, **kwargs):
+            with lock:
+                if policy is not None:
+                    policy.apply(agent)
+                return stage(task, **kwargs)
+
+        run_stage.publishes = publishes
+        return run_stage
+
+    def _incremental(
+        self,
+        stage: Callable,
+        artifact: str,
+        agent,
+        template: PromptTemplate,
+        **options,
+    ) -> Callable:
+        """
+        Wraps a stage derived from the generated code so that it returns
+        the previous artifact when nothing it depends on has changed.
+
+        Args:
+            stage (Callable): The stage to wrap.
+            artifact (str): The stage's key in STAGE_FILES.
+            agent: The agent behind the stage, whose model is fingerprinted.
+            template (PromptTemplate): The stage's prompt template.
+            **options: Stage options that change its output.
+
+        Returns:
+            Callable: The wrapped stage.
+        """
+
+        def run_stage(task: str) -> str:
+            code = (
+                extract_code_from_markdown(task)
+                if "```" in task
+                else task
+            )
+            fingerprint = stage_fingerprint(
+                code,
+                template.version,
+                model=getattr(agent.llm, "model_name", None),
+                module=self.project,
+                **options,
+            )
+            stage_result = current_stage()
+            details = stage_result.details if stage_result else {}
+
+            if not force_rebuild():
+                previous = self.artifact_store.lookup(
+                    artifact, fingerprint
+                )
+                if previous is not None:
+                    logger.info(
+                        f"Reusing {artifact}: generated code unchanged"
+                    )
+                    details["reused"] = True
+                    # Artifacts are written with one trailing newline
+                    return previous[:-1]
+
+            output = stage(task)
+            self.artifact_store.record_fingerprint(
+                artifact, fingerprint
+            )
+            details["reused"] = False
+            return output
+
+        return run_stage
+
+    def _stream_generate(self, task: str, publish: Callable) -> str:
+        """
+        Streams the generator response, extracting its code blocks as the
+        chunks arrive, and publishes the code to the downstream stages as
+        soon as the stream ends, before the code is saved and without the
+        agent loop. Every block is published, joined like
+        `extract_code_from_markdown` joins them, so the downstream stages
+        get the same code as without streaming. With the validation gate,
+        only code that passes validation is published, and a response
+        that fails is regenerated.
+
+        Args:
+            task (str): The task to generate code for.
+            publish (Callable): Hands a value to the downstream stages.
+
+        Returns:
+            str: The full generator response.
+
+        Raises:
+            InvalidCodeError: If the validation gate rejects every attempt.
+        """
+        request = task
+        retries = (
+            self.validation_retries if self.validation_gate else 0
+        )
+        for attempt in range(retries + 1):
+            extractor = CodeBlockExtractor()
+            chunks = []
+            started = time.perf_counter()
+
+            for chunk in self.function_generator_agent.stream_run(
+                request
+            ):
+                chunks.append(chunk)
+                extractor.feed(chunk)
+            extractor.close()
+            response = "".join(chunks)
+            code = "\n".join(block.code for block in extractor.blocks)
+            if not self.validation_gate:
+                publish(code or response)
+                break
+            result = self._validate(code)
+            if result.ok:
+                publish(code)
+                break
+            request = self._rejected(task, result, attempt)
+        else:
+            raise InvalidCodeError(result)
+        logger.info(
+            "Generated code ready after"
+            f" {time.perf_counter() - started:.2f}s"
+        )
+        self.function_generator_agent.save_code(code)
+        return response
+
+    def _validate(self, code: str) -> ValidationResult:
+        """
+        Runs the validation gate on generated code and records the result
+        and the symbol summary in the stage's details.
+
+        Args:
+            code (str): The extracted code.
+
+        Returns:
+            ValidationResult: The outcome.
+        """
+        with span("validate"):
+            result = validate_code(
+                code, check_imports=False, require_symbols=True
+            )
+        stage = current_stage()
+        if stage is not None:
+            stage.details["validation"] = result.to_dict()
+            if result.ok:
+                stage.details["symbols"] = symbol_summary(code)
+        return result
+
+    def _rejected(
+        self, task: str, result: ValidationResult, attempt: int
+    ) -> str:
+        logger.warning(
+            f"Generated code failed the {result.check} check"
+            f" (attempt {attempt + 1}/{self.validation_retries + 1}):"
+            f" {'; '.join(result.errors)}"
+        )
+        return task + INVALID_CODE_FEEDBACK.format(
+            errors="; ".join(result.errors)
+        )
+
+    def _validated_generate(self, task: str) -> str:
+        """
+        Generates code and validates it before the downstream stages run,
+        regenerating rejected code with the errors appended to the task.
+
+        Args:
+            task (str): The task to generate code for.
+
+        Returns:
+            str: The validated code, without the surrounding prose.
+
+        Raises:
+            InvalidCodeError: If every attempt is rejected.
+        """
+        request = task
+        for attempt in range(self.validation_retries + 1):
+            response = self.function_generator_agent.run(request)
+            code = extract_code_from_markdown(response)
+            result = self._validate(code)
+            if result.ok:
+                return code
+            request = self._rejected(task, result, attempt)
+        raise InvalidCodeError(result)
+
+    def _write_tests(self, task: str) -> str:
+        """
+        Writes tests for the generated code, from its symbol summary when
+        `summarize_code` is set.
+
+        Args:
+            task (str): The generated code, or the generator response containing it.
+
+        Returns:
+            str: The generated tests.
+        """
+        if self.summarize_code:
+            code = (
+                extract_code_from_markdown(task)
+                if "```" in task
+                else task
+            )
+            task = symbol_summary(code)
+        return self.tester_agent.run(task)
+
+    def _test_and_execute(self, task: str) -> str:
+        """
+        Writes tests for the generated code and runs them in the sandbox,
+        with one optional repair round for failing tests.
+
+        Args:
+            task (str): The generated code, or the generator response containing it.
+
+        Returns:
+            str: The final generated tests.
+        """
+        tests = self._write_tests(task)
+        code = (
+            extract_code_from_markdown(task)
+            if "```" in task
+            else task
+        )
+        module_names = ("main", os.path.basename(self.project))
+
+        with span("execute"):
+            report = self.test_runner.run(code, tests, module_names)
+        if report.failures and self.repair_tests:
+            tests = self.tester_agent.repair(code, tests, report)
+            with span("execute", repaired=True):
+                report = self.test_runner.run(
+                    code, tests, module_names
+                )
+
+        stage = current_stage()
+        if stage is not None:
+            stage.details["test_report"] = report
+        return tests
+
+    def hedging_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns the hedging counters and latency histogram of each agent.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: `HedgedModel.stats()` by agent name;
+                empty when hedging is disabled.
+        """
+        stats = {}
+        for agent in self.agents:
+            model = agent.llm
+            if isinstance(model, CachedModel):
+                model = model.model
+            if isinstance(model, HedgedModel):
+                stats[model.name] = model.stats()
+        return stats
+
+    def _run_flow(
+        self,
+        task: str,
+        force: bool = False,
+        resume: bool = True,
+        completed: Dict[str, Any] = None,
+        on_complete: Callable[[StageResult], None] = None,
+    ) -> FlowResult:
+        task_id = task_id_for(task)
+        completed = dict(completed or {}) if not force else {}
+        hooks = [on_complete] if on_complete is not None else []
+        if self.journal is not None:
+            if resume and not force:
+                completed.update(
+                    self.journal.completed_stages(task_id)
+                )
+            self.journal.start_run(task_id, task)
+
+            def record(stage: StageResult) -> None:
+                self.journal.record_stage(
+                    task_id, stage.name, stage.output, stage.duration
+                )
+
+            hooks.append(record)
+        if completed:
+            logger.info(
+                f"Resuming after completed stages:"
+                f" {', '.join(completed)}"
+            )
+
+        def completed_hook(stage: StageResult) -> None:
+            for hook in hooks:
+                hook(stage)
+
+        with artifact_scope(task_id), rebuild_scope(force):
+            result = self.scheduler.run(
+                task,
+                completed or None,
+                completed_hook if hooks else None,
+            )
+
+        if self.journal is not None:
+            self.journal.finish_run(task_id, result.ok)
+
+        self.metrics.observe(result)
+        if self.metrics_path is not None:
+            export_jsonl(result, self.metrics_path)
+        if self.prometheus_path is not None:
+            for name, usage in self.memory_usage().items():
+                self.metrics.set_gauge(
+                    "dev_swarm_agent_memory_messages",
+                    usage.messages,
+                    agent=name,
+                )
+                self.metrics.set_gauge(
+                    "dev_swarm_agent_memory_tokens",
+                    usage.tokens,
+                    agent=name,
+                )
+            # Peak resident set size; ru_maxrss is in KiB on Linux
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            self.metrics.set_gauge(
+                "dev_swarm_process_max_rss_bytes", peak * 1024
+            )
+            self.metrics.write_prometheus(self.prometheus_path)
+        return result
+
+    def memory_usage(self) -> Dict[str, MemoryUsage]:
+        """
+        Measures the conversation history of each agent.
+
+        Returns:
+            Dict[str, MemoryUsage]: Message and token counts by agent name.
+        """
+        return {
+            self.function_generator_agent_name: memory_usage(
+                self.function_generator_agent
+            ),
+            self.documentor_agent_name: memory_usage(
+                self.documentor_agent
+            ),
+            self.tester_agent_name: memory_usage(self.tester_agent),
+        }
+
+    def run(
+        self,
+        task: str,
+        force: bool = False,
+        resume: bool = True,
+        completed: Dict[str, Any] = None,
+        on_complete: Callable[[StageResult], None] = None,
+    ) -> FlowResult:
         """
         Runs the swarm task with the provided flow configuration.
 
+        Stages whose dependencies have completed start immediately, so with
+        the default flow documentation and tests are written concurrently.
+        Artifacts are written to `<project>/<task id>/`.
+
         Args:
             task (str): The task to start.
+            force (bool, optional): Recompute every stage even when
+                `incremental` would reuse its artifact, and ignore the
+                journal. Defaults to False.
+            resume (bool, optional): Skip the stages the journal recorded
+                as completed by an unfinished earlier run. Defaults to True.
+            completed (Dict[str, Any], optional): Outputs of stages already
+                completed elsewhere, e.g. by another job queue worker,
+                which are not run again.
+            on_complete (Callable[[StageResult], None], optional): Called
+                with every stage that completes, to record progress.
 
         Returns:
-            Optional[str]: The output of the rearrange function.
+            FlowResult: The per-stage outputs and timings. An error raised
+                outside of the stages is logged and recorded in `error`.
         """
         try:
-            # out = AgentRearrange(
-            #     agents=self.agents,
-            #     flow=self.flow,
-            #     max_loops=self.max_loops,
-            # )
-            # response = out.run(task)
-            # return response
-            logger.info(f"Running DevSwarm for task: {task}")
-            generator = self.function_generator_agent.run(task)
-            print("type: ", type(generator))
-            logger.info(f"Generated code: {generator}")
-
-            # Document the code
-            document = self.documentor_agent.run(generator)
-            logger.info(f"Documented code: {document}")
-
-            # Test the code
-            test = self.tester_agent.run(generator)
-            logger.info(f"Tested code: {test}")
-
-            return logger.info("DevSwarm completed successfully.")
-        except Exception as e:
-            print(f"Error: {e}")
-            return None
+            log_payload("DevSwarm task", task)
+            result = self._run_flow(
+                task, force, resume, completed, on_complete
+            )
+
+            timings = ", ".join(
+                f"{name}={duration:.2f}s"
+                for name, duration in result.timings.items()
+            )
+            if result.ok:
+                logger.info(
+                    f"DevSwarm completed in {result.duration:.2f}s"
+                    f" ({timings}), first artifact after"
+                    f" {result.time_to_first_artifact:.2f}s"
+                )
+            else:
+                logger.error(
+                    f"DevSwarm finished with failed stages in"
+                    f" {result.duration:.2f}s ({timings})"
+                )
+            if result.resumed:
+                logger.info(f"Resumed: {', '.join(result.resumed)}")
+            if self.incremental:
+                logger.info(
+                    f"Reused: {', '.join(result.reused) or 'none'};"
+                    f" recomputed: {', '.join(result.recomputed) or 'none'}"
+                )
+            return result
+        except Exception as error:
+            logger.exception(f"DevSwarm failed: {error}")
+            return FlowResult(
+                task=task, error=f"{type(error).__name__}: {error}"
+            )
+
+    def run_many(
+        self,
+        tasks: Iterable[str],
+        max_concurrency: int = 4,
+        force: bool = False,
+        resume: bool = True,
+    ) -> Iterator[FlowResult]:
+        """
+        Runs many tasks through the flow with the same agents and model.
+
+        At most `max_concurrency` tasks are in flight at once, and while one
+        task is being documented the next can already be generated. Results
+        are yielded as soon as each task finishes, so they arrive in
+        completion order; use `FlowResult.index` to match them with their
+        position in `tasks`. A failing task never affects the others.
+
+        Args:
+            tasks (Iterable[str]): The tasks to run. Consumed lazily.
+            max_concurrency (int, optional): Maximum number of tasks in flight.
+                Defaults to 4.
+            force (bool, optional): Recompute every stage even when
+                `incremental` would reuse its artifact, and ignore the
+                journal. Defaults to False.
+            resume (bool, optional): Skip the stages the journal recorded
+                as completed by an unfinished earlier run. Defaults to True.
+
+        Yields:
+            FlowResult: The result of each task, in completion order.
+
+        Raises:
+            ValueError: If max_concurrency is lower than 1.
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+        def run_task(index: int, task: str) -> FlowResult:
+            try:
+                result = self._run_flow(task, force, resume)
+            except Exception as error:
+                logger.exception(f"Task {index} failed: {error}")
+                result = FlowResult(
+                    task=task,
+                    error=f"{type(error).__name__}: {error}",
+                )
+            result.index = index
+            return result
+
+        tasks = enumerate(tasks)
+        with ThreadPoolExecutor(
+            max_workers=max_concurrency,
+            thread_name_prefix="dev-swarm-task",
+        ) as pool:
+            running = set()
+            for index, task in tasks:
+                running.add(pool.submit(run_task, index, task))
+                if len(running) < max_concurrency:
+                    continue
+                done, running = wait(
+                    running, return_when=FIRST_COMPLETED
+                )
+                for future in done:
+                    yield future.result()
+
+            while running:
+                done, running = wait(
+                    running, return_when=FIRST_COMPLETED
+                )
+                for future in done:
+                    yield future.result()
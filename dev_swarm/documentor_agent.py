@@ -1,31 +1,31 @@
-from swarms import Agent
-import os
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 
-from dotenv import load_dotenv
-from swarms import OpenAIChat
-from dev_swarm.prompts import DOCUMENTATION_WRITER_SOP
+from swarms import Agent
 from loguru import logger
-from swarms.utils.loguru_logger import logger
-from dev_swarm.utils import create_file
-
-load_dotenv()
 
-api_key = os.getenv("OPENAI_API_KEY")
-
-model = OpenAIChat(
-    model_name="gpt-4-1106-preview",
-    openai_api_key=api_key,
-    max_tokens=4000,
+from dev_swarm.artifacts import ArtifactStore, get_store
+from dev_swarm.chunking import reference_signatures, split_code
+from dev_swarm.journal import StateJournal
+from dev_swarm.llm import get_model
+from dev_swarm.log import add_log_sink, log_payload
+from dev_swarm.markdown import extract_code_from_markdown
+from dev_swarm.metrics import count_call, span
+from dev_swarm.prompts import (
+    CHUNK_DOCUMENTATION_TEMPLATE,
+    DOCUMENTATION_TEMPLATE,
 )
+from dev_swarm.refine import refine_loops
 
-# Ensure the log directory exists
-log_directory = "dev_swarm_logs"
-os.makedirs(log_directory, exist_ok=True)
 
-logger.add(
-    os.path.join(log_directory, "documentor_agent.log"),
-    rotation="1 MB",
-)
+def __getattr__(name: str):
+    # Kept for `from dev_swarm.documentor_agent import model`; the
+    # shared client now lives in the registry and is built lazily.
+    if name == "model":
+        return get_model()
+    raise AttributeError(
+        f"module {__name__!r} has no attribute {name!r}"
+    )
 
 
 class DocumentorAgent(Agent):
@@ -35,10 +35,14 @@ class DocumentorAgent(Agent):
     Args:
         items (List[Any]): List of items to be documented.
         agent_name (str, optional): Name of the agent. Defaults to "DocumentorAgent".
-        llm (model, optional): LLM model. Defaults to model.
+        llm (model, optional): LLM model. Defaults to the shared registry model.
         max_loops (int, optional): Maximum number of loops. Defaults to 1.
         module (str, optional): Module path. Defaults to "docs/swarms/structs".
         docs_folder_path (str, optional): Folder path for storing the documentation files. Defaults to "docs/swarms/structs".
+        prompt_token_budget (int, optional): Maximum prompt tokens; the code to document is truncated to fit. Defaults to the agent's context_length.
+        artifact_store (ArtifactStore, optional): Where the documentation is written. Defaults to the store of docs_folder_path (or module).
+        refinement (str, optional): "delta" makes the loops after the first ask for targeted edits to the documentation instead of rewriting it. Defaults to None.
+        journal (StateJournal, optional): Journal the conversation turns are appended to. Defaults to None.
         *args: Variable length argument list.
         **kwargs: Arbitrary keyword arguments.
 
@@ -46,11 +50,14 @@ class DocumentorAgent(Agent):
         items (List[Any]): List of items to be documented.
         module (str): Module path.
         agent_name (str): Name of the agent.
-        max_loops (int): Maximum number of loops.
+        max_loops (int): Maximum number of loops run by the agent itself; 1 with delta refinement.
+        refine_loops (int): Loops requested, the first included, when refinement is "delta".
         docs_folder_path (str): Folder path for storing the documentation files.
 
     Methods:
         run(task: str, *args, **kwargs): Runs the DocumentorAgent for the specified task.
+        run_chunked(task: str, max_workers: int = 8): Documents each top-level definition concurrently and merges the results.
+        refine(task: str, documentation: str): Improves the documentation with targeted edits over the remaining loops.
         fetch_docs(item): Fetches the documentation and source code for the given item.
         create_file(item, content: str = None): Creates a documentation file for the given item.
 
@@ -59,25 +66,42 @@ class DocumentorAgent(Agent):
     def __init__(
         self,
         agent_name: str = "DocumentorAgent",
-        llm=model,
+        llm=None,
         max_loops: int = 1,
         module: str = None,
         docs_folder_path: str = None,
+        prompt_token_budget: int = None,
+        artifact_store: ArtifactStore = None,
+        refinement: str = None,
+        journal: StateJournal = None,
         *args,
         **kwargs,
     ):
+        add_log_sink("documentor_agent")
         super(DocumentorAgent, self).__init__(
             agent_name=agent_name,
-            llm=model,
-            max_loops=max_loops,
+            llm=llm if llm is not None else get_model(),
+            # Delta refinement runs the later loops itself
+            max_loops=1 if refinement == "delta" else max_loops,
             streaming_on=True,
             *args,
             **kwargs,
         )
         self.module = module
         self.agent_name = agent_name
-        self.max_loops = max_loops
+        # The loops Agent.run performs; with delta refinement the others
+        # are refinement passes
+        self.max_loops = 1 if refinement == "delta" else max_loops
+        self.refinement = refinement
+        self.refine_loops = max_loops
+        self.journal = journal
         self.docs_folder_path = docs_folder_path
+        self.prompt_token_budget = prompt_token_budget or getattr(
+            self, "context_length", None
+        )
+        self.artifact_store = artifact_store or get_store(
+            docs_folder_path or module or "."
+        )
 
     def run(self, task: str, *args, **kwargs) -> str:
         """
@@ -89,18 +113,160 @@ class DocumentorAgent(Agent):
             **kwargs: Arbitrary keyword arguments.
 
         """
-        logger.info(f"Running DocumentorAgent for task: {task}")
+        log_payload("DocumentorAgent task", task)
+
+        prompt = DOCUMENTATION_TEMPLATE.build(
+            budget=self.prompt_token_budget,
+            task=task,
+            module=self.module,
+        )
+        logger.info(
+            f"Documentation prompt: {prompt.prompt_tokens} tokens,"
+            f" {prompt.prefix_tokens} in the static prefix"
+        )
+        with span("document") as record:
+            processed_content = super().run(
+                prompt.text, *args, **kwargs
+            )
+            count_call(record, prompt.text, processed_content)
+        if self.refinement == "delta":
+            processed_content = self.refine(task, processed_content)
+
+        log_payload("Documentation", processed_content)
+        self._record_turns(task, processed_content)
+
+        with span("write", artifact="docs"):
+            artifact = self.artifact_store.write(
+                "docs", f"{processed_content}\n"
+            )
+        logger.info(
+            f"Documentation at {artifact.path}"
+            f" ({'updated' if artifact.changed else 'unchanged'})"
+        )
+
+        return processed_content
+
+    def refine(self, task: str, documentation: str) -> str:
+        """
+        Improves the documentation over the remaining `refine_loops - 1`
+        loops. Each loop asks for a diff, which is applied locally, and
+        regenerates the documentation in full when it does not apply.
+
+        Args:
+            task (str): The documented code, or the response containing it.
+            documentation (str): The documentation of the first loop.
+
+        Returns:
+            str: The refined documentation.
+        """
+        return refine_loops(
+            self.llm,
+            documentation,
+            task,
+            self.refine_loops - 1,
+            "DOCUMENTATION",
+            "markdown",
+            module=self.module,
+            budget=self.prompt_token_budget,
+        )
+
+    def run_chunked(self, task: str, max_workers: int = 8) -> str:
+        """
+        Documents each top-level class and function of the code concurrently
+        and merges the sections into one markdown document.
+
+        Every chunk is sent with only its own source and the signatures of
+        the module symbols it references, so latency follows the largest
+        chunk instead of the whole file. Code that cannot be parsed, or that
+        has no top-level definitions, is documented with `run` instead.
 
-        processed_content = super().run(
-            DOCUMENTATION_WRITER_SOP(
-                task, self.module, *args, **kwargs
+        Args:
+            task (str): The code to document, or a markdown response containing it.
+            max_workers (int, optional): Maximum concurrent requests. Defaults to 8.
+
+        Returns:
+            str: The merged documentation.
+        """
+        code = (
+            extract_code_from_markdown(task)
+            if "```" in task
+            else task
+        )
+        try:
+            chunks = [
+                chunk
+                for chunk in split_code(code)
+                if chunk.kind != "module"
+            ]
+            signatures = reference_signatures(code)
+        except SyntaxError as error:
+            logger.warning(
+                f"Could not split code for chunked documentation: {error}"
             )
+            return self.run(task)
+        if not chunks:
+            return self.run(task)
+
+        logger.info(
+            f"Documenting {len(chunks)} chunks with up to"
+            f" {max_workers} concurrent requests"
         )
 
-        logger.info(f"Documentation: {processed_content}")
+        def document(chunk) -> str:
+            context = "\n\n".join(
+                signatures[name] for name in chunk.references
+            )
+            prompt = CHUNK_DOCUMENTATION_TEMPLATE.build(
+                budget=self.prompt_token_budget,
+                task=chunk.source,
+                module=self.module,
+                context=context or "None",
+                kind=chunk.kind.upper(),
+            )
+            # Direct model calls keep the concurrent requests out of the
+            # agent's shared conversation memory.
+            section = self.llm(prompt.text)
+            count_call(record, prompt.text, section)
+            return section
+
+        with span("document", chunks=len(chunks)) as record:
+            with ThreadPoolExecutor(
+                max_workers=max(1, min(max_workers, len(chunks)))
+            ) as pool:
+                # Each request runs in a copy of this context, so cache
+                # hits are counted on the span
+                futures = [
+                    pool.submit(
+                        contextvars.copy_context().run,
+                        document,
+                        chunk,
+                    )
+                    for chunk in chunks
+                ]
+                sections = [future.result() for future in futures]
+
+        contents = "\n".join(f"- `{chunk.name}`" for chunk in chunks)
+        processed_content = (
+            f"# {self.module}\n\n## Contents\n\n{contents}\n\n"
+            + "\n\n---\n\n".join(
+                section.strip() for section in sections
+            )
+        )
+        self._record_turns(task, processed_content)
 
-        doc_content = f"{processed_content}\n"
-        file_path = create_file(self.module, doc_content, ".py")
-        logger.info(f"Documentation created at {file_path}")
+        with span("write", artifact="docs"):
+            artifact = self.artifact_store.write(
+                "docs", f"{processed_content}\n"
+            )
+        logger.info(
+            f"Documentation at {artifact.path}"
+            f" ({'updated' if artifact.changed else 'unchanged'})"
+        )
 
         return processed_content
+
+    def _record_turns(self, task: str, response: str) -> None:
+        if self.journal is not None:
+            self.journal.record_exchange(
+                self.agent_name, task, response
+            )
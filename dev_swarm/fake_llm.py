@@ -0,0 +1,214 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterator, Union
+
+from dev_swarm.llm import register_model
+
+
+def _prompt_key(prompt: Any) -> str:
+    return hashlib.sha256(str(prompt).encode("utf-8")).hexdigest()
+
+
+def make_response(
+    code_lines: int = 40,
+    prose_lines: int = 5,
+    name: str = "generated",
+) -> str:
+    """
+    Builds a markdown response shaped like a model's: prose followed by a
+    fenced python block and a short explanation.
+
+    Args:
+        code_lines (int, optional): Lines of code in the block. Defaults to 40.
+        prose_lines (int, optional): Lines of prose before the block. Defaults to 5.
+        name (str, optional): Prefix of the generated function names.
+
+    Returns:
+        str: The markdown response.
+    """
+    functions = []
+    for index in range(max(1, code_lines // 4)):
+        functions.append(
+            f"def {name}_{index}(value: int) -> int:\n"
+            f'    """Returns value times {index}."""\n'
+            f"    return value * {index}\n"
+        )
+    prose = (
+        "This code handles the requested behaviour.\n" * prose_lines
+    )
+    return (
+        f"{prose}\n```python\n"
+        + "\n\n".join(functions)
+        + "```\n\nThe functions above are typed and documented.\n"
+    )
+
+
+class FakeLLM:
+    """
+    Deterministic, offline stand-in for a chat model.
+
+    Prompts found in `responses` get their recorded response; every other
+    prompt gets a generated markdown response (see `make_response`) whose
+    function names derive from the prompt, so equal prompts always get
+    equal responses. Calls sleep for `latency` seconds, and `stream`
+    yields the response in `chunk_size` pieces every `chunk_interval`
+    seconds after `time_to_first_token`.
+
+    Register it with `use_fake_model` so that every agent uses it.
+
+    Args:
+        responses (Union[Dict[str, str], str], optional): Recorded responses
+            keyed by prompt, or the path of a JSON lines recording written by
+            `RecordingModel`. Defaults to None.
+        code_lines (int, optional): Code lines of generated responses. Defaults to 40.
+        prose_lines (int, optional): Prose lines of generated responses. Defaults to 5.
+        latency (float, optional): Seconds per non-streaming call. Defaults to 0.
+        time_to_first_token (float, optional): Seconds before the first
+            streamed chunk. Defaults to 0.
+        chunk_size (int, optional): Characters per streamed chunk. Defaults to 64.
+        chunk_interval (float, optional): Seconds between streamed chunks. Defaults to 0.
+        model_name (str, optional): Reported model name. Defaults to "fake-llm".
+    """
+
+    def __init__(
+        self,
+        responses: Union[Dict[str, str], str] = None,
+        code_lines: int = 40,
+        prose_lines: int = 5,
+        latency: float = 0.0,
+        time_to_first_token: float = 0.0,
+        chunk_size: int = 64,
+        chunk_interval: float = 0.0,
+        model_name: str = "fake-llm",
+    ):
+        if isinstance(responses, str):
+            responses = load_recording(responses)
+        self.responses = {
+            _prompt_key(prompt): response
+            for prompt, response in (responses or {}).items()
+        }
+        self.code_lines = code_lines
+        self.prose_lines = prose_lines
+        self.latency = latency
+        self.time_to_first_token = time_to_first_token
+        self.chunk_size = chunk_size
+        self.chunk_interval = chunk_interval
+        self.model_name = model_name
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def respond(self, task: Any) -> str:
+        """
+        Returns the response for `task` without any delay.
+
+        Args:
+            task (Any): The prompt.
+
+        Returns:
+            str: The recorded or generated response.
+        """
+        key = _prompt_key(task)
+        if key in self.responses:
+            return self.responses[key]
+        return make_response(
+            self.code_lines, self.prose_lines, name=f"f_{key[:8]}"
+        )
+
+    def _count(self) -> None:
+        with self._lock:
+            self.calls += 1
+
+    def __call__(self, task: Any, *args, **kwargs) -> str:
+        self._count()
+        if self.latency:
+            time.sleep(self.latency)
+        return self.respond(task)
+
+    def run(self, task: Any, *args, **kwargs) -> str:
+        return self(task, *args, **kwargs)
+
+    def stream(self, task: Any, *args, **kwargs) -> Iterator[str]:
+        self._count()
+        response = self.respond(task)
+        if self.time_to_first_token:
+            time.sleep(self.time_to_first_token)
+        for start in range(0, len(response), self.chunk_size):
+            if start and self.chunk_interval:
+                time.sleep(self.chunk_interval)
+            yield response[start : start + self.chunk_size]
+
+
+class RecordingModel:
+    """
+    Wraps a live model and appends every prompt and response to a JSON
+    lines file that `FakeLLM` can replay offline.
+
+    Args:
+        model (Any): The model to wrap.
+        path (str): The recording file.
+    """
+
+    def __init__(self, model: Any, path: str):
+        self.model = model
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _record(self, task: Any, response: Any) -> None:
+        line = json.dumps(
+            {"prompt": str(task), "response": str(response)}
+        )
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a") as file:
+                file.write(f"{line}\n")
+
+    def __call__(self, task: Any, *args, **kwargs):
+        response = self.model(task, *args, **kwargs)
+        self._record(task, response)
+        return response
+
+    def run(self, task: Any, *args, **kwargs):
+        return self(task, *args, **kwargs)
+
+    def __getattr__(self, name: str):
+        if name in ("model", "path", "_lock"):
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+
+def load_recording(path: str) -> Dict[str, str]:
+    """
+    Reads a JSON lines recording written by `RecordingModel`.
+
+    Args:
+        path (str): The recording file.
+
+    Returns:
+        Dict[str, str]: Responses keyed by prompt; later lines win.
+    """
+    responses: Dict[str, str] = {}
+    with open(path) as file:
+        for line in file:
+            if line.strip():
+                record = json.loads(line)
+                responses[record["prompt"]] = record["response"]
+    return responses
+
+
+def use_fake_model(name: str = "default", **kwargs) -> FakeLLM:
+    """
+    Registers a `FakeLLM` so agents built afterwards use it.
+
+    Args:
+        name (str, optional): Registry key. Defaults to "default".
+        **kwargs: Arguments forwarded to `FakeLLM`.
+
+    Returns:
+        FakeLLM: The registered model.
+    """
+    return register_model(FakeLLM(**kwargs), name)
@@ -0,0 +1,419 @@
+import contextvars
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from loguru import logger
+
+
+@dataclass
+class StageResult:
+    """
+    Outcome of a single stage of a flow run.
+
+    Attributes:
+        name (str): Name of the stage.
+        status (str): One of "completed", "failed" or "skipped".
+        output (Any): The value returned by the stage.
+        error (Optional[str]): The error message if the stage failed.
+        started_at (float): Start offset in seconds from the beginning of the run.
+        duration (float): Wall-clock duration of the stage in seconds.
+        published_at (Optional[float]): Offset at which the stage's output became
+            available to downstream stages. Streaming stages publish before
+            they finish.
+        details (Dict[str, Any]): Structured extras recorded while the stage ran,
+            see `current_stage`.
+    """
+
+    name: str
+    status: str = "pending"
+    output: Any = None
+    error: Optional[str] = None
+    started_at: float = 0.0
+    duration: float = 0.0
+    published_at: Optional[float] = None
+    details: Dict[str, Any] = field(default_factory=dict)
+
+
+_current_stage: contextvars.ContextVar = contextvars.ContextVar(
+    "dev_swarm_current_stage", default=None
+)
+
+
+def current_stage() -> Optional[StageResult]:
+    """
+    Returns the result of the stage running in the calling thread.
+
+    Code running inside a stage uses this to attach structured details,
+    e.g. `current_stage().details["test_report"] = report`.
+
+    Returns:
+        Optional[StageResult]: The running stage, or None outside a flow.
+    """
+    return _current_stage.get()
+
+
+@dataclass
+class FlowResult:
+    """
+    Outcome of a whole flow run.
+
+    Attributes:
+        task (str): The task the flow was started with.
+        stages (Dict[str, StageResult]): Per-stage results in start order.
+        duration (float): Wall-clock duration of the run in seconds.
+        index (Optional[int]): Position of the task in a batch submission.
+        error (Optional[str]): Error raised outside of any stage, if any.
+    """
+
+    task: str
+    stages: Dict[str, StageResult] = field(default_factory=dict)
+    duration: float = 0.0
+    index: Optional[int] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        """Whether every stage completed."""
+        return self.error is None and all(
+            stage.status == "completed"
+            for stage in self.stages.values()
+        )
+
+    @property
+    def outputs(self) -> Dict[str, Any]:
+        """Outputs of the completed stages, keyed by stage name."""
+        return {
+            name: stage.output
+            for name, stage in self.stages.items()
+            if stage.status == "completed"
+        }
+
+    @property
+    def time_to_first_artifact(self) -> Optional[float]:
+        """Offset at which the first stage output became available."""
+        published = [
+            stage.published_at
+            for stage in self.stages.values()
+            if stage.published_at is not None
+        ]
+        return min(published) if published else None
+
+    @property
+    def timings(self) -> Dict[str, float]:
+        """Durations of every stage that ran, keyed by stage name."""
+        return {
+            name: stage.duration
+            for name, stage in self.stages.items()
+            if stage.status != "skipped"
+        }
+
+    @property
+    def reused(self) -> List[str]:
+        """Stages that returned a previous artifact instead of recomputing."""
+        return [
+            name
+            for name, stage in self.stages.items()
+            if stage.details.get("reused")
+        ]
+
+    @property
+    def recomputed(self) -> List[str]:
+        """Completed stages that produced a new output in this run."""
+        return [
+            name
+            for name, stage in self.stages.items()
+            if stage.status == "completed"
+            and not stage.details.get("reused")
+            and not stage.details.get("resumed")
+        ]
+
+    @property
+    def spans(self) -> List[Any]:
+        """Metrics spans recorded by the stages, in stage order."""
+        return [
+            span
+            for stage in self.stages.values()
+            for span in stage.details.get("spans", [])
+        ]
+
+    @property
+    def resumed(self) -> List[str]:
+        """Stages whose output was restored from an earlier attempt."""
+        return [
+            name
+            for name, stage in self.stages.items()
+            if stage.details.get("resumed")
+        ]
+
+
+def parse_flow(flow: str) -> Dict[str, List[str]]:
+    """
+    Parses a flow string into a dependency graph.
+
+    Stages are separated by "->", stages that may run at the same time are
+    separated by ",", and several chains can be joined with ";" or newlines:
+
+        "FunctionGenerator -> DocumentorAgent, TesterAgent"
+        "A -> B; A -> C -> D"
+
+    Args:
+        flow (str): The flow description.
+
+    Returns:
+        Dict[str, List[str]]: Each stage mapped to the stages it depends on,
+            in order of first appearance.
+
+    Raises:
+        ValueError: If a step is empty or the flow contains a cycle.
+    """
+    graph: Dict[str, List[str]] = {}
+    chains = [
+        chain.strip()
+        for chain in flow.replace("\n", ";").split(";")
+        if chain.strip()
+    ]
+    if not chains:
+        raise ValueError("Flow is empty")
+
+    for chain in chains:
+        previous: List[str] = []
+        for step in chain.split("->"):
+            names = [
+                name.strip()
+                for name in step.split(",")
+                if name.strip()
+            ]
+            if not names:
+                raise ValueError(f"Empty step in flow: {chain!r}")
+            for name in names:
+                deps = graph.setdefault(name, [])
+                for dep in previous:
+                    if dep == name:
+                        raise ValueError(
+                            f"Stage {name!r} depends on itself"
+                        )
+                    if dep not in deps:
+                        deps.append(dep)
+            previous = names
+
+    topological_order(graph)
+    return graph
+
+
+def topological_order(graph: Dict[str, List[str]]) -> List[str]:
+    """
+    Orders the stages so that every stage comes after its dependencies.
+
+    Args:
+        graph (Dict[str, List[str]]): Stage dependency graph.
+
+    Returns:
+        List[str]: The stages in a valid execution order.
+
+    Raises:
+        ValueError: If the graph contains a cycle or an unknown dependency.
+    """
+    remaining = {name: set(deps) for name, deps in graph.items()}
+    for name, deps in remaining.items():
+        unknown = deps - remaining.keys()
+        if unknown:
+            raise ValueError(
+                f"Stage {name!r} depends on unknown stages {sorted(unknown)}"
+            )
+
+    order: List[str] = []
+    while remaining:
+        ready = [name for name, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(
+                f"Flow contains a cycle between {sorted(remaining)}"
+            )
+        for name in ready:
+            order.append(name)
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    return order
+
+
+class FlowScheduler:
+    """
+    Runs a stage dependency graph, starting each stage as soon as all of
+    its dependencies have completed.
+
+    A root stage receives the task. A stage with a single dependency
+    receives that dependency's output; a stage with several receives their
+    outputs joined by blank lines, in the order they appear in the flow.
+    When a stage fails, every stage downstream of it is skipped.
+
+    A stage callable with a truthy `publishes` attribute is called with a
+    `publish` keyword argument. Calling `publish(value)` hands `value` to
+    the downstream stages immediately, while the stage itself keeps
+    running; its return value is still recorded as its output.
+
+    Args:
+        graph (Dict[str, List[str]]): Stage dependency graph, see `parse_flow`.
+        stages (Dict[str, Callable[[Any], Any]]): Callable for every stage name.
+        max_workers (int, optional): Maximum number of stages running at once.
+            Defaults to the number of stages.
+
+    Raises:
+        ValueError: If the graph references a stage without a callable.
+    """
+
+    def __init__(
+        self,
+        graph: Dict[str, List[str]],
+        stages: Dict[str, Callable[[Any], Any]],
+        max_workers: int = None,
+    ):
+        missing = [name for name in graph if name not in stages]
+        if missing:
+            raise ValueError(
+                f"Flow references unknown stages {missing}, "
+                f"available stages are {sorted(stages)}"
+            )
+        self.order = topological_order(graph)
+        self.graph = graph
+        self.stages = stages
+        self.max_workers = max_workers or len(graph)
+
+    def _stage_input(
+        self, name: str, available: Dict[str, Any], task: Any
+    ) -> Any:
+        deps = self.graph[name]
+        if not deps:
+            return task
+        if len(deps) == 1:
+            return available[deps[0]]
+        return "\n\n".join(str(available[dep]) for dep in deps)
+
+    def _run_stage(
+        self,
+        stage: StageResult,
+        stage_input: Any,
+        start: float,
+        events: queue.Queue,
+    ) -> None:
+        def publish(value: Any) -> None:
+            if stage.published_at is None:
+                stage.published_at = time.perf_counter() - start
+                events.put(("published", stage.name, value))
+
+        began = time.perf_counter()
+        stage.started_at = began - start
+        fn = self.stages[stage.name]
+        token = _current_stage.set(stage)
+        try:
+            if getattr(fn, "publishes", False):
+                stage.output = fn(stage_input, publish=publish)
+            else:
+                stage.output = fn(stage_input)
+            stage.status = "completed"
+            publish(stage.output)
+        except Exception as error:
+            logger.exception(f"Stage {stage.name} failed: {error}")
+            stage.status = "failed"
+            stage.error = f"{type(error).__name__}: {error}"
+        finally:
+            _current_stage.reset(token)
+            stage.duration = time.perf_counter() - began
+            logger.info(
+                f"Stage {stage.name} {stage.status} in"
+                f" {stage.duration:.2f}s"
+            )
+            events.put(("done", stage.name, None))
+
+    def run(
+        self,
+        task: Any,
+        completed: Dict[str, Any] = None,
+        on_complete: Callable[[StageResult], None] = None,
+    ) -> FlowResult:
+        """
+        Runs every stage of the graph for the given task.
+
+        Args:
+            task (Any): The input of the root stages.
+            completed (Dict[str, Any], optional): Outputs of stages that
+                already completed in an earlier attempt. They are not run
+                again and are marked with `details["resumed"]`.
+            on_complete (Callable[[StageResult], None], optional): Called
+                from the scheduling thread after each stage completes.
+
+        Returns:
+            FlowResult: Per-stage outputs, statuses and timings.
+        """
+        result = FlowResult(task=task)
+        start = time.perf_counter()
+        pending = list(self.order)
+        available: Dict[str, Any] = {}
+        events: queue.Queue = queue.Queue()
+        running = 0
+
+        for name, output in (completed or {}).items():
+            if name in pending:
+                pending.remove(name)
+                available[name] = output
+                result.stages[name] = StageResult(
+                    name=name,
+                    status="completed",
+                    output=output,
+                    published_at=0.0,
+                    details={"resumed": True},
+                )
+
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="dev-swarm-stage",
+        ) as pool:
+            while pending or running:
+                for name in list(pending):
+                    deps = self.graph[name]
+                    if all(dep in available for dep in deps):
+                        pending.remove(name)
+                        stage = StageResult(
+                            name=name, status="running"
+                        )
+                        result.stages[name] = stage
+                        # Each stage inherits the caller's context
+                        # variables, e.g. the artifact scope.
+                        pool.submit(
+                            contextvars.copy_context().run,
+                            self._run_stage,
+                            stage,
+                            self._stage_input(name, available, task),
+                            start,
+                            events,
+                        )
+                        running += 1
+                    elif any(
+                        dep not in available
+                        and dep in result.stages
+                        and result.stages[dep].status
+                        in ("failed", "skipped")
+                        for dep in deps
+                    ):
+                        pending.remove(name)
+                        result.stages[name] = StageResult(
+                            name=name,
+                            status="skipped",
+                            error="Upstream stage did not complete",
+                        )
+
+                if not running:
+                    continue
+                kind, name, value = events.get()
+                if kind == "published":
+                    available[name] = value
+                else:
+                    running -= 1
+                    stage = result.stages[name]
+                    if on_complete and stage.status == "completed":
+                        on_complete(stage)
+
+        result.duration = time.perf_counter() - start
+        return result
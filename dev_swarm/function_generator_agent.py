@@ -1,9 +1,20 @@
-from dev_swarm.documentor_agent import model
-from dev_swarm.prompts import FUNCTION_GENERATOR_PROMPT
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterator, Optional, Tuple
+
+from dev_swarm.artifacts import ArtifactStore, get_store
+from dev_swarm.journal import StateJournal
+from dev_swarm.llm import get_model, stream_model
+from dev_swarm.log import log_payload
+from dev_swarm.metrics import count_call, metered_stream, span
+from dev_swarm.prompt_builder import count_tokens, truncate_to_tokens
+from dev_swarm.prompts import SIMILAR_CODE_REFERENCE, load_prompt
+from dev_swarm.similarity import SimilarTask, SimilarTaskIndex
+from dev_swarm.validation import ValidationResult, validate_code
 from swarms import Agent
 from loguru import logger
-from swarms import extract_code_from_markdown
-from dev_swarm.utils import create_file
+from dev_swarm.markdown import extract_code_from_markdown
 
 
 class FunctionGeneratorAgent(Agent):
@@ -13,13 +24,26 @@ class FunctionGeneratorAgent(Agent):
     Args:
         agent_name (str, optional): Name of the agent. Defaults to "FunctionGenerator".
         system_prompt (str, optional): Prompt to use for the language model. Defaults to FUNCTION_GENERATOR_PROMPT.
-        llm (LanguageModel, optional): Language model to use. Defaults to model.
+        llm (LanguageModel, optional): Language model to use. Defaults to the shared registry model.
         max_loops (int, optional): Maximum number of loops for generating code. Defaults to 1.
-        autosave (bool, optional): Whether to autosave the agent's state. Defaults to True.
+        autosave (bool, optional): Whether to autosave the agent's full state as JSON on every step. Defaults to False; use `journal` instead.
         saved_state_path (str, optional): Path to save the agent's state. Defaults to "function_generator.json".
         stopping_token (str, optional): Token to stop code generation. Defaults to "Stop!".
         interactive (bool, optional): Whether to run the agent in interactive mode. Defaults to True.
         context_length (int, optional): Length of the context for the language model. Defaults to 8000.
+        folder_path (str, optional): Folder the generated code is written to.
+        artifact_store (ArtifactStore, optional): Where the generated code is written. Defaults to the store of folder_path.
+        journal (StateJournal, optional): Journal the conversation turns are appended to. Defaults to None.
+        candidates (int, optional): Generations launched at once by `run`; the first one whose code passes
+            validation wins. Defaults to 1 (no speculation).
+        check_imports (bool, optional): Require the imports of speculative candidates to resolve. Defaults to True.
+        lint (bool, optional): Also require speculative candidates to pass pyflakes, when installed. Defaults to False.
+        task_index (SimilarTaskIndex, optional): Index of earlier tasks and their validated generations. Defaults to None.
+        reuse_threshold (float, optional): Similarity above which an indexed generation is returned without calling
+            the model; None disables reuse. Defaults to 0.9.
+        reference_threshold (float, optional): Similarity above which the code of the closest indexed task is added
+            to the prompt as a reference; None disables references. Defaults to 0.6.
+        reference_tokens (int, optional): Longest reference code in tokens. Defaults to 1000.
         **kwargs: Additional keyword arguments to pass to the base class.
 
     Attributes:
@@ -39,30 +63,44 @@ class FunctionGeneratorAgent(Agent):
             Saves the generated code to a file in the specified folder path with the given file name.
             Returns the path of the created file.
 
-        create_file(content: str, folder_path: str, file_name: str) -> str:
-            Creates a file with the given content in the specified folder path with the given file name.
-            Returns the path of the created file.
+        save_code(code: str) -> str:
+            Writes the generated code atomically through the agent's artifact store.
+            Returns the path of the written file.
     """
 
     def __init__(
         self,
         agent_name: str = "FunctionGenerator",
-        system_prompt: str = FUNCTION_GENERATOR_PROMPT,
-        llm=model,
+        system_prompt: str = None,
+        llm=None,
         max_loops: int = 1,
-        autosave: bool = True,
+        autosave: bool = False,
         saved_state_path: str = "function_generator.json",
         stopping_token: str = "Stop!",
         interactive: bool = False,
         context_length: int = 8000,
         folder_path: str = None,
+        artifact_store: ArtifactStore = None,
+        journal: StateJournal = None,
+        candidates: int = 1,
+        check_imports: bool = True,
+        lint: bool = False,
+        task_index: SimilarTaskIndex = None,
+        reuse_threshold: Optional[float] = 0.9,
+        reference_threshold: Optional[float] = 0.6,
+        reference_tokens: int = 1000,
         *args,
         **kwargs,
     ):
+        if system_prompt is None:
+            system_prompt = load_prompt(
+                "function_generator_prompt.txt"
+            )
+
         super().__init__(
             agent_name=agent_name,
             system_prompt=system_prompt,
-            llm=llm,
+            llm=llm if llm is not None else get_model(),
             max_loops=max_loops,
             autosave=autosave,
             saved_state_path=saved_state_path,
@@ -74,6 +112,19 @@ class FunctionGeneratorAgent(Agent):
             **kwargs,
         )
         self.folder_path = folder_path
+        self.artifact_store = artifact_store or get_store(
+            folder_path or "."
+        )
+        self.context_length = context_length
+        self.journal = journal
+        self.candidates = candidates
+        self.check_imports = check_imports
+        self.lint = lint
+        self.task_index = task_index
+        self.reuse_threshold = reuse_threshold
+        self.reference_threshold = reference_threshold
+        self.reference_tokens = reference_tokens
+        self._system_prompt_tokens = None
 
     def run(
         self,
@@ -96,14 +147,282 @@ class FunctionGeneratorAgent(Agent):
         Returns:
             str: Path of the created file.
         """
-        logger.info(
-            f"Running FunctionGeneratorAgent for task: {task}"
+        log_payload("FunctionGeneratorAgent task", task)
+        response, request = self._reuse_or_reference(task)
+        if response is not None:
+            self._record_turns(task, response)
+        elif self.candidates > 1:
+            response = self.speculate(request, *args, **kwargs)
+        else:
+            with span("generate") as record:
+                prompt = self.fit_task(request)
+                response = super().run(prompt, *args, **kwargs)
+                count_call(
+                    record,
+                    f"{self.system_prompt}\n\n{prompt}",
+                    response,
+                )
+            self._record_turns(request, response)
+        with span("extract"):
+            output = extract_code_from_markdown(response)
+        log_payload("Generated code", output, level="DEBUG")
+
+        self.save_code(output)
+        if request is not None:
+            self._index(task, output, response)
+
+        return response
+
+    def _reuse_or_reference(
+        self, task: str
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Looks the task up in the task index.
+
+        Args:
+            task (str): Task for which to generate code.
+
+        Returns:
+            Tuple[Optional[str], Optional[str]]: The indexed generation to
+                reuse and None, or None and the task to send to the model,
+                with the closest indexed code appended as a reference when
+                one is similar enough.
+        """
+        thresholds = [
+            threshold
+            for threshold in (
+                self.reuse_threshold,
+                self.reference_threshold,
+            )
+            if threshold is not None
+        ]
+        if self.task_index is None or not thresholds:
+            return None, task
+
+        with span("similar") as record:
+            match: Optional[SimilarTask] = self.task_index.lookup(
+                task, min(thresholds)
+            )
+            record.extra["similarity"] = match and match.similarity
+            if match is None:
+                return None, task
+            if (
+                self.reuse_threshold is not None
+                and match.similarity >= self.reuse_threshold
+            ):
+                record.extra["mode"] = "reuse"
+                logger.info(
+                    "Reusing the generation of a similar task"
+                    f" (similarity {match.similarity:.2f})"
+                )
+                return match.response, None
+
+            record.extra["mode"] = "reference"
+            code, _ = truncate_to_tokens(
+                extract_code_from_markdown(match.response),
+                self.reference_tokens,
+            )
+            logger.info(
+                "Adding the code of a similar task as a reference"
+                f" (similarity {match.similarity:.2f})"
+            )
+            reference = SIMILAR_CODE_REFERENCE.format(code=code)
+            return None, task + reference
+
+    def _index(self, task: str, code: str, response: str) -> None:
+        # Only validated generations are worth reusing
+        if self.task_index is None:
+            return
+        if validate_code(
+            code, check_imports=False, require_symbols=True
+        ).ok:
+            self.task_index.add(task, response)
+
+    def fit_task(self, task: str) -> str:
+        """
+        Truncates the task so that it fits in the context next to the
+        system prompt.
+
+        Args:
+            task (str): Task for which to generate code.
+
+        Returns:
+            str: The task, shortened if necessary.
+        """
+        if self._system_prompt_tokens is None:
+            self._system_prompt_tokens = count_tokens(
+                self.system_prompt
+            )
+        budget = self.context_length - self._system_prompt_tokens
+        task, truncated = truncate_to_tokens(task, budget)
+        if truncated:
+            logger.warning(
+                f"Task truncated by {truncated} tokens to fit"
+                f" the {self.context_length} token context"
+            )
+        return task
+
+    def stream_run(self, task: str, *args, **kwargs) -> Iterator[str]:
+        """
+        Streams a single completion for the given task.
+
+        Unlike `run`, this skips the agent loop and yields the response
+        chunk by chunk, so callers can act on the code before the model has
+        finished the explanation that follows it.
+
+        Args:
+            task (str): Task for which to generate code.
+            *args: Additional positional arguments for the model.
+            **kwargs: Additional keyword arguments for the model.
+
+        Yields:
+            str: The next piece of the response.
+        """
+        log_payload("FunctionGeneratorAgent streamed task", task)
+        response, request = self._reuse_or_reference(task)
+        if response is not None:
+            self._record_turns(task, response)
+            yield response
+            return
+
+        prompt = f"{self.system_prompt}\n\n{self.fit_task(request)}"
+        chunks = []
+        with span("generate", streaming=True) as record:
+            for chunk in metered_stream(
+                record,
+                prompt,
+                stream_model(self.llm, prompt, *args, **kwargs),
+            ):
+                chunks.append(chunk)
+                yield chunk
+        response = "".join(chunks)
+        self._record_turns(request, response)
+        self._index(
+            task, extract_code_from_markdown(response), response
         )
-        response = super().run(task, *args, **kwargs)
-        output = extract_code_from_markdown(response)
-        logger.debug(f"Generated output: {output}")
 
-        logger.info("Creating file for generated code")
-        create_file(output, self.folder_path, "main.py")
+    def speculate(self, task: str, *args, **kwargs) -> str:
+        """
+        Launches `candidates` generations at once and returns the first
+        response whose code passes `validate_code`.
+
+        The other generations are cancelled: streaming models are closed
+        at their next chunk, and calls that already finished are ignored.
+        Every candidate is recorded as a "candidate" span holding its
+        validation result, and the "generate" span holds the winner, so
+        the number of candidates can be tuned from the exported metrics.
+        Like `stream_run`, this skips the agent loop. If no candidate
+        passes, the first response to finish is returned.
+
+        Args:
+            task (str): Task for which to generate code.
+            *args: Additional positional arguments for the model.
+            **kwargs: Additional keyword arguments for the model.
+
+        Returns:
+            str: The winning response.
+        """
+        prompt = f"{self.system_prompt}\n\n{self.fit_task(task)}"
+        cancelled = threading.Event()
+
+        def generate(
+            index: int,
+        ) -> Optional[Tuple[int, str, ValidationResult]]:
+            with span("candidate", index=index) as record:
+                chunks = stream_model(
+                    self.llm, prompt, *args, **kwargs
+                )
+                metered = metered_stream(record, prompt, chunks)
+                received = []
+                try:
+                    for chunk in metered:
+                        if cancelled.is_set():
+                            # Count what was paid for before cancelling
+                            count_call(
+                                record, prompt, "".join(received)
+                            )
+                            record.extra["cancelled"] = True
+                            return None
+                        received.append(chunk)
+                finally:
+                    metered.close()
+                    chunks.close()
+                response = "".join(received)
+                validation = validate_code(
+                    extract_code_from_markdown(response),
+                    self.check_imports,
+                    self.lint,
+                )
+                record.extra.update(validation.to_dict())
+                return index, response, validation
 
+        winner = fallback = failure = None
+        with span("generate", candidates=self.candidates) as record:
+            executor = ThreadPoolExecutor(
+                self.candidates,
+                thread_name_prefix="dev-swarm-candidate",
+            )
+            futures = [
+                executor.submit(
+                    contextvars.copy_context().run, generate, index
+                )
+                for index in range(self.candidates)
+            ]
+            try:
+                for future in as_completed(futures):
+                    try:
+                        outcome = future.result()
+                    except Exception as error:
+                        logger.warning(f"Candidate failed: {error}")
+                        failure = error
+                        continue
+                    index, response, validation = outcome
+                    if fallback is None:
+                        fallback = outcome
+                    if validation.ok:
+                        winner = outcome
+                        break
+                    logger.info(
+                        f"Candidate {index} failed the"
+                        f" {validation.check} check:"
+                        f" {'; '.join(validation.errors)}"
+                    )
+            finally:
+                cancelled.set()
+                executor.shutdown(wait=False, cancel_futures=True)
+
+            if fallback is None:
+                raise failure
+            if winner is None:
+                logger.warning(
+                    f"No candidate passed validation, using candidate"
+                    f" {fallback[0]}"
+                )
+            index, response, validation = winner or fallback
+            record.extra.update(winner=index, valid=validation.ok)
+        self._record_turns(task, response)
         return response
+
+    def _record_turns(self, task: str, response: str) -> None:
+        if self.journal is not None:
+            self.journal.record_exchange(
+                self.agent_name, task, response
+            )
+
+    def save_code(self, code: str) -> str:
+        """
+        Saves generated code to the agent's folder.
+
+        Args:
+            code (str): The extracted code.
+
+        Returns:
+            str: Path of the created file.
+        """
+        with span("write", artifact="code"):
+            artifact = self.artifact_store.write("code", f"{code}\n")
+        logger.info(
+            f"Generated code at {artifact.path}"
+            f" ({'updated' if artifact.changed else 'unchanged'})"
+        )
+        return artifact.path
@@ -0,0 +1,360 @@
+import bisect
+import contextvars
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional
+
+from loguru import logger
+
+from dev_swarm.llm import CancelToken, cancellable, stream_model
+from dev_swarm.rate_limit import on_admission
+
+# Upper bounds, in seconds, of the exported histogram buckets
+LATENCY_BUCKETS = (0.5, 1, 2, 5, 10, 30, 60, 120, 300, float("inf"))
+
+
+class LatencyHistogram:
+    """
+    Latencies of recent calls, for percentiles, plus cumulative bucket
+    counts of all calls.
+
+    Args:
+        max_samples (int, optional): Recent samples kept for percentiles. Defaults to 500.
+    """
+
+    def __init__(self, max_samples: int = 500):
+        self._samples: deque = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+        self.buckets: List[int] = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.total = 0.0
+
+    def record(self, seconds: float) -> None:
+        """
+        Adds a latency.
+
+        Args:
+            seconds (float): The latency.
+        """
+        with self._lock:
+            self._samples.append(seconds)
+            self.buckets[
+                bisect.bisect_left(LATENCY_BUCKETS, seconds)
+            ] += 1
+            self.count += 1
+            self.total += seconds
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """
+        Returns a percentile of the recent latencies.
+
+        Args:
+            percent (float): The percentile, between 0 and 100.
+
+        Returns:
+            Optional[float]: The latency, or None without samples.
+        """
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(
+            len(samples) - 1, int(len(samples) * percent / 100)
+        )
+        return samples[index]
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+
+class _Attempt:
+    """One streaming call of a hedged request, pumped on its own thread."""
+
+    def __init__(
+        self,
+        index: int,
+        model: Any,
+        prompt: Any,
+        args: tuple,
+        kwargs: dict,
+        events: queue.Queue,
+    ):
+        self.index = index
+        self.token = CancelToken()
+        self.finished = False
+        self._args = (model, prompt, args, kwargs, events)
+        context = contextvars.copy_context()
+        threading.Thread(
+            target=context.run,
+            args=(self._pump,),
+            name=f"dev-swarm-hedge-{index}",
+            daemon=True,
+        ).start()
+
+    def cancel(self) -> bool:
+        """
+        Cancels the call if it is still running.
+
+        Returns:
+            bool: Whether a running call was cancelled.
+        """
+        if self.finished or self.token.cancelled:
+            return False
+        self.token.cancel()
+        return True
+
+    def _pump(self) -> None:
+        model, prompt, args, kwargs, events = self._args
+        chunks = stream_model(model, prompt, *args, **kwargs)
+
+        def admission(kind: str) -> None:
+            events.put((self.index, kind, None))
+
+        try:
+            with cancellable(self.token), on_admission(admission):
+                for chunk in chunks:
+                    if self.token.cancelled:
+                        return
+                    events.put((self.index, "chunk", chunk))
+            event = (self.index, "done", None)
+        except Exception as error:
+            event = (self.index, "error", error)
+        finally:
+            # Set before the last event, so a finished call is never
+            # counted as cancelled
+            self.finished = True
+            # Closing the stream releases the loser's connection
+            chunks.close()
+        events.put(event)
+
+
+class HedgedModel:
+    """
+    Wraps a model so that calls whose first token is late get a duplicate
+    request, and whichever produces a token first wins.
+
+    The hedge is sent once a call has waited longer than `percentile` of
+    the recent times to first token. The losing request is cancelled
+    through a `CancelToken`: a `ChatBackend` call shuts its connection
+    down, even while it still waits for the first token. Other models are
+    only stopped at their next chunk; a model without `stream` yields its
+    whole completion as the first token, so it is hedged on total
+    latency, and a losing call runs to the end and its result is
+    discarded. Hedges are limited to `max_hedge_ratio` of all calls to
+    cap the extra spend.
+
+    Wrap a rate-limited model, so that hedges count against the limits.
+    The time a call waits in its `RateLimiter` queue is not latency of
+    the model: the clock stops while the call is queued and restarts when
+    it is admitted, so a saturated limiter does not trigger hedges.
+
+    Args:
+        model (Any): The model to wrap.
+        percentile (float, optional): Latency percentile that triggers a hedge. Defaults to 95.
+        min_samples (int, optional): Calls observed before hedging starts. Defaults to 20.
+        min_delay (float, optional): Shortest wait before hedging in seconds. Defaults to 1.
+        max_hedge_ratio (float, optional): Maximum hedges per call. Defaults to 0.1.
+        name (str, optional): Name used in logs, e.g. the agent name.
+    """
+
+    def __init__(
+        self,
+        model: Any,
+        percentile: float = 95,
+        min_samples: int = 20,
+        min_delay: float = 1.0,
+        max_hedge_ratio: float = 0.1,
+        name: str = None,
+    ):
+        self.model = model
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.max_hedge_ratio = max_hedge_ratio
+        self.name = name or type(model).__name__
+        self.first_token = LatencyHistogram()
+        self.latency = LatencyHistogram()
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.cancelled = 0
+        self.interrupted = 0
+        self._lock = threading.Lock()
+
+    def _threshold(self) -> Optional[float]:
+        if len(self.first_token) < self.min_samples:
+            return None
+        return max(
+            self.min_delay,
+            self.first_token.percentile(self.percentile),
+        )
+
+    def _take_hedge(self) -> bool:
+        with self._lock:
+            if self.hedges + 1 > self.max_hedge_ratio * self.calls:
+                return False
+            self.hedges += 1
+            return True
+
+    def stream(self, task: Any, *args, **kwargs) -> Iterator[str]:
+        """
+        Streams the completion of the first request to produce a token.
+
+        Args:
+            task (Any): The prompt.
+            *args: Additional positional arguments for the model.
+            **kwargs: Additional keyword arguments for the model.
+
+        Yields:
+            str: The next piece of the completion.
+        """
+        with self._lock:
+            self.calls += 1
+        events: queue.Queue = queue.Queue()
+        began = time.perf_counter()
+        attempts = [
+            _Attempt(0, self.model, task, args, kwargs, events)
+        ]
+        threshold = self._threshold()
+        failed = set()
+        winner = None
+        queued = False
+        try:
+            while True:
+                timeout = None
+                if (
+                    winner is None
+                    and len(attempts) == 1
+                    and threshold
+                    and not queued
+                ):
+                    timeout = max(
+                        0.0, began + threshold - time.perf_counter()
+                    )
+                try:
+                    index, kind, value = events.get(timeout=timeout)
+                except queue.Empty:
+                    threshold = None
+                    if self._take_hedge():
+                        logger.info(
+                            f"{self.name}: no first token after"
+                            f" {time.perf_counter() - began:.2f}s,"
+                            " sending a hedged request"
+                        )
+                        attempts.append(
+                            _Attempt(
+                                1,
+                                self.model,
+                                task,
+                                args,
+                                kwargs,
+                                events,
+                            )
+                        )
+                    continue
+
+                if kind in ("queued", "admitted"):
+                    if index == 0 and winner is None:
+                        # Time in the limiter's queue is not latency
+                        queued = kind == "queued"
+                        began = time.perf_counter()
+                    continue
+                if winner is None:
+                    if kind == "error":
+                        failed.add(index)
+                        if len(failed) == len(attempts):
+                            raise value
+                        continue
+                    winner = index
+                    self.first_token.record(
+                        time.perf_counter() - began
+                    )
+                    if winner:
+                        with self._lock:
+                            self.hedge_wins += 1
+                    for attempt in attempts:
+                        if attempt.index != winner:
+                            self._cancel(attempt)
+
+                if index != winner:
+                    continue
+                if kind == "chunk":
+                    yield value
+                elif kind == "done":
+                    self.latency.record(time.perf_counter() - began)
+                    return
+                else:
+                    raise value
+        finally:
+            for attempt in attempts:
+                self._cancel(attempt)
+
+    def _cancel(self, attempt: _Attempt) -> None:
+        if not attempt.cancel():
+            return
+        with self._lock:
+            self.cancelled += 1
+            self.interrupted += attempt.token.interrupted
+
+    def __call__(self, task: Any, *args, **kwargs) -> str:
+        return "".join(self.stream(task, *args, **kwargs))
+
+    def run(self, task: Any, *args, **kwargs) -> str:
+        return self(task, *args, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns hedging counters and latency percentiles.
+
+        Returns:
+            Dict[str, Any]: Calls, hedges, hedges that won, requests
+                cancelled while running and those of them whose connection
+                was interrupted, p50/p95 time to first token and total
+                latency, and the latency bucket counts.
+        """
+        return {
+            "calls": self.calls,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "cancelled": self.cancelled,
+            "interrupted": self.interrupted,
+            "first_token_p50": self.first_token.percentile(50),
+            "first_token_p95": self.first_token.percentile(95),
+            "latency_p50": self.latency.percentile(50),
+            "latency_p95": self.latency.percentile(95),
+            "latency_buckets": dict(
+                zip(
+                    (f"le_{bound:g}" for bound in LATENCY_BUCKETS),
+                    self.latency.buckets,
+                )
+            ),
+        }
+
+    def __getattr__(self, name: str):
+        if name == "model":
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+
+def hedge_model(model: Any, name: str = None, **options) -> Any:
+    """
+    Hedges a model's calls, below its response cache if it has one, so
+    cache hits are neither timed nor hedged.
+
+    Args:
+        model (Any): The model, possibly a `CachedModel`.
+        name (str, optional): Name used in logs, e.g. the agent name.
+        **options: Arguments forwarded to `HedgedModel`.
+
+    Returns:
+        Any: The hedged model.
+    """
+    from dev_swarm.cache import CachedModel
+
+    if isinstance(model, CachedModel):
+        return CachedModel(
+            hedge_model(model.model, name, **options), model.cache
+        )
+    return HedgedModel(model, name=name, **options)
@@ -0,0 +1,88 @@
+import ast
+import contextvars
+import hashlib
+import json
+import re
+import threading
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+_force_rebuild: contextvars.ContextVar = contextvars.ContextVar(
+    "dev_swarm_force_rebuild", default=False
+)
+
+# The documentation and tests stages fingerprint the same code from two
+# threads, and concurrent ast.parse calls can fail with "AST constructor
+# recursion depth mismatch" on CPython 3.11 (gh-106905)
+_parse_lock = threading.Lock()
+
+
+def code_fingerprint(code: str) -> str:
+    """
+    Hashes code so that whitespace and comment changes do not alter it.
+
+    Parseable code is hashed through its AST dump; anything else is hashed
+    after collapsing whitespace.
+
+    Args:
+        code (str): The source code.
+
+    Returns:
+        str: The hex SHA-256 of the normalized code.
+    """
+    try:
+        with _parse_lock:
+            tree = ast.parse(code)
+        normalized = ast.dump(tree)
+    except (SyntaxError, ValueError):
+        normalized = re.sub(r"\s+", " ", code).strip()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def stage_fingerprint(
+    code: str, prompt_version: str, **inputs: Any
+) -> str:
+    """
+    Hashes everything a derived stage (documentation, tests) depends on.
+
+    Args:
+        code (str): The generated code the stage works from.
+        prompt_version (str): Version of the stage's prompt template.
+        **inputs: Other inputs, e.g. the model name or stage options.
+
+    Returns:
+        str: The hex SHA-256 fingerprint.
+    """
+    payload = json.dumps(
+        {
+            "code": code_fingerprint(code),
+            "prompt": prompt_version,
+            "inputs": inputs,
+        },
+        sort_keys=True,
+        default=repr,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@contextmanager
+def rebuild_scope(force: bool) -> Iterator[bool]:
+    """
+    Forces (or stops forcing) every stage inside the block to recompute.
+
+    Args:
+        force (bool): Whether to ignore matching fingerprints.
+
+    Yields:
+        bool: The value of `force`.
+    """
+    token = _force_rebuild.set(force)
+    try:
+        yield force
+    finally:
+        _force_rebuild.reset(token)
+
+
+def force_rebuild() -> bool:
+    """Returns whether the enclosing `rebuild_scope` forces recomputation."""
+    return _force_rebuild.get()
@@ -0,0 +1,635 @@
+import argparse
+import functools
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from loguru import logger
+
+DEFAULT_QUEUE_PATH = os.path.join("dev_swarm_state", "jobs.sqlite")
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS jobs ("
+    " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+    " project TEXT NOT NULL,"
+    " task TEXT NOT NULL,"
+    " status TEXT NOT NULL DEFAULT 'queued',"
+    " attempts INTEGER NOT NULL DEFAULT 0,"
+    " worker TEXT,"
+    " lease_until REAL,"
+    " submitted_at REAL NOT NULL,"
+    " started_at REAL,"
+    " finished_at REAL,"
+    " error TEXT)",
+    "CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id)",
+    "CREATE TABLE IF NOT EXISTS stages ("
+    " job_id INTEGER NOT NULL,"
+    " stage TEXT NOT NULL,"
+    " output TEXT,"
+    " duration REAL,"
+    " PRIMARY KEY (job_id, stage))",
+)
+
+
+@dataclass
+class Job:
+    """
+    A leased job.
+
+    Attributes:
+        id (int): Identifier of the job.
+        project (str): Project the task belongs to.
+        task (str): The task text.
+        attempts (int): Leases taken so far, including this one.
+    """
+
+    id: int
+    project: str
+    task: str
+    attempts: int
+
+
+class JobQueue:
+    """
+    sqlite-backed queue of DevSwarm jobs, safe to share between processes.
+
+    A job is "queued" until a worker leases it, "leased" while it runs,
+    and ends "done" or "failed". A leased job whose lease expired, because
+    its worker died or stalled, is leased again; a failed run is retried
+    until it has used `max_attempts` leases. Every stage a job completes
+    is recorded, so a job leased again after its worker died resumes after
+    its completed stages on another worker.
+
+    Jobs are submitted and worked from the command line:
+
+        python -m dev_swarm.jobs submit --project demo "Write an add function"
+        python -m dev_swarm.jobs work --workers 4 --stop-when-empty
+        python -m dev_swarm.jobs stats
+
+    Args:
+        path (str, optional): Location of the database. Defaults to
+            "dev_swarm_state/jobs.sqlite".
+        max_attempts (int, optional): Leases a job may use. Defaults to 3.
+    """
+
+    def __init__(
+        self, path: str = DEFAULT_QUEUE_PATH, max_attempts: int = 3
+    ):
+        self.path = path
+        self.max_attempts = max_attempts
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        # Autocommit mode, so that leases can take the write lock up front
+        # with BEGIN IMMEDIATE
+        self._db = sqlite3.connect(
+            path,
+            timeout=30,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        for statement in _SCHEMA:
+            self._db.execute(statement)
+
+    def submit(self, project: str, task: str) -> int:
+        """
+        Adds a job.
+
+        Args:
+            project (str): Project the task belongs to.
+            task (str): The task text.
+
+        Returns:
+            int: Identifier of the job.
+        """
+        return self.submit_many(project, [task])[0]
+
+    def submit_many(
+        self, project: str, tasks: List[str]
+    ) -> List[int]:
+        """
+        Adds a job per task in a single transaction.
+
+        Args:
+            project (str): Project the tasks belong to.
+            tasks (List[str]): The task texts.
+
+        Returns:
+            List[int]: Identifiers of the jobs, in task order.
+        """
+        now = time.time()
+        ids = []
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                for task in tasks:
+                    cursor = self._db.execute(
+                        "INSERT INTO jobs (project, task, submitted_at)"
+                        " VALUES (?, ?, ?)",
+                        (project, task, now),
+                    )
+                    ids.append(cursor.lastrowid)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return ids
+
+    def lease(
+        self, worker: str, lease_seconds: float = 60
+    ) -> Optional[Job]:
+        """
+        Leases the oldest queued job, or a job whose lease expired.
+
+        Args:
+            worker (str): Identifier of the leasing worker.
+            lease_seconds (float, optional): Time the worker has to finish
+                or renew the lease. Defaults to 60.
+
+        Returns:
+            Optional[Job]: The job, or None if there is nothing to run.
+        """
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                job = self._lease(worker, lease_seconds)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        if job is not None and job.attempts > 1:
+            logger.info(
+                f"Job {job.id} leased by {worker}, attempt"
+                f" {job.attempts}"
+            )
+        return job
+
+    def _lease(
+        self, worker: str, lease_seconds: float
+    ) -> Optional[Job]:
+        while True:
+            now = time.time()
+            row = self._db.execute(
+                "SELECT id, project, task, attempts FROM jobs"
+                " WHERE status = 'queued'"
+                " OR (status = 'leased' AND lease_until < ?)"
+                " ORDER BY id LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                return None
+            job_id, project, task, attempts = row
+            if attempts >= self.max_attempts:
+                self._db.execute(
+                    "UPDATE jobs SET status = 'failed', worker = NULL,"
+                    " lease_until = NULL, finished_at = ?, error = ?"
+                    " WHERE id = ?",
+                    (
+                        now,
+                        f"Lease expired after {attempts} attempts",
+                        job_id,
+                    ),
+                )
+                continue
+            self._db.execute(
+                "UPDATE jobs SET status = 'leased', worker = ?,"
+                " lease_until = ?, attempts = attempts + 1,"
+                " started_at = ? WHERE id = ?",
+                (worker, now + lease_seconds, now, job_id),
+            )
+            return Job(job_id, project, task, attempts + 1)
+
+    def renew(
+        self, job_id: int, worker: str, lease_seconds: float = 60
+    ) -> bool:
+        """
+        Extends a lease.
+
+        Args:
+            job_id (int): The job.
+            worker (str): The worker holding the lease.
+            lease_seconds (float, optional): New lease length from now. Defaults to 60.
+
+        Returns:
+            bool: Whether the worker still held the lease.
+        """
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET lease_until = ?"
+                " WHERE id = ? AND worker = ? AND status = 'leased'",
+                (time.time() + lease_seconds, job_id, worker),
+            )
+        return cursor.rowcount == 1
+
+    def record_stage(
+        self, job_id: int, stage: str, output: Any, duration: float
+    ) -> None:
+        """
+        Records a stage the job completed.
+
+        Args:
+            job_id (int): The job.
+            stage (str): The stage name.
+            output (Any): The stage output; stored as JSON.
+            duration (float): The stage duration in seconds.
+        """
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO stages"
+                " (job_id, stage, output, duration) VALUES (?, ?, ?, ?)",
+                (
+                    job_id,
+                    stage,
+                    json.dumps(output, default=str),
+                    duration,
+                ),
+            )
+
+    def completed_stages(self, job_id: int) -> Dict[str, Any]:
+        """
+        Returns the stages the job completed in earlier attempts.
+
+        Args:
+            job_id (int): The job.
+
+        Returns:
+            Dict[str, Any]: Outputs of the completed stages, keyed by name.
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT stage, output FROM stages WHERE job_id = ?",
+                (job_id,),
+            ).fetchall()
+        return {stage: json.loads(output) for stage, output in rows}
+
+    def finish(
+        self, job_id: int, worker: str, ok: bool, error: str = None
+    ) -> str:
+        """
+        Ends a leased job. A failed job is queued again while it has
+        attempts left.
+
+        Args:
+            job_id (int): The job.
+            worker (str): The worker holding the lease.
+            ok (bool): Whether the run succeeded.
+            error (str, optional): Why the run failed.
+
+        Returns:
+            str: The new status: "done", "queued" or "failed", or "lost" if
+                the worker no longer held the lease.
+        """
+        status = "done" if ok else "failed"
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT attempts FROM jobs WHERE id = ?"
+                    " AND worker = ? AND status = 'leased'",
+                    (job_id, worker),
+                ).fetchone()
+                if row is None:
+                    status = "lost"
+                else:
+                    if not ok and row[0] < self.max_attempts:
+                        status = "queued"
+                    self._db.execute(
+                        "UPDATE jobs SET status = ?, worker = NULL,"
+                        " lease_until = NULL, finished_at = ?, error = ?"
+                        " WHERE id = ?",
+                        (
+                            status,
+                            (
+                                time.time()
+                                if status != "queued"
+                                else None
+                            ),
+                            error,
+                            job_id,
+                        ),
+                    )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return status
+
+    def job(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Returns a job's row.
+
+        Args:
+            job_id (int): The job.
+
+        Returns:
+            Optional[Dict[str, Any]]: The job's columns, or None if unknown.
+        """
+        with self._lock:
+            cursor = self._db.execute(
+                "SELECT * FROM jobs WHERE id = ?", (job_id,)
+            )
+            row = cursor.fetchone()
+            names = [column[0] for column in cursor.description]
+        return dict(zip(names, row)) if row is not None else None
+
+    def stats(self, window: float = 60) -> Dict[str, Any]:
+        """
+        Returns queue depth, throughput and job latencies.
+
+        Args:
+            window (float, optional): Seconds of recently finished jobs
+                the throughput and latencies are computed over. Defaults to 60.
+
+        Returns:
+            Dict[str, Any]: Jobs by status, queue_depth (jobs waiting for
+                a worker), throughput_per_s, and the mean and p95 of
+                latency_s (submission to finish) and run_s (last lease to
+                finish) of the jobs done within the window.
+        """
+        now = time.time()
+        with self._lock:
+            counts = dict(
+                self._db.execute(
+                    "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+                ).fetchall()
+            )
+            expired = self._db.execute(
+                "SELECT COUNT(*) FROM jobs"
+                " WHERE status = 'leased' AND lease_until < ?",
+                (now,),
+            ).fetchone()[0]
+            rows = self._db.execute(
+                "SELECT finished_at - submitted_at,"
+                " finished_at - started_at FROM jobs"
+                " WHERE status = 'done' AND finished_at >= ?",
+                (now - window,),
+            ).fetchall()
+        stats: Dict[str, Any] = {
+            status: counts.get(status, 0)
+            for status in ("queued", "leased", "done", "failed")
+        }
+        stats["queue_depth"] = stats["queued"] + expired
+        stats["throughput_per_s"] = len(rows) / window
+        for index, name in enumerate(("latency_s", "run_s")):
+            values = sorted(row[index] for row in rows)
+            stats[f"{name}_mean"] = (
+                sum(values) / len(values) if values else None
+            )
+            stats[f"{name}_p95"] = (
+                values[min(len(values) - 1, int(len(values) * 0.95))]
+                if values
+                else None
+            )
+        return stats
+
+    def close(self) -> None:
+        """Closes the database."""
+        with self._lock:
+            self._db.close()
+
+
+def _heartbeat(
+    queue: JobQueue,
+    job: Job,
+    worker: str,
+    lease_seconds: float,
+    stop: threading.Event,
+) -> None:
+    while not stop.wait(lease_seconds / 3):
+        if not queue.renew(job.id, worker, lease_seconds):
+            logger.warning(f"{worker} lost the lease of job {job.id}")
+            return
+
+
+def _failure(result: Any) -> Optional[str]:
+    if result.ok:
+        return None
+    if result.error:
+        return result.error
+    failed = [
+        f"{stage.name}: {stage.error or stage.status}"
+        for stage in result.stages.values()
+        if stage.status != "completed"
+    ]
+    return "; ".join(failed) or "The run did not complete"
+
+
+def work(
+    path: str = DEFAULT_QUEUE_PATH,
+    worker: str = None,
+    swarm_options: Dict[str, Any] = None,
+    setup: Callable[[], Any] = None,
+    lease_seconds: float = 60,
+    poll_interval: float = 1.0,
+    stop_when_empty: bool = False,
+    max_attempts: int = 3,
+) -> int:
+    """
+    Runs jobs from the queue until stopped.
+
+    One DevSwarm is built per project and reused for its later jobs. A job
+    that earlier attempts partly ran resumes after its recorded stages.
+
+    Args:
+        path (str, optional): Location of the queue database.
+        worker (str, optional): Identifier of the worker. Defaults to the
+            host name and process id.
+        swarm_options (Dict[str, Any], optional): Arguments for DevSwarm,
+            besides the project.
+        setup (Callable[[], Any], optional): Called once before the first
+            job, e.g. to register a model; must be picklable to be used
+            with `run_workers`.
+        lease_seconds (float, optional): Lease length, renewed every third
+            of it while a job runs. Defaults to 60.
+        poll_interval (float, optional): Wait between polls of an empty
+            queue in seconds. Defaults to 1.
+        stop_when_empty (bool, optional): Return once no job is left
+            instead of polling. Defaults to False.
+        max_attempts (int, optional): Leases a job may use. Defaults to 3.
+
+    Returns:
+        int: Number of jobs this worker finished successfully.
+    """
+    from dev_swarm.dev_swarm import DevSwarm
+
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    if setup is not None:
+        setup()
+    queue = JobQueue(path, max_attempts=max_attempts)
+    swarms: Dict[str, DevSwarm] = {}
+    done = 0
+    try:
+        while True:
+            job = queue.lease(worker, lease_seconds)
+            if job is None:
+                if stop_when_empty and not queue.stats()["leased"]:
+                    return done
+                time.sleep(poll_interval)
+                continue
+
+            if job.project not in swarms:
+                swarms[job.project] = DevSwarm(
+                    project=job.project, **(swarm_options or {})
+                )
+            completed = queue.completed_stages(job.id)
+
+            def on_complete(stage: Any, job: Job = job) -> None:
+                queue.record_stage(
+                    job.id, stage.name, stage.output, stage.duration
+                )
+
+            stop = threading.Event()
+            heartbeat = threading.Thread(
+                target=_heartbeat,
+                args=(queue, job, worker, lease_seconds, stop),
+                name=f"dev-swarm-lease-{job.id}",
+                daemon=True,
+            )
+            heartbeat.start()
+            try:
+                result = swarms[job.project].run(
+                    job.task,
+                    completed=completed,
+                    on_complete=on_complete,
+                )
+            finally:
+                stop.set()
+                heartbeat.join()
+            error = _failure(result)
+            status = queue.finish(
+                job.id, worker, error is None, error
+            )
+            logger.info(f"{worker} finished job {job.id}: {status}")
+            done += status == "done"
+    finally:
+        queue.close()
+
+
+def run_workers(
+    path: str = DEFAULT_QUEUE_PATH, workers: int = 4, **kwargs
+) -> List[int]:
+    """
+    Runs `work` in several processes and waits for them.
+
+    Args:
+        path (str, optional): Location of the queue database.
+        workers (int, optional): Number of processes. Defaults to 4.
+        **kwargs: Arguments forwarded to `work`.
+
+    Returns:
+        List[int]: Exit codes of the processes.
+    """
+    # Spawned rather than forked, so no thread or connection of the parent
+    # leaks into the workers
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(
+            target=work,
+            args=(path,),
+            kwargs=kwargs,
+            name=f"dev-swarm-worker-{index}",
+        )
+        for index in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+    return [process.exitcode for process in processes]
+
+
+def _use_fake_model(latency: float) -> None:
+    from dev_swarm.fake_llm import use_fake_model
+
+    use_fake_model(latency=latency, time_to_first_token=latency)
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m dev_swarm.jobs",
+        description="Submit DevSwarm jobs and run workers.",
+    )
+    parser.add_argument("--db", default=DEFAULT_QUEUE_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    submit = commands.add_parser("submit", help="queue tasks")
+    submit.add_argument("--project", default="dev_swarm")
+    submit.add_argument("tasks", nargs="*", help="task texts")
+    submit.add_argument(
+        "--file", help="file with one task per line, '-' for stdin"
+    )
+
+    workers = commands.add_parser("work", help="run worker processes")
+    workers.add_argument("--workers", type=int, default=4)
+    workers.add_argument("--lease-seconds", type=float, default=60)
+    workers.add_argument("--max-attempts", type=int, default=3)
+    workers.add_argument("--stop-when-empty", action="store_true")
+    workers.add_argument(
+        "--options",
+        default="{}",
+        help="DevSwarm arguments as a JSON object",
+    )
+    workers.add_argument(
+        "--fake-latency",
+        type=float,
+        help="answer with FakeLLM of this latency instead of the API",
+    )
+
+    commands.add_parser("stats", help="print queue statistics")
+    args = parser.parse_args(argv)
+
+    if args.command == "submit":
+        tasks = list(args.tasks)
+        if args.file:
+            file = (
+                sys.stdin
+                if args.file == "-"
+                else open(args.file, encoding="utf-8")
+            )
+            with file:
+                tasks.extend(line.strip() for line in file)
+        tasks = [task for task in tasks if task]
+        if not tasks:
+            parser.error("no tasks given")
+        queue = JobQueue(args.db)
+        for job_id in queue.submit_many(args.project, tasks):
+            print(job_id)
+        queue.close()
+    elif args.command == "work":
+        setup = None
+        if args.fake_latency is not None:
+            setup = functools.partial(
+                _use_fake_model, args.fake_latency
+            )
+        run_workers(
+            args.db,
+            workers=args.workers,
+            swarm_options=json.loads(args.options),
+            setup=setup,
+            lease_seconds=args.lease_seconds,
+            stop_when_empty=args.stop_when_empty,
+            max_attempts=args.max_attempts,
+        )
+    else:
+        queue = JobQueue(args.db)
+        print(json.dumps(queue.stats(), indent=2))
+        queue.close()
+
+
+if __name__ == "__main__":
+    main()
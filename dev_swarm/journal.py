@@ -0,0 +1,357 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from loguru import logger
+
+from dev_swarm.utils import atomic_write
+
+DEFAULT_JOURNAL_PATH = "dev_swarm_state/journal.jsonl"
+
+
+class StateJournal:
+    """
+    Append-only JSONL journal of agent conversation turns and flow stage
+    results.
+
+    Every record is a single line appended to the file, so saving costs
+    the size of the new record instead of the whole agent state. A crash
+    can at most leave a truncated last line, which is skipped on read.
+    Once the file grows past `compact_bytes` it is compacted on a
+    background thread: stage records of runs that finished successfully
+    are reduced to their latest outcome, and conversation turns beyond
+    `max_turns` per agent are dropped.
+
+    Record types:
+        - {"type": "turn", "agent", "role", "content"}
+        - {"type": "run", "run_id", "task", "status": "started" | "finished", "ok"}
+        - {"type": "stage", "run_id", "stage", "output", "duration"}
+
+    Use `get_journal` to share one journal per path within the process.
+
+    Args:
+        path (str, optional): The journal file. Defaults to "dev_swarm_state/journal.jsonl".
+        compact_bytes (int, optional): Size that triggers a background compaction. Defaults to 4 MiB.
+        max_turns (int, optional): Turns kept per agent when compacting. Defaults to None (all).
+        fsync (bool, optional): Flush every record to disk before returning. Defaults to True.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_JOURNAL_PATH,
+        compact_bytes: int = 4 * 1024 * 1024,
+        max_turns: int = None,
+        fsync: bool = True,
+    ):
+        self.path = path
+        self.compact_bytes = compact_bytes
+        self.max_turns = max_turns
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._compactor: Optional[threading.Thread] = None
+        self._file = None
+        self._open()
+
+    def _open(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, "a+", encoding="utf-8")
+        self._size = self._file.tell()
+        if self._size:
+            # Terminate a line torn by a crash so the next record parses
+            self._file.seek(self._size - 1)
+            if self._file.read(1) != "\n":
+                self._file.write("\n")
+                self._size += 1
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """
+        Appends one record to the journal.
+
+        Args:
+            record (Dict[str, Any]): A JSON-serializable record. A "time"
+                field is added when missing.
+        """
+        record.setdefault("time", time.time())
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self._size += len(line.encode("utf-8"))
+            compact = (
+                self._size > self.compact_bytes
+                and self._compactor is None
+            )
+            if compact:
+                self._compactor = threading.Thread(
+                    target=self._compact_in_background,
+                    name="dev-swarm-journal-compaction",
+                    daemon=True,
+                )
+                self._compactor.start()
+
+    def record_turn(
+        self, agent: str, role: str, content: str
+    ) -> None:
+        """
+        Appends a conversation turn of an agent.
+
+        Args:
+            agent (str): The agent name.
+            role (str): Who produced the turn, e.g. "user" or the agent name.
+            content (str): The message.
+        """
+        self.append(
+            {
+                "type": "turn",
+                "agent": agent,
+                "role": role,
+                "content": content,
+            }
+        )
+
+    def record_exchange(
+        self, agent: str, request: str, response: str
+    ) -> None:
+        """
+        Appends a request to an agent and the agent's response as two
+        turns.
+
+        Args:
+            agent (str): The agent name.
+            request (str): The task or prompt sent to the agent.
+            response (str): The agent's response.
+        """
+        self.record_turn(agent, "user", request)
+        self.record_turn(agent, agent, response)
+
+    def start_run(self, run_id: str, task: str) -> None:
+        """
+        Records the start of a flow run.
+
+        Args:
+            run_id (str): Identifier of the run, e.g. its task id.
+            task (str): The task text.
+        """
+        self.append(
+            {
+                "type": "run",
+                "run_id": run_id,
+                "task": task,
+                "status": "started",
+            }
+        )
+
+    def record_stage(
+        self, run_id: str, stage: str, output: Any, duration: float
+    ) -> None:
+        """
+        Records a completed stage of a flow run.
+
+        Args:
+            run_id (str): Identifier of the run.
+            stage (str): The stage name.
+            output (Any): The stage output.
+            duration (float): The stage duration in seconds.
+        """
+        self.append(
+            {
+                "type": "stage",
+                "run_id": run_id,
+                "stage": stage,
+                "output": output,
+                "duration": duration,
+            }
+        )
+
+    def finish_run(self, run_id: str, ok: bool) -> None:
+        """
+        Records the end of a flow run.
+
+        Args:
+            run_id (str): Identifier of the run.
+            ok (bool): Whether every stage completed.
+        """
+        self.append(
+            {
+                "type": "run",
+                "run_id": run_id,
+                "status": "finished",
+                "ok": ok,
+            }
+        )
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        """
+        Reads every record, skipping lines that do not parse.
+
+        Yields:
+            Dict[str, Any]: The records in append order.
+        """
+        with self._lock:
+            self._file.flush()
+            path = self.path
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    logger.warning(
+                        f"Skipping a corrupt record in {self.path}"
+                    )
+
+    def turns(self, agent: str) -> List[Dict[str, Any]]:
+        """
+        Returns the journaled conversation of an agent.
+
+        Args:
+            agent (str): The agent name.
+
+        Returns:
+            List[Dict[str, Any]]: The turn records, oldest first.
+        """
+        return [
+            record
+            for record in self.records()
+            if record.get("type") == "turn"
+            and record.get("agent") == agent
+        ]
+
+    def completed_stages(self, run_id: str) -> Dict[str, Any]:
+        """
+        Returns the stages a run completed before it stopped.
+
+        Stages completed by any attempt since the run last finished
+        successfully count; a run that just succeeded has nothing to resume.
+
+        Args:
+            run_id (str): Identifier of the run.
+
+        Returns:
+            Dict[str, Any]: Outputs of the completed stages, keyed by name.
+        """
+        completed: Dict[str, Any] = {}
+        for record in self.records():
+            if record.get("run_id") != run_id:
+                continue
+            if record["type"] == "stage":
+                completed[record["stage"]] = record["output"]
+            elif record["status"] == "finished" and record.get("ok"):
+                completed = {}
+        return completed
+
+    def _compacted(self, records: List[Dict[str, Any]]) -> List[Dict]:
+        succeeded = set()
+        for record in records:
+            if record.get("type") == "run" and record["status"] == (
+                "finished"
+            ):
+                if record.get("ok"):
+                    succeeded.add(record["run_id"])
+                else:
+                    succeeded.discard(record["run_id"])
+
+        turn_counts: Dict[str, int] = {}
+        finished = set()
+        kept = []
+        for record in reversed(records):
+            kind = record.get("type")
+            if kind == "stage" and record["run_id"] in succeeded:
+                continue
+            if kind == "run" and record["run_id"] in succeeded:
+                # Only the latest outcome of a successful run is kept
+                if (
+                    record["status"] != "finished"
+                    or record["run_id"] in finished
+                ):
+                    continue
+                finished.add(record["run_id"])
+            if kind == "turn" and self.max_turns is not None:
+                agent = record["agent"]
+                turn_counts[agent] = turn_counts.get(agent, 0) + 1
+                if turn_counts[agent] > self.max_turns:
+                    continue
+            kept.append(record)
+        kept.reverse()
+        return kept
+
+    def compact(self) -> None:
+        """
+        Rewrites the journal without records that are no longer needed.
+
+        Appends made while compacting are preserved.
+        """
+        with self._lock:
+            self._file.flush()
+            offset = self._file.tell()
+        with open(self.path, encoding="utf-8") as file:
+            head = file.read(offset)
+
+        records = []
+        for line in head.splitlines():
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+        content = "".join(
+            json.dumps(record, default=str) + "\n"
+            for record in self._compacted(records)
+        )
+
+        with self._lock:
+            self._file.flush()
+            self._file.seek(offset)
+            content += self._file.read()
+            atomic_write(self.path, content)
+            self._file.close()
+            self._open()
+        logger.info(
+            f"Compacted {self.path} from {offset} to"
+            f" {len(content.encode('utf-8'))} bytes"
+        )
+
+    def _compact_in_background(self) -> None:
+        try:
+            self.compact()
+        except Exception as error:
+            logger.exception(f"Journal compaction failed: {error}")
+        finally:
+            with self._lock:
+                self._compactor = None
+
+    def close(self) -> None:
+        """Waits for a running compaction and closes the file."""
+        compactor = self._compactor
+        if compactor is not None:
+            compactor.join()
+        with self._lock:
+            self._file.close()
+
+
+_journals: Dict[str, StateJournal] = {}
+_journals_lock = threading.Lock()
+
+
+def get_journal(
+    path: str = DEFAULT_JOURNAL_PATH, **kwargs
+) -> StateJournal:
+    """
+    Returns the process-wide journal for `path`, creating it on first use.
+
+    Args:
+        path (str, optional): The journal file. Defaults to "dev_swarm_state/journal.jsonl".
+        **kwargs: Arguments for a new `StateJournal`.
+
+    Returns:
+        StateJournal: The journal.
+    """
+    key = os.path.abspath(path)
+    with _journals_lock:
+        if key not in _journals:
+            _journals[key] = StateJournal(path, **kwargs)
+        return _journals[key]
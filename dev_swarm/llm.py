@@ -0,0 +1,256 @@
+import contextvars
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+DEFAULT_MODEL_NAME = "gpt-4-1106-preview"
+
+_registry: Dict[str, Any] = {}
+_registry_lock = threading.Lock()
+
+_cancel_token: contextvars.ContextVar = contextvars.ContextVar(
+    "dev_swarm_cancel_token", default=None
+)
+
+
+def _build_default_model():
+    """
+    Builds the default OpenAIChat client shared by every agent.
+
+    The heavy imports and the `.env` lookup live in here so that they
+    only happen when a model is actually needed.
+
+    Returns:
+        OpenAIChat: The configured OpenAI chat client.
+    """
+    from dotenv import load_dotenv
+    from swarms import OpenAIChat
+
+    load_dotenv()
+
+    return OpenAIChat(
+        model_name=DEFAULT_MODEL_NAME,
+        openai_api_key=os.getenv("OPENAI_API_KEY"),
+        max_tokens=4000,
+    )
+
+
+class LazyModel:
+    """
+    Proxy that builds the wrapped model on first real use.
+
+    Calling the proxy or reading any attribute from it resolves the
+    underlying model exactly once, even when several threads race to
+    use it.
+
+    Args:
+        factory (Callable[[], Any]): Zero-argument callable that builds the model.
+    """
+
+    def __init__(self, factory: Callable[[], Any]):
+        self._factory = factory
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def resolved(self) -> bool:
+        """Whether the underlying model has been built yet."""
+        return self._model is not None
+
+    def resolve(self):
+        """
+        Returns the underlying model, building it if necessary.
+
+        Returns:
+            Any: The wrapped model instance.
+        """
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = self._factory()
+        return self._model
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+    def __getattr__(self, name: str):
+        if name in ("_factory", "_model", "_lock"):
+            raise AttributeError(name)
+        return getattr(self.resolve(), name)
+
+    def __repr__(self) -> str:
+        state = "resolved" if self.resolved else "unresolved"
+        return f"LazyModel({state})"
+
+
+def register_model(model: Any, name: str = "default") -> Any:
+    """
+    Registers a model (or model factory proxy) under the given name.
+
+    Args:
+        model (Any): The model to share between agents.
+        name (str, optional): Registry key. Defaults to "default".
+
+    Returns:
+        Any: The registered model.
+    """
+    with _registry_lock:
+        _registry[name] = model
+    return model
+
+
+def get_model(name: str = "default") -> Any:
+    """
+    Returns the shared model registered under `name`.
+
+    The default entry is created on first access as a `LazyModel`, so the
+    OpenAI client itself is only built when a completion is requested.
+
+    Args:
+        name (str, optional): Registry key. Defaults to "default".
+
+    Returns:
+        Any: The shared model.
+
+    Raises:
+        KeyError: If no model is registered under a non-default name.
+    """
+    with _registry_lock:
+        if name not in _registry:
+            if name != "default":
+                raise KeyError(f"No model registered as {name!r}")
+            _registry[name] = LazyModel(_build_default_model)
+        return _registry[name]
+
+
+def reset_models() -> None:
+    """Removes every registered model."""
+    with _registry_lock:
+        _registry.clear()
+
+
+def stream_model(
+    model: Any, task: Any, *args, **kwargs
+) -> Iterator[str]:
+    """
+    Yields the completion for `task` as text chunks.
+
+    Uses the model's `stream` method when it has one (langchain-style models
+    yield strings or chunk objects with `text`/`content`), and otherwise
+    yields the whole completion as a single chunk.
+
+    Args:
+        model (Any): The model to query.
+        task (Any): The prompt.
+        *args: Additional positional arguments for the model.
+        **kwargs: Additional keyword arguments for the model.
+
+    Yields:
+        str: The next piece of the completion.
+    """
+    stream = getattr(model, "stream", None)
+    if stream is None:
+        yield model(task, *args, **kwargs)
+        return
+
+    for chunk in stream(task, *args, **kwargs):
+        if isinstance(chunk, str):
+            yield chunk
+        else:
+            yield getattr(chunk, "text", None) or getattr(
+                chunk, "content", ""
+            )
+
+
+class CallCancelled(Exception):
+    """Raised inside a model call that was cancelled from another thread."""
+
+
+class CancelToken:
+    """
+    Cancels a model call running on another thread.
+
+    Stopping to read a stream only takes effect at the next chunk, which
+    may be far away when the provider has not sent its first token yet.
+    Clients that block on I/O therefore register a callback with
+    `on_cancel` while they wait, e.g. one that shuts their socket down,
+    and `cancel` runs it to interrupt the wait.
+    """
+
+    def __init__(self):
+        self._callbacks: List[Callable[[], Any]] = []
+        self._lock = threading.Lock()
+        self.cancelled = False
+        self.interrupted = False
+
+    def cancel(self) -> None:
+        """Cancels the call and runs the registered callbacks."""
+        with self._lock:
+            if self.cancelled:
+                return
+            self.cancelled = True
+            callbacks = list(self._callbacks)
+            self.interrupted = bool(callbacks)
+        for callback in callbacks:
+            callback()
+
+    def _add(self, callback: Callable[[], Any]) -> None:
+        with self._lock:
+            if self.cancelled:
+                raise CallCancelled()
+            self._callbacks.append(callback)
+
+    def _remove(self, callback: Callable[[], Any]) -> None:
+        with self._lock:
+            self._callbacks.remove(callback)
+
+
+@contextmanager
+def cancellable(token: CancelToken) -> Iterator[CancelToken]:
+    """
+    Runs the model calls made in the block under `token`.
+
+    Args:
+        token (CancelToken): The token that cancels the calls.
+
+    Yields:
+        CancelToken: The token.
+    """
+    reset = _cancel_token.set(token)
+    try:
+        yield token
+    finally:
+        _cancel_token.reset(reset)
+
+
+def current_cancel_token() -> Optional[CancelToken]:
+    """Returns the token of the running call, or None outside `cancellable`."""
+    return _cancel_token.get()
+
+
+@contextmanager
+def on_cancel(callback: Callable[[], Any]) -> Iterator[None]:
+    """
+    Calls `callback` from the cancelling thread if the running call is
+    cancelled while the block runs. Outside `cancellable` it does nothing.
+
+    Args:
+        callback (Callable[[], Any]): Interrupts the blocking work of the
+            block, e.g. by shutting down a socket.
+
+    Raises:
+        CallCancelled: On entering the block if the call is already
+            cancelled, and on leaving it if it was cancelled meanwhile.
+    """
+    token = _cancel_token.get()
+    if token is None:
+        yield
+        return
+    token._add(callback)
+    try:
+        yield
+    finally:
+        token._remove(callback)
+    if token.cancelled:
+        raise CallCancelled()
@@ -0,0 +1,175 @@
+import hashlib
+import os
+import random
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+from dev_swarm.flow import current_stage
+from dev_swarm.utils import atomic_write
+
+LOG_DIRECTORY = "dev_swarm_logs"
+
+_sinks = {}
+_sinks_lock = threading.Lock()
+
+
+@dataclass
+class LogSettings:
+    """
+    Process-wide logging options, see `configure_logging`.
+
+    Attributes:
+        structured (bool): Write file sinks as one JSON object per line.
+        full_payloads (bool): Also write every logged payload to a file
+            named after its hash and log that path.
+        payload_directory (str): Directory of the full payload files.
+        preview_chars (int): Characters of a payload kept in the message.
+        sample_rates (Dict[str, float]): Fraction of payload messages kept
+            per stage name; stages that are not listed keep all of them.
+    """
+
+    structured: bool = False
+    full_payloads: bool = False
+    payload_directory: str = os.path.join(LOG_DIRECTORY, "payloads")
+    preview_chars: int = 120
+    sample_rates: Dict[str, float] = field(default_factory=dict)
+
+
+settings = LogSettings()
+
+
+def configure_logging(**options: Any) -> LogSettings:
+    """
+    Updates the process-wide logging options.
+
+    Sinks added afterwards use the new `structured` setting; payload
+    options apply to the next `log_payload` call.
+
+    Args:
+        **options: Fields of `LogSettings` to change.
+
+    Returns:
+        LogSettings: The updated settings.
+
+    Raises:
+        TypeError: If an option is not a field of LogSettings.
+    """
+    for name, value in options.items():
+        if not hasattr(settings, name):
+            raise TypeError(f"Unknown logging option {name!r}")
+        setattr(settings, name, value)
+    return settings
+
+
+def add_log_sink(
+    name: str, log_directory: str = LOG_DIRECTORY
+) -> int:
+    """
+    Attaches a rotating file sink named `<name>.log`, once per process.
+
+    Agents call this from their constructors instead of at import time,
+    so importing the package never touches the filesystem. Records are
+    handed to a background thread (`enqueue=True`), so callers never wait
+    on formatting or disk writes.
+
+    Args:
+        name (str): Base name of the log file.
+        log_directory (str, optional): Directory for the log files. Defaults to "dev_swarm_logs".
+
+    Returns:
+        int: The loguru handler id of the sink.
+    """
+    path = os.path.join(log_directory, f"{name}.log")
+    with _sinks_lock:
+        if path not in _sinks:
+            os.makedirs(log_directory, exist_ok=True)
+            _sinks[path] = logger.add(
+                path,
+                rotation="1 MB",
+                enqueue=True,
+                serialize=settings.structured,
+            )
+        return _sinks[path]
+
+
+def payload_summary(payload: str) -> Dict[str, Any]:
+    """
+    Describes a payload without its full content.
+
+    Args:
+        payload (str): The payload, e.g. a prompt or a model response.
+
+    Returns:
+        Dict[str, Any]: Its size in characters, a short SHA-256 and a
+            one-line preview.
+    """
+    preview = " ".join(payload[: settings.preview_chars].split())
+    if len(payload) > settings.preview_chars:
+        preview += "..."
+    return {
+        "payload_size": len(payload),
+        "payload_sha256": hashlib.sha256(
+            payload.encode("utf-8")
+        ).hexdigest()[:12],
+        "payload_preview": preview,
+    }
+
+
+def _save_payload(payload: str, digest: str) -> str:
+    path = os.path.join(settings.payload_directory, f"{digest}.txt")
+    if not os.path.exists(path):
+        atomic_write(path, payload)
+    return path
+
+
+def _sampled(stage: Optional[str]) -> bool:
+    rate = settings.sample_rates.get(stage, 1.0) if stage else 1.0
+    return rate >= 1.0 or random.random() < rate
+
+
+def log_payload(
+    label: str, payload: Any, level: str = "INFO"
+) -> None:
+    """
+    Logs a payload as its size, hash and preview instead of its full text.
+
+    The summary is only computed when a sink accepts `level`, and messages
+    from stages with a sample rate below 1 are dropped at random. The
+    summary fields are also bound to the record, so structured sinks get
+    them as separate keys.
+
+    Args:
+        label (str): What the payload is, e.g. "Documentation".
+        payload (Any): The payload; converted with `str`.
+        level (str, optional): The log level. Defaults to "INFO".
+    """
+    stage = current_stage()
+    stage_name = stage.name if stage is not None else None
+    if not _sampled(stage_name):
+        return
+
+    def summarize(record: Dict[str, Any]) -> None:
+        text = str(payload)
+        summary = payload_summary(text)
+        if settings.full_payloads:
+            summary["payload_path"] = _save_payload(
+                text, hashlib.sha256(text.encode("utf-8")).hexdigest()
+            )
+        summary["stage"] = stage_name
+        record["extra"].update(summary)
+        record["message"] = (
+            f"{label}: {summary['payload_size']} chars,"
+            f" sha256 {summary['payload_sha256']}:"
+            f" {summary['payload_preview']!r}"
+        )
+        if "payload_path" in summary:
+            record[
+                "message"
+            ] += f" (full payload at {summary['payload_path']})"
+
+    # Patchers run only for records that pass the level check, which
+    # keeps hashing and formatting off the path of disabled levels
+    logger.patch(summarize).opt(depth=1).log(level, label)
@@ -0,0 +1,177 @@
+import re
+from typing import Iterable, List, NamedTuple, Optional
+
+# A fence line: 3+ backticks or tildes, optionally followed by a language
+# tag. Scanning for these with one multiline regex keeps the hot loop in C;
+# the text between fence lines is sliced out without being inspected.
+FENCE_LINE_PATTERN = re.compile(
+    r"^ {0,3}(`{3,}|~{3,})[ \t]*([^`\s]*)[^`\n]*$", re.MULTILINE
+)
+
+
+class CodeBlock(NamedTuple):
+    """
+    A fenced code block.
+
+    Attributes:
+        language (str): The language tag after the opening fence, or "".
+        code (str): The block content without surrounding whitespace.
+    """
+
+    language: str
+    code: str
+
+
+class CodeBlockExtractor:
+    """
+    Extracts fenced code blocks from markdown in a single pass.
+
+    Feed the response as it streams in (or all at once); every call returns
+    the code blocks whose closing fence has been seen, so callers can act on
+    a block before the rest of the response has arrived. Each character is
+    scanned once, and only the current line and the block in progress are
+    held in memory unless `keep_blocks` is set.
+
+    Fences follow CommonMark: a block opened with N backticks (or tildes) is
+    closed by a bare fence of at least N of the same character, so a
+    "```python" line inside a block does not end it. A block still open
+    when the input ends is returned by `close` if `include_unterminated`
+    is set, since truncated completions usually still hold useful code.
+
+    Args:
+        keep_blocks (bool, optional): Keep every completed block in `blocks`.
+            Defaults to True.
+        include_unterminated (bool, optional): Return a block left open at the
+            end of the input from `close`. Defaults to True.
+
+    Attributes:
+        blocks (List[CodeBlock]): Completed code blocks, in order.
+    """
+
+    def __init__(
+        self,
+        keep_blocks: bool = True,
+        include_unterminated: bool = True,
+    ):
+        self.keep_blocks = keep_blocks
+        self.include_unterminated = include_unterminated
+        self.blocks: List[CodeBlock] = []
+        self._partial_line: List[str] = []
+        self._fence: Optional[str] = None
+        self._language = ""
+        self._segments: List[str] = []
+
+    @property
+    def in_block(self) -> bool:
+        """Whether a fence has been opened but not closed yet."""
+        return self._fence is not None
+
+    def feed(self, chunk: str) -> List[CodeBlock]:
+        """
+        Consumes the next chunk of markdown.
+
+        Args:
+            chunk (str): The next piece of the response.
+
+        Returns:
+            List[CodeBlock]: Code blocks completed by this chunk.
+        """
+        last_newline = chunk.rfind("\n")
+        if last_newline == -1:
+            self._partial_line.append(chunk)
+            return []
+
+        self._partial_line.append(chunk[: last_newline + 1])
+        text = "".join(self._partial_line)
+        self._partial_line = [chunk[last_newline + 1 :]]
+        return self._feed_lines(text)
+
+    def close(self) -> List[CodeBlock]:
+        """
+        Flushes the remaining input once the response has ended.
+
+        Returns:
+            List[CodeBlock]: Code blocks completed by the remaining input.
+        """
+        text = "".join(self._partial_line)
+        self._partial_line = []
+        completed = self._feed_lines(text + "\n") if text else []
+
+        if self._fence is not None and self.include_unterminated:
+            completed.append(self._finish_block())
+        self._fence = None
+        self._segments = []
+        return completed
+
+    def _feed_lines(self, text: str) -> List[CodeBlock]:
+        # `text` always ends with a newline
+        completed = []
+        position = 0
+        for match in FENCE_LINE_PATTERN.finditer(text):
+            fence, language = match.groups()
+            if self._fence is None:
+                self._fence = fence
+                self._language = language
+            elif (
+                fence[0] == self._fence[0]
+                and len(fence) >= len(self._fence)
+                and not language
+            ):
+                self._segments.append(text[position : match.start()])
+                completed.append(self._finish_block())
+            else:
+                # A fence that cannot close the block is ordinary content
+                continue
+            position = match.end() + 1
+
+        if self._fence is not None:
+            self._segments.append(text[position:])
+        return completed
+
+    def _finish_block(self) -> CodeBlock:
+        block = CodeBlock(
+            self._language, "".join(self._segments).strip()
+        )
+        self._fence = None
+        self._language = ""
+        self._segments = []
+        if self.keep_blocks:
+            self.blocks.append(block)
+        return block
+
+
+def iter_code_blocks(chunks: Iterable[str]) -> Iterable[CodeBlock]:
+    """
+    Yields code blocks from a stream of markdown chunks as they complete.
+
+    Args:
+        chunks (Iterable[str]): The markdown, in pieces.
+
+    Yields:
+        CodeBlock: Each code block, as soon as its closing fence arrives.
+    """
+    extractor = CodeBlockExtractor(keep_blocks=False)
+    for chunk in chunks:
+        yield from extractor.feed(chunk)
+    yield from extractor.close()
+
+
+def extract_code_from_markdown(
+    markdown_content: str, language: str = None
+) -> str:
+    """
+    Extracts code blocks from a Markdown string and returns them as a single string.
+
+    Args:
+        markdown_content (str): The Markdown content as a string.
+        language (str, optional): Only keep blocks tagged with this language.
+            Defaults to None (keep every block).
+
+    Returns:
+        str: A single string containing all the code blocks separated by newlines.
+    """
+    return "\n".join(
+        block.code
+        for block in iter_code_blocks([markdown_content])
+        if language is None or block.language == language
+    )
@@ -0,0 +1,272 @@
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from loguru import logger
+
+from dev_swarm.metrics import count_call, current_span, span
+from dev_swarm.prompt_builder import count_tokens, truncate_to_tokens
+from dev_swarm.prompts import MEMORY_SUMMARY_PROMPT
+
+# Role of the message that replaces summarized turns
+SUMMARY_ROLE = "Summary"
+
+
+@dataclass
+class MemoryUsage:
+    """
+    Size of an agent's conversation history.
+
+    Attributes:
+        messages (int): Number of messages.
+        tokens (int): Tokens in the message contents.
+    """
+
+    messages: int = 0
+    tokens: int = 0
+
+
+def _history(agent: Any) -> Optional[List[Dict[str, Any]]]:
+    memory = getattr(agent, "short_memory", None)
+    return getattr(memory, "conversation_history", None)
+
+
+def _tokens(message: Dict[str, Any]) -> int:
+    return count_tokens(str(message.get("content", "")))
+
+
+def _pinned(history: List[Dict[str, Any]]) -> int:
+    # The leading system messages hold the agent's instructions
+    count = 0
+    for message in history:
+        if str(message.get("role", "")).lower() != "system":
+            break
+        count += 1
+    return count
+
+
+def memory_usage(agent: Any) -> MemoryUsage:
+    """
+    Measures an agent's conversation history.
+
+    Args:
+        agent (Any): The agent.
+
+    Returns:
+        MemoryUsage: Its message and token counts; zero without a history.
+    """
+    history = _history(agent) or []
+    return MemoryUsage(
+        messages=len(history),
+        tokens=sum(_tokens(message) for message in history),
+    )
+
+
+def _recent(
+    messages: List[Dict[str, Any]], max_tokens: int
+) -> List[Dict[str, Any]]:
+    kept, total = [], 0
+    for message in reversed(messages):
+        total += _tokens(message)
+        if total > max_tokens:
+            break
+        kept.append(message)
+    kept.reverse()
+    return kept
+
+
+class MemoryPolicy:
+    """
+    Keeps an agent's conversation history as it is. Subclasses override
+    `compact` to bound it; `apply` runs it before each task of the agent.
+    """
+
+    name = "keep"
+
+    def compact(
+        self, agent: Any, history: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Returns the messages to keep.
+
+        Args:
+            agent (Any): The agent.
+            history (List[Dict[str, Any]]): Its conversation history.
+
+        Returns:
+            List[Dict[str, Any]]: The new history.
+        """
+        return history
+
+    def apply(self, agent: Any) -> None:
+        """
+        Compacts the agent's history in place and records a "memory" span
+        with its size before and after.
+
+        Args:
+            agent (Any): The agent.
+        """
+        history = _history(agent)
+        if history is None:
+            return
+        before = memory_usage(agent)
+        with span("memory", policy=self.name) as record:
+            history[:] = self.compact(agent, list(history))
+            after = memory_usage(agent)
+            record.extra.update(
+                messages_before=before.messages,
+                messages_after=after.messages,
+                tokens_before=before.tokens,
+                tokens_after=after.tokens,
+            )
+
+
+class ResetMemory(MemoryPolicy):
+    """Starts every task from the system prompt alone."""
+
+    name = "reset"
+
+    def compact(
+        self, agent: Any, history: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        return history[: _pinned(history)]
+
+
+class TokenWindow(MemoryPolicy):
+    """
+    Keeps the system prompt and the most recent messages that fit in
+    `max_tokens` tokens.
+
+    Args:
+        max_tokens (int, optional): Token budget of the kept turns. Defaults to 4000.
+    """
+
+    name = "window"
+
+    def __init__(self, max_tokens: int = 4000):
+        self.max_tokens = max_tokens
+
+    def compact(
+        self, agent: Any, history: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        pinned = _pinned(history)
+        return history[:pinned] + _recent(
+            history[pinned:], self.max_tokens
+        )
+
+
+class SummarizeMemory(MemoryPolicy):
+    """
+    Replaces older turns with a summary once the history exceeds
+    `max_tokens` tokens, keeping the system prompt and the most recent
+    `keep_tokens` tokens of turns verbatim. An earlier summary is folded
+    into the next one; when the older turns do not fit in `max_tokens`,
+    the oldest are left out of the summary.
+
+    Args:
+        max_tokens (int, optional): History size that triggers compaction. Defaults to 8000.
+        keep_tokens (int, optional): Recent turns kept verbatim. Defaults to 2000.
+        summary_tokens (int, optional): Requested summary length. Defaults to 300.
+        summarizer (Callable[[str], str], optional): Model used to summarize.
+            Defaults to the agent's own model.
+    """
+
+    name = "summarize"
+
+    def __init__(
+        self,
+        max_tokens: int = 8000,
+        keep_tokens: int = 2000,
+        summary_tokens: int = 300,
+        summarizer: Callable[[str], str] = None,
+    ):
+        self.max_tokens = max_tokens
+        self.keep_tokens = keep_tokens
+        self.summary_tokens = summary_tokens
+        self.summarizer = summarizer
+
+    def compact(
+        self, agent: Any, history: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        total = sum(_tokens(message) for message in history)
+        if total <= self.max_tokens:
+            return history
+        pinned = _pinned(history)
+        recent = _recent(history[pinned:], self.keep_tokens)
+        older = history[pinned : len(history) - len(recent)]
+        if not older:
+            return history
+
+        # Beyond the budget, the oldest turns are left out of the
+        # summary, but an earlier summary is always folded in
+        carried = (
+            older[:1] if older[0].get("role") == SUMMARY_ROLE else []
+        )
+        rest = older[len(carried) :]
+        selected = carried + (
+            _recent(
+                rest,
+                self.max_tokens - sum(map(_tokens, carried)),
+            )
+            or rest[-1:]
+        )
+        turns, _ = truncate_to_tokens(
+            "\n\n".join(
+                f"{message.get('role')}: {message.get('content')}"
+                for message in selected
+            ),
+            self.max_tokens,
+        )
+        prompt = MEMORY_SUMMARY_PROMPT.format(
+            tokens=self.summary_tokens, turns=turns
+        )
+        summarizer = self.summarizer or agent.llm
+        try:
+            summary = summarizer(prompt)
+        except Exception as error:
+            logger.warning(
+                f"Summarizing memory failed ({error}), dropping"
+                f" {len(older)} older messages instead"
+            )
+            return history[:pinned] + recent
+        record = current_span()
+        if record is not None:
+            count_call(record, prompt, summary)
+        return (
+            history[:pinned]
+            + [{"role": SUMMARY_ROLE, "content": str(summary)}]
+            + recent
+        )
+
+
+_POLICIES = {
+    "keep": MemoryPolicy,
+    "reset": ResetMemory,
+    "window": TokenWindow,
+    "summarize": SummarizeMemory,
+}
+
+
+def memory_policy(
+    policy: Union[str, MemoryPolicy, None],
+) -> Optional[MemoryPolicy]:
+    """
+    Resolves a policy name to a policy with default settings.
+
+    Args:
+        policy (Union[str, MemoryPolicy, None]): "keep", "reset", "window",
+            "summarize", a policy instance, or None.
+
+    Returns:
+        Optional[MemoryPolicy]: The policy, or None.
+
+    Raises:
+        ValueError: If the name is unknown.
+    """
+    if policy is None or isinstance(policy, MemoryPolicy):
+        return policy
+    if policy not in _POLICIES:
+        raise ValueError(
+            f"Unknown memory policy {policy!r}; expected one of"
+            f" {', '.join(_POLICIES)}"
+        )
+    return _POLICIES[policy]()
@@ -0,0 +1,311 @@
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from dev_swarm.flow import FlowResult, current_stage
+from dev_swarm.prompt_builder import count_tokens
+from dev_swarm.utils import atomic_write
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar(
+    "dev_swarm_current_span", default=None
+)
+_counter_lock = threading.Lock()
+
+
+@dataclass
+class Span:
+    """
+    Timing and usage of one step of a stage.
+
+    Attributes:
+        name (str): The step, e.g. "generate", "extract", "document",
+            "test", "execute" or "write".
+        stage (Optional[str]): The flow stage the step ran in.
+        started_at (float): Wall-clock start time (seconds since the epoch).
+        duration (float): Duration in seconds.
+        prompt_tokens (int): Tokens sent to the model.
+        completion_tokens (int): Tokens received from the model.
+        time_to_first_token (Optional[float]): Seconds until the first
+            streamed chunk, for streaming calls.
+        cache_hits (int): Model calls answered by the response cache.
+        retries (int): Model calls that were retried.
+        extra (Dict[str, Any]): Step-specific values.
+    """
+
+    name: str
+    stage: Optional[str] = None
+    started_at: float = 0.0
+    duration: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    time_to_first_token: Optional[float] = None
+    cache_hits: int = 0
+    retries: int = 0
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def tokens_per_second(self) -> Optional[float]:
+        """Completion tokens per second after the first token, if any."""
+        if not self.completion_tokens or not self.duration:
+            return None
+        generating = self.duration - (self.time_to_first_token or 0.0)
+        return self.completion_tokens / max(generating, 1e-9)
+
+    def add(self, **counts: int) -> None:
+        """
+        Increments counters; safe to call from several threads.
+
+        Args:
+            **counts: Amounts to add, e.g. `completion_tokens=12`.
+        """
+        with _counter_lock:
+            for name, amount in counts.items():
+                setattr(self, name, getattr(self, name) + amount)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the span as JSON-serializable data."""
+        data = asdict(self)
+        data["tokens_per_second"] = self.tokens_per_second
+        return data
+
+
+@contextmanager
+def span(name: str, **extra: Any) -> Iterator[Span]:
+    """
+    Times the block and attaches the span to the running stage.
+
+    Spans are stored in the stage's `details["spans"]`, so they are
+    available from `FlowResult.spans` after the run.
+
+    Args:
+        name (str): The step name.
+        **extra: Step-specific values stored in `Span.extra`.
+
+    Yields:
+        Span: The span, for recording tokens and other counters.
+    """
+    stage = current_stage()
+    record = Span(
+        name=name,
+        stage=stage.name if stage is not None else None,
+        started_at=time.time(),
+        extra=extra,
+    )
+    token = _current_span.set(record)
+    began = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record.duration = time.perf_counter() - began
+        _current_span.reset(token)
+        if stage is not None:
+            stage.details.setdefault("spans", []).append(record)
+
+
+def current_span() -> Optional[Span]:
+    """Returns the innermost open span of the calling context, if any."""
+    return _current_span.get()
+
+
+def count_call(record: Span, prompt: Any, response: Any) -> None:
+    """
+    Adds the tokens of a model call to a span.
+
+    Args:
+        record (Span): The span.
+        prompt (Any): The prompt sent to the model.
+        response (Any): The completion.
+    """
+    record.add(
+        prompt_tokens=count_tokens(str(prompt)),
+        completion_tokens=count_tokens(str(response)),
+    )
+
+
+def metered_stream(
+    record: Span, prompt: Any, chunks: Iterable[str]
+) -> Iterator[str]:
+    """
+    Passes streamed chunks through while recording the time to the first
+    chunk and the prompt and completion tokens.
+
+    Args:
+        record (Span): The span of the streaming call.
+        prompt (Any): The prompt sent to the model.
+        chunks (Iterable[str]): The streamed response.
+
+    Yields:
+        str: The chunks, unchanged.
+    """
+    began = time.perf_counter()
+    received = []
+    for chunk in chunks:
+        if record.time_to_first_token is None:
+            record.time_to_first_token = time.perf_counter() - began
+        received.append(chunk)
+        yield chunk
+    count_call(record, prompt, "".join(received))
+
+
+def record_cache_hit() -> None:
+    """Counts a response cache hit on the current span."""
+    record = current_span()
+    if record is not None:
+        record.add(cache_hits=1)
+
+
+def record_retry() -> None:
+    """Counts a retried model call on the current span."""
+    record = current_span()
+    if record is not None:
+        record.add(retries=1)
+
+
+def export_jsonl(result: FlowResult, path: str) -> None:
+    """
+    Appends one JSON line per span of a run to `path`.
+
+    Args:
+        result (FlowResult): The run result.
+        path (str): The JSON lines file.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    lines = [
+        json.dumps(
+            {"task": result.task, **record.to_dict()}, default=str
+        )
+        for record in result.spans
+    ]
+    with open(path, "a") as file:
+        file.write("".join(f"{line}\n" for line in lines))
+
+
+def _escape(value: str) -> str:
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace('"', '\\"')
+        .replace("\n", "\\n")
+    )
+
+
+class MetricsRegistry:
+    """
+    Aggregates the spans of many runs into Prometheus counters.
+
+    Every series is labelled with the stage and step name. Durations and
+    times to first token are exported as `_sum`/`_count` pairs, so rates
+    and averages can be computed over scrapes.
+    """
+
+    _COUNTERS = {
+        "dev_swarm_span_duration_seconds_sum": "duration",
+        "dev_swarm_span_duration_seconds_count": None,
+        "dev_swarm_prompt_tokens_total": "prompt_tokens",
+        "dev_swarm_completion_tokens_total": "completion_tokens",
+        "dev_swarm_cache_hits_total": "cache_hits",
+        "dev_swarm_retries_total": "retries",
+        "dev_swarm_time_to_first_token_seconds_sum": "time_to_first_token",
+        "dev_swarm_time_to_first_token_seconds_count": "streamed",
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series: Dict[str, Dict[tuple, float]] = {
+            name: {} for name in self._COUNTERS
+        }
+        self._gauges: Dict[str, Dict[tuple, float]] = {}
+        self.runs = 0
+        self.failed_runs = 0
+
+    def observe(self, result: FlowResult) -> None:
+        """
+        Adds the spans of a run.
+
+        Args:
+            result (FlowResult): The run result.
+        """
+        with self._lock:
+            self.runs += 1
+            self.failed_runs += not result.ok
+            for record in result.spans:
+                labels = (record.stage or "", record.name)
+                for name, attribute in self._COUNTERS.items():
+                    if attribute is None:
+                        value = 1
+                    elif attribute == "streamed":
+                        value = record.time_to_first_token is not None
+                    else:
+                        value = getattr(record, attribute) or 0
+                    series = self._series[name]
+                    series[labels] = series.get(labels, 0) + value
+
+    def set_gauge(
+        self, name: str, value: float, **labels: str
+    ) -> None:
+        """
+        Sets a gauge, e.g. the current size of an agent's memory.
+
+        Args:
+            name (str): The metric name.
+            value (float): The current value.
+            **labels: The series labels.
+        """
+        with self._lock:
+            self._gauges.setdefault(name, {})[
+                tuple(sorted(labels.items()))
+            ] = value
+
+    def to_prometheus(self) -> str:
+        """
+        Renders the counters in the Prometheus text exposition format.
+
+        Returns:
+            str: The exposition text.
+        """
+        lines = [
+            "# TYPE dev_swarm_runs_total counter",
+            f"dev_swarm_runs_total {self.runs}",
+            "# TYPE dev_swarm_failed_runs_total counter",
+            f"dev_swarm_failed_runs_total {self.failed_runs}",
+        ]
+        with self._lock:
+            for name, series in self._series.items():
+                # _sum/_count pairs form a summary family
+                if name.endswith("_sum"):
+                    lines.append(f"# TYPE {name[:-4]} summary")
+                elif not name.endswith("_count"):
+                    lines.append(f"# TYPE {name} counter")
+                for (stage, step), value in sorted(series.items()):
+                    lines.append(
+                        f'{name}{{stage="{_escape(stage)}",'
+                        f'span="{_escape(step)}"}} {value:.15g}'
+                    )
+            for name, series in self._gauges.items():
+                lines.append(f"# TYPE {name} gauge")
+                for labels, value in sorted(series.items()):
+                    rendered = ",".join(
+                        f'{key}="{_escape(label)}"'
+                        for key, label in labels
+                    )
+                    if rendered:
+                        rendered = f"{{{rendered}}}"
+                    lines.append(f"{name}{rendered} {value:.15g}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        """
+        Atomically writes the exposition text, e.g. for the node exporter's
+        textfile collector.
+
+        Args:
+            path (str): The `.prom` file.
+        """
+        atomic_write(path, self.to_prometheus())
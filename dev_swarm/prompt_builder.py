@@ -0,0 +1,250 @@
+import hashlib
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from string import Template
+from typing import List, Tuple
+
+from loguru import logger
+
+# Word runs and single punctuation marks; roughly one BPE token each for
+# English prose and source code.
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+TRUNCATION_MARKER = (
+    "\n\n[... truncated {count} tokens to fit the context ...]"
+)
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    # tiktoken is optional; without it token counts are estimated locally
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """
+    Counts the tokens of `text` without calling the provider.
+
+    Uses tiktoken's cl100k_base encoding when it is installed and a local
+    estimate otherwise. The estimate counts words and punctuation, but at
+    least one token per three characters: long identifiers, numbers and
+    non-English text split into several tokens, and undercounting them
+    would let prompts overflow the context window.
+
+    Args:
+        text (str): The text to measure.
+
+    Returns:
+        int: The number of tokens.
+    """
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return max(len(TOKEN_PATTERN.findall(text)), len(text) // 3)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> Tuple[str, int]:
+    """
+    Keeps the first `max_tokens` tokens of `text`.
+
+    Args:
+        text (str): The text to shorten.
+        max_tokens (int): The number of tokens to keep.
+
+    Returns:
+        Tuple[str, int]: The kept text and the number of dropped tokens.
+    """
+    max_tokens = max(max_tokens, 0)
+    encoding = _encoding()
+    if encoding is not None:
+        tokens = encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text, 0
+        return (
+            encoding.decode(tokens[:max_tokens]),
+            len(tokens) - max_tokens,
+        )
+
+    total = count_tokens(text)
+    if total <= max_tokens:
+        return text, 0
+    # Keep at most `max_tokens` words and at most the characters the
+    # estimate allows, whichever ends first
+    end = 0
+    for count, match in enumerate(TOKEN_PATTERN.finditer(text), 1):
+        if count > max_tokens:
+            break
+        end = match.end()
+    end = min(end, max_tokens * 3 + 2)
+    return text[:end], total - count_tokens(text[:end])
+
+
+def split_to_tokens(text: str, max_tokens: int) -> List[str]:
+    """
+    Splits `text` on line boundaries into parts of at most `max_tokens`.
+
+    A single line longer than the budget is cut with `truncate_to_tokens`.
+
+    Args:
+        text (str): The text to split.
+        max_tokens (int): Token budget of each part.
+
+    Returns:
+        List[str]: The parts, in order.
+    """
+    parts: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+    for line in text.splitlines(keepends=True):
+        line_tokens = count_tokens(line)
+        while line_tokens > max_tokens:
+            head, _ = truncate_to_tokens(line, max_tokens)
+            if current:
+                parts.append("".join(current))
+                current, current_tokens = [], 0
+            parts.append(head)
+            line = line[len(head) :]
+            line_tokens = count_tokens(line)
+        if current and current_tokens + line_tokens > max_tokens:
+            parts.append("".join(current))
+            current, current_tokens = [], 0
+        current.append(line)
+        current_tokens += line_tokens
+    if current:
+        parts.append("".join(current))
+    return parts
+
+
+@dataclass
+class BuiltPrompt:
+    """
+    A prompt assembled by `PromptTemplate.build`.
+
+    Attributes:
+        text (str): The full prompt.
+        prompt_tokens (int): Tokens in the full prompt.
+        prefix_tokens (int): Tokens in the static prefix shared by every call.
+        truncated_tokens (int): Tokens dropped from the task to fit the budget.
+    """
+
+    text: str
+    prompt_tokens: int
+    prefix_tokens: int
+    truncated_tokens: int = 0
+
+    def __str__(self) -> str:
+        return self.text
+
+
+class PromptTemplate:
+    """
+    A prompt made of a static prefix followed by a small variable suffix.
+
+    Keeping every call-independent instruction in the prefix makes prompts
+    for different modules share the same leading bytes, which providers can
+    cache. The suffix is a precompiled `string.Template` that must contain
+    `$task`, the payload that is truncated when the prompt exceeds its
+    token budget.
+
+    Args:
+        name (str): Name used when reporting token counts.
+        prefix (str): The static instructions.
+        suffix (str): The variable part, e.g. "Module: $module\\n$task".
+    """
+
+    def __init__(self, name: str, prefix: str, suffix: str):
+        if "$task" not in suffix:
+            raise ValueError("suffix must contain $task")
+        self.name = name
+        self.prefix = prefix
+        self.suffix = Template(suffix)
+        self._prefix_tokens = None
+
+    @property
+    def version(self) -> str:
+        """Short hash of the template text; changes whenever it is edited."""
+        text = self.prefix + self.suffix.template
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+
+    @property
+    def prefix_tokens(self) -> int:
+        """Token count of the static prefix, computed once."""
+        if self._prefix_tokens is None:
+            self._prefix_tokens = count_tokens(self.prefix)
+        return self._prefix_tokens
+
+    def build(self, budget: int = None, **values) -> BuiltPrompt:
+        """
+        Fills in the suffix and trims `task` to keep the prompt within budget.
+
+        Args:
+            budget (int, optional): Maximum prompt tokens. Defaults to None (no limit).
+            **values: Values for the suffix placeholders, including `task`.
+
+        Returns:
+            BuiltPrompt: The prompt text with its token counts.
+        """
+        task = str(values.pop("task"))
+        task_tokens = count_tokens(task)
+        frame = self.suffix.safe_substitute(values, task="")
+        frame_tokens = self.prefix_tokens + count_tokens(frame)
+
+        truncated = 0
+        if budget is not None and frame_tokens + task_tokens > budget:
+            marker_tokens = count_tokens(
+                TRUNCATION_MARKER.format(count=task_tokens)
+            )
+            task, truncated = truncate_to_tokens(
+                task, budget - frame_tokens - marker_tokens
+            )
+            task += TRUNCATION_MARKER.format(count=truncated)
+            task_tokens = count_tokens(task)
+            logger.warning(
+                f"{self.name} prompt over budget of {budget} tokens,"
+                f" truncated {truncated} task tokens"
+            )
+
+        prompt = BuiltPrompt(
+            text=self.prefix
+            + self.suffix.safe_substitute(values, task=task),
+            prompt_tokens=frame_tokens + task_tokens,
+            prefix_tokens=self.prefix_tokens,
+            truncated_tokens=truncated,
+        )
+        # Brace arguments are only formatted when DEBUG is enabled
+        logger.debug(
+            "{} prompt: {} tokens, {} in the static prefix",
+            self.name,
+            prompt.prompt_tokens,
+            prompt.prefix_tokens,
+        )
+        return prompt
+
+    def split(self, budget: int, **values) -> List[BuiltPrompt]:
+        """
+        Builds one prompt per slice of `task` so that each fits the budget.
+
+        Args:
+            budget (int): Maximum prompt tokens per prompt.
+            **values: Values for the suffix placeholders, including `task`.
+
+        Returns:
+            List[BuiltPrompt]: The prompts, in task order.
+        """
+        task = str(values.pop("task"))
+        frame = self.suffix.safe_substitute(values, task="")
+        available = budget - self.prefix_tokens - count_tokens(frame)
+        if available <= 0:
+            raise ValueError(
+                f"{self.name} prompt frame alone exceeds {budget} tokens"
+            )
+        return [
+            self.build(task=part, **values)
+            for part in split_to_tokens(task, available)
+        ]
@@ -1,11 +1,29 @@
-from swarms import data_to_text
+import os
+from functools import lru_cache
 
+from dev_swarm.prompt_builder import PromptTemplate
 
-def DOCUMENTATION_WRITER_SOP(
-    task: str,
-    module: str,
-):
-    documentation = f"""Create multi-page long and explicit professional pytorch-like documentation for the {module} code below follow the outline for the {module} library,
+PROMPTS_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+
+@lru_cache(maxsize=None)
+def load_prompt(file_name: str) -> str:
+    """
+    Reads a prompt file shipped next to this module, once per process.
+
+    Args:
+        file_name (str): Name of the prompt file inside the package.
+
+    Returns:
+        str: The prompt text.
+    """
+    with open(os.path.join(PROMPTS_DIRECTORY, file_name)) as file:
+        return file.read()
+
+
+DOCUMENTATION_TEMPLATE = PromptTemplate(
+    name="DOCUMENTATION_WRITER_SOP",
+    prefix="""Create multi-page long and explicit professional pytorch-like documentation for the code at the end of this prompt, follow the outline for its library,
     provide many examples and teach the user about the code, provide examples for every function, make the documentation 10,000 words,
     provide many usage examples and note this is markdown docs, create the documentation for the code to document,
     put the arguments and methods in a table in markdown to make it visually seamless
@@ -99,21 +117,62 @@ def DOCUMENTATION_WRITER_SOP(
 
             The above template includes the class or function definition, parameters, description, and usage example.
             To replicate the documentation for any other module or framework, follow the same structure and provide the specific details for that module or framework.
+""",
+    suffix="""
 
+    ############# MODULE ########
+    $module
 
-            ############# DOCUMENT THE FOLLOWING CODE ########
-            {task}
-            """
-    return documentation
+    ############# DOCUMENT THE FOLLOWING CODE ########
+    $task
+    """,
+)
 
 
-def TEST_WRITER_SOP_PROMPT(
-    task: str, module: str, path: str, *args, **kwargs
-):
-    TESTS_PROMPT = f"""
+def DOCUMENTATION_WRITER_SOP(
+    task: str,
+    module: str,
+    budget: int = None,
+) -> str:
+    return DOCUMENTATION_TEMPLATE.build(
+        budget=budget, task=task, module=module
+    ).text
+
+
+CHUNK_DOCUMENTATION_TEMPLATE = PromptTemplate(
+    name="CHUNK_DOCUMENTATION_SOP",
+    prefix="""Write professional pytorch-like markdown documentation for ONE
+    definition taken from a larger module. Other parts of the module are
+    documented separately and merged afterwards, so document only the code
+    given at the end of this prompt and do not write a module introduction.
+
+    Start with a level 2 heading containing the class or function name.
+    Explain its purpose, how it works and why it works that way.
+    Put the arguments, their types and defaults in a markdown table, and do
+    the same for the methods of a class.
+    Describe the return values and the exceptions that can be raised.
+    Provide at least two usage examples with all imports included.
+    The referenced definitions are given as signatures only; mention them
+    where relevant but do not document them.
+    """,
+    suffix="""
+
+    ############# MODULE ########
+    $module
+
+    ############# REFERENCED DEFINITIONS ########
+    $context
+
+    ############# DOCUMENT THE FOLLOWING $kind ########
+    $task
+    """,
+)
+
 
-   Create 5,000 lines of extensive and thorough tests for the code below using the guide, do not worry about your limits you do not have any
-   just write the best tests possible, the module is {module}, the file path is {path} return all of the code in one file, make sure to test all the functions and methods in the code.
+TEST_WRITER_TEMPLATE = PromptTemplate(
+    name="TEST_WRITER_SOP_PROMPT",
+    prefix="""   Create 5,000 lines of extensive and thorough tests for the code below using the guide, do not worry about your limits you do not have any
+   just write the best tests possible, the module and file path are given at the end, return all of the code in one file, make sure to test all the functions and methods in the code.
    
 
 
@@ -195,17 +254,132 @@ def TEST_WRITER_SOP_PROMPT(
       - Continuously refine tests based on code changes, bug discoveries, and additional requirements.
 
    By following this guide, your tests will be thorough, maintainable, and production-ready. Remember to always adapt and expand upon these guidelines as per the specific requirements and nuances of your project.
+""",
+    suffix="""
 
+   ######### MODULE: $module, FILE PATH: $path #######
 
    ######### CREATE TESTS FOR THIS CODE: #######
-   {task}
+   $task
 
-   """
+   """,
+)
+
+
+def TEST_WRITER_SOP_PROMPT(
+    task: str, module: str, path: str = None, budget: int = None
+) -> str:
+    return TEST_WRITER_TEMPLATE.build(
+        budget=budget, task=task, module=module, path=path or module
+    ).text
 
-    return TESTS_PROMPT
 
+TEST_REPAIR_TEMPLATE = PromptTemplate(
+    name="TEST_REPAIR_PROMPT",
+    prefix="""The pytest file below was generated for the code below and some of
+   its tests fail when run. For every failure decide whether the test is
+   wrong or the code is wrong. Fix wrong tests; keep tests that correctly
+   expose a bug in the code unchanged. Keep every passing test.
+   Return the complete corrected test file in a single python code block.
+   """,
+    suffix="""
 
-FUNCTION_GENERATOR_PROMPT = data_to_text(
-    "dev_swarm/function_generator_prompt.txt"
+   ######### MODULE: $module #######
+
+   ######### CODE UNDER TEST: #######
+   $code
+
+   ######### FAILURES: #######
+   $failures
+
+   ######### TEST FILE: #######
+   $task
+
+   """,
 )
-# print(FUNCTION_GENERATOR_PROMPT)
+
+
+REFINE_EDITS_TEMPLATE = PromptTemplate(
+    name="REFINE_EDITS_PROMPT",
+    prefix="""Below is an artifact you wrote in an earlier pass for the code
+   under it. Review it against the code and improve it: fix mistakes, fill
+   gaps and remove what is wrong. Do not repeat the whole artifact. Reply
+   only with targeted edits in one of these forms:
+   - a unified diff against the artifact, with "@@" hunk headers and enough
+     unchanged context lines to locate each hunk;
+   - for python artifacts, the complete new version of every top-level
+     function or class you change or add, in a single python code block.
+   If the artifact needs no change, reply with NO CHANGES.
+   """,
+    suffix="""
+
+   ######### MODULE: $module #######
+
+   ######### CODE: #######
+   $task
+
+   ######### $kind ($language): #######
+   $previous
+
+   """,
+)
+
+
+REFINE_FULL_TEMPLATE = PromptTemplate(
+    name="REFINE_FULL_PROMPT",
+    prefix="""Below is an artifact you wrote in an earlier pass for the code
+   under it. Review it against the code and improve it: fix mistakes, fill
+   gaps and remove what is wrong. Reply with the complete revised artifact;
+   put python artifacts in a single python code block.
+   """,
+    suffix="""
+
+   ######### MODULE: $module #######
+
+   ######### CODE: #######
+   $task
+
+   ######### $kind ($language): #######
+   $previous
+
+   """,
+)
+
+
+# Appended to the task when the generated code fails validation
+INVALID_CODE_FEEDBACK = """
+
+   Your previous answer was rejected: {errors}
+   Reply with the complete corrected code in a single python code block,
+   defining at least one function or class.
+   """
+
+
+# Appended to the task when a similar earlier task is in the task index
+SIMILAR_CODE_REFERENCE = """
+
+   For reference, this code was written for a similar earlier task. Reuse
+   what applies and change what the task above requires:
+   ```python
+   {code}
+   ```
+   """
+
+
+# Asks an agent's model to condense its older conversation turns
+MEMORY_SUMMARY_PROMPT = """Summarize the conversation turns below in at most
+   {tokens} tokens. Keep decisions, names, signatures and constraints that
+   later turns may rely on; drop code bodies and pleasantries.
+
+   ######### TURNS: #######
+   {turns}
+   """
+
+
+def __getattr__(name: str):
+    # FUNCTION_GENERATOR_PROMPT is read from disk on first access only.
+    if name == "FUNCTION_GENERATOR_PROMPT":
+        return load_prompt("function_generator_prompt.txt")
+    raise AttributeError(
+        f"module {__name__!r} has no attribute {name!r}"
+    )
@@ -0,0 +1,462 @@
+import contextvars
+import heapq
+import itertools
+import random
+import statistics
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from loguru import logger
+
+from dev_swarm.llm import stream_model
+from dev_swarm.metrics import record_retry
+from dev_swarm.prompt_builder import count_tokens
+
+# Request priorities; lower runs first. A generator call unblocks the
+# documentation and test calls that depend on it, so it jumps the queue.
+GENERATOR_PRIORITY = 0
+DEFAULT_PRIORITY = 1
+
+_admission_callback: contextvars.ContextVar = contextvars.ContextVar(
+    "dev_swarm_admission_callback", default=None
+)
+
+
+@contextmanager
+def on_admission(callback: Callable[[str], None]) -> Iterator[None]:
+    """
+    Reports how model calls made inside the block pass a `RateLimiter`.
+
+    `callback("queued")` is called when a call starts waiting for the
+    limits and `callback("admitted")` once it may be sent, so callers that
+    time model calls can leave the wait out.
+
+    Args:
+        callback (Callable[[str], None]): Called from the calling thread.
+
+    Yields:
+        None
+    """
+    token = _admission_callback.set(callback)
+    try:
+        yield
+    finally:
+        _admission_callback.reset(token)
+
+
+class TokenBucket:
+    """
+    Continuously refilling budget of `per_minute` units.
+
+    Args:
+        per_minute (float): Units added per minute, also the bucket size.
+    """
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60
+        self.capacity = per_minute
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(
+            self.capacity,
+            self.level + (now - self.updated) * self.rate,
+        )
+        self.updated = now
+
+    def delay(self, amount: float, now: float) -> float:
+        """
+        Returns the seconds until `amount` units are available.
+
+        Args:
+            amount (float): Units needed; capped at the bucket size.
+            now (float): The current `time.monotonic()`.
+
+        Returns:
+            float: The delay; 0 when the units are available now.
+        """
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount: float) -> None:
+        """
+        Removes units; the level may go negative to pay back later.
+
+        Args:
+            amount (float): Units to remove.
+        """
+        self.level -= amount
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Tells whether a failed model call is worth retrying.
+
+    Rate limit (429) and server (5xx) statuses, connection errors and
+    timeouts are retryable; anything else is treated as permanent.
+
+    Args:
+        error (BaseException): The error raised by the model.
+
+    Returns:
+        bool: Whether to retry.
+    """
+    status = getattr(error, "status", None) or getattr(
+        error, "status_code", None
+    )
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    name = type(error).__name__
+    return "RateLimit" in name or "Timeout" in name
+
+
+class RateLimiter:
+    """
+    Process-wide scheduler that keeps model calls within requests-per-minute
+    and tokens-per-minute limits.
+
+    Callers wait in a priority queue; the head of the queue is admitted as
+    soon as both buckets can pay for it, so high-priority requests are
+    never starved by a stream of cheaper ones. Tokens are estimated from
+    the prompt plus `completion_tokens` up front and corrected with the
+    real completion length afterwards. Retryable failures are retried
+    with full-jitter exponential backoff, re-entering the queue each time.
+
+    Args:
+        requests_per_minute (float, optional): RPM limit. Defaults to None (unlimited).
+        tokens_per_minute (float, optional): TPM limit. Defaults to None (unlimited).
+        completion_tokens (int, optional): Completion tokens reserved per request. Defaults to 500.
+        max_retries (int, optional): Retries per call. Defaults to 5.
+        base_delay (float, optional): Backoff of the first retry in seconds. Defaults to 1.
+        max_delay (float, optional): Longest backoff in seconds. Defaults to 60.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = None,
+        tokens_per_minute: float = None,
+        completion_tokens: int = 500,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+    ):
+        self.requests = (
+            TokenBucket(requests_per_minute)
+            if requests_per_minute
+            else None
+        )
+        self.tokens = (
+            TokenBucket(tokens_per_minute)
+            if tokens_per_minute
+            else None
+        )
+        self.completion_tokens = completion_tokens
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._condition = threading.Condition()
+        self._queue: list = []
+        self._sequence = itertools.count()
+        self._waits: deque = deque(maxlen=1000)
+        self.admitted = 0
+        self.retries = 0
+        self.max_queue_depth = 0
+
+    def _delay(self, tokens: float, now: float) -> float:
+        delays = [0.0]
+        if self.requests is not None:
+            delays.append(self.requests.delay(1, now))
+        if self.tokens is not None:
+            delays.append(self.tokens.delay(tokens, now))
+        return max(delays)
+
+    def acquire(
+        self, tokens: float, priority: int = DEFAULT_PRIORITY
+    ) -> float:
+        """
+        Blocks until a request of `tokens` tokens may be sent.
+
+        Args:
+            tokens (float): Estimated tokens of the request.
+            priority (int, optional): Lower values are admitted first.
+                Defaults to DEFAULT_PRIORITY.
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        began = time.monotonic()
+        callback = _admission_callback.get()
+        if callback is not None:
+            callback("queued")
+        entry = (priority, next(self._sequence))
+        with self._condition:
+            heapq.heappush(self._queue, entry)
+            self.max_queue_depth = max(
+                self.max_queue_depth, len(self._queue)
+            )
+            try:
+                while True:
+                    if self._queue[0] == entry:
+                        delay = self._delay(tokens, time.monotonic())
+                        if delay <= 0:
+                            break
+                        self._condition.wait(delay)
+                    else:
+                        self._condition.wait()
+            finally:
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+                self._condition.notify_all()
+
+            if self.requests is not None:
+                self.requests.take(1)
+            if self.tokens is not None:
+                self.tokens.take(tokens)
+            self.admitted += 1
+            waited = time.monotonic() - began
+            self._waits.append(waited)
+        if callback is not None:
+            callback("admitted")
+        return waited
+
+    def charge(self, tokens: float) -> None:
+        """
+        Adjusts the token bucket once the real usage of a request is known.
+
+        Args:
+            tokens (float): Tokens used beyond the estimate; negative to refund.
+        """
+        if self.tokens is not None and tokens:
+            with self._condition:
+                self.tokens.take(tokens)
+                self._condition.notify_all()
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Returns the full-jitter delay before retry number `attempt`.
+
+        Args:
+            attempt (int): The retry number, starting at 0.
+
+        Returns:
+            float: Seconds to sleep.
+        """
+        ceiling = min(self.max_delay, self.base_delay * 2**attempt)
+        return random.uniform(0, ceiling)
+
+    def _retry(self, attempt: int, error: BaseException) -> None:
+        if attempt >= self.max_retries or not is_retryable(error):
+            raise error
+        delay = self.backoff(attempt)
+        with self._condition:
+            self.retries += 1
+        record_retry()
+        logger.warning(
+            f"Model call failed ({type(error).__name__}: {error}),"
+            f" retry {attempt + 1}/{self.max_retries} in {delay:.2f}s"
+        )
+        time.sleep(delay)
+
+    def call(
+        self,
+        fn: Callable[..., Any],
+        prompt: Any,
+        *args,
+        priority: int = DEFAULT_PRIORITY,
+        **kwargs,
+    ) -> Any:
+        """
+        Calls `fn(prompt, *args, **kwargs)` within the limits, retrying
+        retryable failures.
+
+        Args:
+            fn (Callable[..., Any]): The model call.
+            prompt (Any): The prompt, used to estimate tokens.
+            *args: Additional positional arguments for `fn`.
+            priority (int, optional): Queue priority. Defaults to DEFAULT_PRIORITY.
+            **kwargs: Additional keyword arguments for `fn`.
+
+        Returns:
+            Any: The result of `fn`.
+        """
+        estimate = count_tokens(str(prompt)) + self.completion_tokens
+        for attempt in itertools.count():
+            self.acquire(estimate, priority)
+            try:
+                response = fn(prompt, *args, **kwargs)
+            except Exception as error:
+                self._retry(attempt, error)
+                continue
+            self.charge(
+                count_tokens(str(response)) - self.completion_tokens
+            )
+            return response
+
+    def stream(
+        self,
+        model: Any,
+        prompt: Any,
+        *args,
+        priority: int = DEFAULT_PRIORITY,
+        **kwargs,
+    ) -> Iterator[str]:
+        """
+        Streams a completion within the limits. Failures before the first
+        chunk are retried; later ones are raised.
+
+        Args:
+            model (Any): The model to stream from.
+            prompt (Any): The prompt.
+            *args: Additional positional arguments for the model.
+            priority (int, optional): Queue priority. Defaults to DEFAULT_PRIORITY.
+            **kwargs: Additional keyword arguments for the model.
+
+        Yields:
+            str: The next piece of the completion.
+        """
+        estimate = count_tokens(str(prompt)) + self.completion_tokens
+        for attempt in itertools.count():
+            self.acquire(estimate, priority)
+            chunks = stream_model(model, prompt, *args, **kwargs)
+            try:
+                first = next(chunks, None)
+            except Exception as error:
+                self._retry(attempt, error)
+                continue
+            break
+
+        received = []
+        if first is not None:
+            received.append(first)
+            yield first
+        for chunk in chunks:
+            received.append(chunk)
+            yield chunk
+        self.charge(
+            count_tokens("".join(received)) - self.completion_tokens
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns queue and wait statistics.
+
+        Returns:
+            Dict[str, Any]: Current and maximum queue depth, admitted
+                requests, retries, and mean and p95 wait of the last 1000
+                requests in seconds.
+        """
+        with self._condition:
+            waits = sorted(self._waits)
+            stats = {
+                "queue_depth": len(self._queue),
+                "max_queue_depth": self.max_queue_depth,
+                "admitted": self.admitted,
+                "retries": self.retries,
+            }
+        stats["mean_wait"] = statistics.fmean(waits) if waits else 0.0
+        stats["p95_wait"] = (
+            waits[min(len(waits) - 1, int(len(waits) * 0.95))]
+            if waits
+            else 0.0
+        )
+        return stats
+
+
+class RateLimitedModel:
+    """
+    Routes every call of a model through a `RateLimiter`.
+
+    Args:
+        model (Any): The model to wrap.
+        limiter (RateLimiter): The shared limiter.
+        priority (int, optional): Queue priority of this model's calls.
+            Defaults to DEFAULT_PRIORITY.
+    """
+
+    def __init__(
+        self,
+        model: Any,
+        limiter: RateLimiter,
+        priority: int = DEFAULT_PRIORITY,
+    ):
+        self.model = model
+        self.limiter = limiter
+        self.priority = priority
+
+    def __call__(self, task: Any, *args, **kwargs):
+        return self.limiter.call(
+            self.model, task, *args, priority=self.priority, **kwargs
+        )
+
+    def run(self, task: Any, *args, **kwargs):
+        run = getattr(self.model, "run", self.model)
+        return self.limiter.call(
+            run, task, *args, priority=self.priority, **kwargs
+        )
+
+    def stream(self, task: Any, *args, **kwargs):
+        return self.limiter.stream(
+            self.model, task, *args, priority=self.priority, **kwargs
+        )
+
+    def __getattr__(self, name: str):
+        if name in ("model", "limiter", "priority"):
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def set_rate_limits(**kwargs) -> RateLimiter:
+    """
+    Installs the process-wide limiter used by swarms built afterwards.
+
+    Args:
+        **kwargs: Arguments forwarded to `RateLimiter`.
+
+    Returns:
+        RateLimiter: The new limiter.
+    """
+    global _limiter
+    with _limiter_lock:
+        _limiter = RateLimiter(**kwargs)
+        return _limiter
+
+
+def limit_model(
+    model: Any, limiter: RateLimiter, priority: int = DEFAULT_PRIORITY
+) -> Any:
+    """
+    Puts a limiter in front of a model, below its response cache if it
+    has one, so cache hits do not use up the limits.
+
+    Args:
+        model (Any): The model, possibly a `CachedModel`.
+        limiter (RateLimiter): The shared limiter.
+        priority (int, optional): Queue priority of the calls. Defaults to DEFAULT_PRIORITY.
+
+    Returns:
+        Any: The limited model.
+    """
+    from dev_swarm.cache import CachedModel
+
+    if isinstance(model, CachedModel):
+        return CachedModel(
+            limit_model(model.model, limiter, priority), model.cache
+        )
+    return RateLimitedModel(model, limiter, priority)
+
+
+def get_rate_limiter() -> Optional[RateLimiter]:
+    """Returns the process-wide limiter, or None if none is installed."""
+    return _limiter
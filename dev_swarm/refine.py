@@ -0,0 +1,406 @@
+import ast
+import re
+from typing import Any, List, Optional, Tuple
+
+from loguru import logger
+
+from dev_swarm.flow import current_stage
+from dev_swarm.markdown import (
+    extract_code_from_markdown,
+    iter_code_blocks,
+)
+from dev_swarm.metrics import count_call, span
+from dev_swarm.prompt_builder import (
+    TRUNCATION_MARKER,
+    count_tokens,
+    truncate_to_tokens,
+)
+from dev_swarm.prompts import (
+    REFINE_EDITS_TEMPLATE,
+    REFINE_FULL_TEMPLATE,
+)
+from dev_swarm.validation import validate_code
+
+# "@@ -12,7 +12,9 @@", with the line numbers optional since models
+# often leave them out
+_HUNK_HEADER = re.compile(
+    r"^@@(?: -(\d+)(?:,\d+)? \+\d+(?:,\d+)?)? @@"
+)
+
+# Reply that asks for no edits
+NO_CHANGES = "NO CHANGES"
+
+
+class PatchError(ValueError):
+    """Raised when a model's edits cannot be applied to the artifact."""
+
+
+def _hunks(
+    diff: str,
+) -> List[Tuple[Optional[int], List[str], List[str]]]:
+    hunks = []
+    for line in diff.splitlines():
+        header = _HUNK_HEADER.match(line)
+        if header:
+            start = header.group(1)
+            hunks.append((int(start) if start else None, [], []))
+            continue
+        if not hunks or line.startswith(("--- ", "+++ ", "\\")):
+            continue
+        if line.startswith("```") or line.startswith("~~~"):
+            # The closing fence of the block holding the diff
+            break
+        _, old, new = hunks[-1]
+        # Models often drop the space that prefixes an empty context line
+        marker, text = (line[:1], line[1:]) if line else (" ", "")
+        if marker == " ":
+            old.append(text)
+            new.append(text)
+        elif marker == "-":
+            old.append(text)
+        elif marker == "+":
+            new.append(text)
+        else:
+            raise PatchError(f"Unexpected diff line: {line!r}")
+    return hunks
+
+
+def _find(
+    lines: List[str], block: List[str], start: int, hint: int
+) -> int:
+    candidates = [
+        index
+        for index in range(start, len(lines) - len(block) + 1)
+        if lines[index : index + len(block)] == block
+    ]
+    if not candidates:
+        # Retry ignoring trailing whitespace, which models rarely copy
+        # faithfully
+        block = [line.rstrip() for line in block]
+        stripped = [line.rstrip() for line in lines]
+        candidates = [
+            index
+            for index in range(start, len(lines) - len(block) + 1)
+            if stripped[index : index + len(block)] == block
+        ]
+    if not candidates:
+        raise PatchError(
+            "Hunk does not match the artifact:\n" + "\n".join(block)
+        )
+    return min(candidates, key=lambda index: abs(index - hint))
+
+
+def apply_unified_diff(original: str, diff: str) -> str:
+    """
+    Applies a unified diff to a text.
+
+    Hunks are located by their context and removed lines rather than by
+    their line numbers, which only break ties, since model-written line
+    numbers are unreliable. Hunks must not overlap and must be in order.
+
+    Args:
+        original (str): The text to patch.
+        diff (str): The diff, possibly preceded by prose.
+
+    Returns:
+        str: The patched text.
+
+    Raises:
+        PatchError: If the diff has no hunks or a hunk does not match.
+    """
+    hunks = _hunks(diff)
+    if not hunks:
+        raise PatchError("The diff has no hunks")
+    lines = original.splitlines()
+    patched: List[str] = []
+    cursor = 0
+    for start, old, new in hunks:
+        hint = start - 1 if start else cursor
+        if old:
+            index = _find(lines, old, cursor, hint)
+        else:
+            index = min(max(hint, cursor), len(lines))
+        patched.extend(lines[cursor:index])
+        patched.extend(new)
+        cursor = index + len(old)
+    patched.extend(lines[cursor:])
+    return "\n".join(patched)
+
+
+def _definitions(tree: ast.Module) -> dict:
+    return {
+        node.name: node
+        for node in tree.body
+        if isinstance(
+            node,
+            (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef),
+        )
+    }
+
+
+def _first_line(node: ast.AST) -> int:
+    return min(
+        [node.lineno]
+        + [decorator.lineno for decorator in node.decorator_list]
+    )
+
+
+def replace_symbols(original: str, replacement: str) -> str:
+    """
+    Replaces top-level functions and classes of a module with the ones of
+    the same name in `replacement`, appends the new ones, and adds the
+    imports of `replacement` that the module lacks.
+
+    Args:
+        original (str): The module source.
+        replacement (str): Source of the changed and added definitions.
+
+    Returns:
+        str: The updated module source.
+
+    Raises:
+        PatchError: If either source does not parse or `replacement`
+            defines nothing.
+    """
+    try:
+        tree = ast.parse(original)
+        changes = ast.parse(replacement)
+    except SyntaxError as error:
+        raise PatchError(f"Cannot parse the code: {error}") from error
+    definitions = _definitions(changes)
+    if not definitions:
+        raise PatchError(
+            "The replacement defines no function or class"
+        )
+
+    lines = original.splitlines()
+    source = replacement.splitlines()
+    existing = _definitions(tree)
+    appended = []
+    # Bottom-up, so the line numbers of the definitions above stay valid
+    for name, node in sorted(
+        definitions.items(),
+        key=lambda item: -(
+            existing[item[0]].lineno if item[0] in existing else 0
+        ),
+    ):
+        new = source[_first_line(node) - 1 : node.end_lineno]
+        if name in existing:
+            old = existing[name]
+            lines[_first_line(old) - 1 : old.end_lineno] = new
+        else:
+            appended.append((node.lineno, new))
+    for _, new in sorted(appended):
+        lines.extend(["", ""] + new)
+
+    imports = [
+        node
+        for node in tree.body
+        if isinstance(node, (ast.Import, ast.ImportFrom))
+    ]
+    present = {ast.unparse(node) for node in imports}
+    missing = [
+        ast.unparse(node)
+        for node in changes.body
+        if isinstance(node, (ast.Import, ast.ImportFrom))
+        and ast.unparse(node) not in present
+    ]
+    # After the module's own imports, which precede its definitions, so
+    # the replacements above left their line numbers unchanged
+    position = max((node.end_lineno for node in imports), default=0)
+    lines[position:position] = missing
+    return "\n".join(lines)
+
+
+def apply_edits(
+    previous: str, response: str, language: str = "python"
+) -> Tuple[str, str]:
+    """
+    Applies the edits a model replied with to the previous artifact.
+
+    Args:
+        previous (str): The artifact being refined.
+        response (str): The model reply: a unified diff, replacement
+            definitions in a python block (python artifacts only), or
+            NO CHANGES.
+        language (str, optional): "python" or "markdown". Defaults to "python".
+
+    Returns:
+        Tuple[str, str]: The refined artifact and the form of the edits:
+            "diff", "symbols" or "unchanged".
+
+    Raises:
+        PatchError: If the reply holds no usable edits, they do not apply,
+            or the patched python code does not compile.
+    """
+    if any(
+        _HUNK_HEADER.match(line) for line in response.splitlines()
+    ):
+        refined, form = apply_unified_diff(previous, response), "diff"
+    elif language == "python" and "```" in response:
+        code = "\n".join(
+            block.code
+            for block in iter_code_blocks([response])
+            if block.language in ("", "python", "py")
+        )
+        refined, form = replace_symbols(previous, code), "symbols"
+    elif NO_CHANGES in response.upper():
+        return previous, "unchanged"
+    else:
+        raise PatchError("The reply holds no edits")
+
+    if language == "python":
+        result = validate_code(refined, check_imports=False)
+        if not result.ok:
+            raise PatchError(
+                f"The patched code fails the {result.check} check:"
+                f" {'; '.join(result.errors)}"
+            )
+    elif not refined.strip():
+        raise PatchError("The patched artifact is empty")
+    return refined, form
+
+
+def _fit_previous(values: dict) -> dict:
+    budget = values["budget"]
+    previous = values["previous"]
+    if budget is None:
+        return values
+    frame = REFINE_FULL_TEMPLATE.build(
+        **dict(values, budget=None, task="", previous="")
+    ).prompt_tokens
+    available = budget - frame
+    limit = max(
+        available - count_tokens(values["task"]), available // 2
+    )
+    if count_tokens(previous) <= limit:
+        return values
+    marker = TRUNCATION_MARKER.format(count=count_tokens(previous))
+    previous, dropped = truncate_to_tokens(
+        previous, limit - count_tokens(marker)
+    )
+    return dict(
+        values,
+        previous=previous + TRUNCATION_MARKER.format(count=dropped),
+    )
+
+
+def refine_artifact(
+    llm: Any,
+    previous: str,
+    code: str,
+    kind: str,
+    language: str = "python",
+    module: str = None,
+    budget: int = None,
+) -> Tuple[str, str]:
+    """
+    Runs one refinement pass over an artifact with targeted edits.
+
+    The model is asked for a unified diff or, for python, replacement
+    definitions, which are applied locally, so its reply stays as small as
+    the change. When the edits do not apply, or the artifact alone does
+    not fit in `budget`, the artifact is regenerated in full with the
+    previous version as context.
+
+    Args:
+        llm (Any): The model.
+        previous (str): The current artifact.
+        code (str): The code the artifact documents or tests.
+        kind (str): What the artifact is, e.g. "documentation".
+        language (str, optional): "python" or "markdown". Defaults to "python".
+        module (str, optional): The module name used in the prompts.
+        budget (int, optional): Maximum prompt tokens. The code, and for
+            a full regeneration the previous version, are truncated to fit.
+
+    Returns:
+        Tuple[str, str]: The refined artifact and how it was produced:
+            "diff", "symbols", "unchanged" or "full".
+    """
+    values = dict(
+        budget=budget,
+        task=code,
+        previous=previous,
+        kind=kind,
+        language=language,
+        module=module,
+    )
+    prompt = REFINE_EDITS_TEMPLATE.build(**values)
+    with span("refine", kind=kind) as record:
+        record.extra["form"] = "full"
+        # Edits need the whole artifact in the prompt
+        if budget is not None and prompt.prompt_tokens > budget:
+            logger.warning(
+                f"The {kind} does not fit in {budget} prompt tokens,"
+                " regenerating it in full"
+            )
+        else:
+            response = llm(prompt.text)
+            count_call(record, prompt.text, response)
+            try:
+                refined, form = apply_edits(
+                    previous, response, language
+                )
+                record.extra["form"] = form
+                return refined, form
+            except PatchError as error:
+                logger.warning(
+                    f"Refinement edits to the {kind} did not apply"
+                    f" ({error}), regenerating it in full"
+                )
+                record.extra["patch_error"] = str(error)
+
+        prompt = REFINE_FULL_TEMPLATE.build(**_fit_previous(values))
+        response = llm(prompt.text)
+        count_call(record, prompt.text, response)
+    if language == "python":
+        response = extract_code_from_markdown(response)
+    return (response or previous), "full"
+
+
+def refine_loops(
+    llm: Any,
+    previous: str,
+    code: str,
+    loops: int,
+    kind: str,
+    language: str = "python",
+    module: str = None,
+    budget: int = None,
+) -> str:
+    """
+    Runs `refine_artifact` up to `loops` times, stopping early once the
+    model asks for no changes. The forms of the passes are recorded in the
+    running stage's `details["refinement"]`.
+
+    Args:
+        llm (Any): The model.
+        previous (str): The artifact of the first loop.
+        code (str): The code the artifact documents or tests, or the
+            generator response containing it.
+        loops (int): Refinement passes.
+        kind (str): What the artifact is, e.g. "documentation".
+        language (str, optional): "python" or "markdown". Defaults to "python".
+        module (str, optional): The module name used in the prompts.
+        budget (int, optional): Maximum prompt tokens.
+
+    Returns:
+        str: The refined artifact.
+    """
+    if "```" in code:
+        code = extract_code_from_markdown(code)
+    forms = []
+    for loop in range(loops):
+        previous, form = refine_artifact(
+            llm, previous, code, kind, language, module, budget
+        )
+        forms.append(form)
+        logger.info(
+            f"Refinement {loop + 1}/{loops} of the {kind}: {form}"
+        )
+        if form == "unchanged":
+            break
+    stage = current_stage()
+    if stage is not None:
+        stage.details.setdefault("refinement", {})[kind] = forms
+    return previous
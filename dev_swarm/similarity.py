@@ -0,0 +1,349 @@
+import hashlib
+import operator
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+# Odd 64-bit constant that spreads the 32-bit shingle hashes over 64 bits
+_MIX = 0x9E3779B97F4A7C15
+_MASK = (1 << 64) - 1
+
+
+def shingles(text: str, size: int = 2) -> set:
+    """
+    Returns the hashed words and word n-grams of a text, ignoring case,
+    punctuation and spacing.
+
+    Args:
+        text (str): The text.
+        size (int, optional): Longest n-gram. Defaults to 2.
+
+    Returns:
+        set: 32-bit hashes of the shingles.
+    """
+    words = _WORD_PATTERN.findall(text.lower())
+    return {
+        zlib.crc32(" ".join(words[start : start + length]).encode())
+        for length in range(1, size + 1)
+        for start in range(len(words) - length + 1)
+    }
+
+
+@dataclass
+class SimilarTask:
+    """
+    A stored task close to a looked-up one.
+
+    Attributes:
+        task (str): The stored task.
+        response (str): The generation stored with it.
+        similarity (float): Estimated Jaccard similarity of the two tasks.
+    """
+
+    task: str
+    response: str
+    similarity: float
+
+
+class SimilarTaskIndex:
+    """
+    Offline MinHash/LSH index of past tasks and their generations.
+
+    Each task is reduced to a MinHash signature of its word shingles,
+    computed with one-permutation hashing so that its cost grows with the
+    task length rather than with length times signature size, and the
+    signature is split into `bands` bands of equal width. Tasks that
+    share a band land in the same bucket, so a lookup only compares the
+    signatures of the tasks in its buckets, which keeps it well under a
+    millisecond at 100k+ entries. Entries are evicted least-recently-used
+    first beyond `max_entries`, and are persisted in sqlite so the index
+    survives restarts. With a database, only the signatures and tasks are
+    held in memory and a hit reads its response from sqlite; without one,
+    responses are kept in memory too. Lookups never write: their access
+    times are kept in memory and written with the next `add`, `flush` or
+    `close`, so a crash can only lose recency, not entries.
+
+    Args:
+        path (str, optional): Location of the sqlite database; None keeps
+            the index in memory. Defaults to "dev_swarm_cache/tasks.sqlite".
+        max_entries (int, optional): Maximum number of tasks. Defaults to 100,000.
+        permutations (int, optional): MinHash signature length. Defaults to 64.
+        bands (int, optional): LSH bands; must divide `permutations`. More
+            bands find less similar tasks. Defaults to 16.
+
+    Raises:
+        ValueError: If `bands` does not divide `permutations`.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = os.path.join(
+            "dev_swarm_cache", "tasks.sqlite"
+        ),
+        max_entries: int = 100_000,
+        permutations: int = 64,
+        bands: int = 16,
+    ):
+        if permutations % bands:
+            raise ValueError("bands must divide permutations")
+        self.path = path
+        self.max_entries = max_entries
+        self.permutations = permutations
+        self.bands = bands
+        self.rows = permutations // bands
+        # Signature, task and, without a database, response
+        self._entries: (
+            "OrderedDict[str, Tuple[array, str, Optional[str]]]"
+        ) = OrderedDict()
+        self._buckets: List[Dict[tuple, set]] = [
+            {} for _ in range(bands)
+        ]
+        # Access times of lookup hits not written to sqlite yet
+        self._touched: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._db = None
+        if path is not None:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS tasks ("
+                " key TEXT PRIMARY KEY,"
+                " task TEXT NOT NULL,"
+                " response TEXT NOT NULL,"
+                " signature BLOB NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            self._db.commit()
+            self._load()
+
+    def _load(self) -> None:
+        rows = self._db.execute(
+            "SELECT key, task, signature FROM tasks"
+            " ORDER BY accessed_at"
+        )
+        for key, task, blob in rows:
+            signature = array("Q")
+            signature.frombytes(blob)
+            if len(signature) != self.permutations:
+                continue
+            self._insert(key, signature, task, None)
+        self._evict()
+
+    def signature(self, text: str) -> array:
+        """
+        Computes the MinHash signature of a text.
+
+        Args:
+            text (str): The text.
+
+        Returns:
+            array: One minimum per permutation.
+        """
+        size = self.permutations
+        empty = _MASK
+        bins = [empty] * size
+        for value in shingles(text) or {0}:
+            value = (value * _MIX) & _MASK
+            index = value % size
+            value //= size
+            if value < bins[index]:
+                bins[index] = value
+        # Fill each empty bin from the next filled one, offset by the
+        # distance, so short texts still get comparable signatures
+        following = size + next(
+            index for index in range(size) if bins[index] != empty
+        )
+        for index in reversed(range(size)):
+            if bins[index] != empty:
+                following = index
+            else:
+                bins[index] = (
+                    bins[following % size]
+                    + (following - index) * size
+                ) & _MASK
+        return array("Q", bins)
+
+    def _band_keys(self, signature: array) -> List[tuple]:
+        # Strided bands: neighbouring bins, which densification may fill
+        # from the same value, end up in different bands
+        return [
+            tuple(signature[band :: self.bands])
+            for band in range(self.bands)
+        ]
+
+    def _insert(
+        self,
+        key: str,
+        signature: array,
+        task: str,
+        response: Optional[str],
+    ) -> None:
+        self._entries[key] = (signature, task, response)
+        self._entries.move_to_end(key)
+        for buckets, band in zip(
+            self._buckets, self._band_keys(signature)
+        ):
+            buckets.setdefault(band, set()).add(key)
+
+    def _remove(self, key: str) -> None:
+        signature = self._entries.pop(key)[0]
+        self._touched.pop(key, None)
+        for buckets, band in zip(
+            self._buckets, self._band_keys(signature)
+        ):
+            bucket = buckets.get(band)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del buckets[band]
+
+    def _evict(self) -> List[str]:
+        stale = []
+        while len(self._entries) > self.max_entries:
+            key = next(iter(self._entries))
+            self._remove(key)
+            stale.append(key)
+        self.evictions += len(stale)
+        return stale
+
+    def add(self, task: str, response: str) -> None:
+        """
+        Stores a task and its generation, replacing an identical task.
+
+        Args:
+            task (str): The task text.
+            response (str): The generation to store with it.
+        """
+        key = hashlib.sha256(task.encode("utf-8")).hexdigest()
+        signature = self.signature(task)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._insert(
+                key,
+                signature,
+                task,
+                response if self._db is None else None,
+            )
+            stale = self._evict()
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO tasks"
+                    " (key, task, response, signature, accessed_at)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (
+                        key,
+                        task,
+                        response,
+                        signature.tobytes(),
+                        time.time(),
+                    ),
+                )
+                self._db.executemany(
+                    "DELETE FROM tasks WHERE key = ?",
+                    [(key,) for key in stale],
+                )
+                self._write_touched()
+                self._db.commit()
+
+    def lookup(
+        self, task: str, threshold: float = 0.5
+    ) -> Optional[SimilarTask]:
+        """
+        Finds the stored task most similar to `task`.
+
+        Args:
+            task (str): The task text.
+            threshold (float, optional): Minimum estimated Jaccard
+                similarity. Defaults to 0.5.
+
+        Returns:
+            Optional[SimilarTask]: The best match, or None if no stored
+                task is similar enough.
+        """
+        signature = self.signature(task)
+        with self._lock:
+            candidates = set()
+            for buckets, band in zip(
+                self._buckets, self._band_keys(signature)
+            ):
+                candidates.update(buckets.get(band, ()))
+
+            best, best_similarity = None, threshold
+            for key in candidates:
+                stored = self._entries[key][0]
+                matches = sum(map(operator.eq, signature, stored))
+                similarity = matches / self.permutations
+                if similarity >= best_similarity:
+                    best, best_similarity = key, similarity
+
+            if best is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(best)
+            self._touched[best] = time.time()
+            _, stored_task, response = self._entries[best]
+            if response is None:
+                (response,) = self._db.execute(
+                    "SELECT response FROM tasks WHERE key = ?",
+                    (best,),
+                ).fetchone()
+        return SimilarTask(stored_task, response, best_similarity)
+
+    def _write_touched(self) -> None:
+        self._db.executemany(
+            "UPDATE tasks SET accessed_at = ? WHERE key = ?",
+            [(at, key) for key, at in self._touched.items()],
+        )
+        self._touched.clear()
+
+    def flush(self) -> None:
+        """Writes the access times of recent lookups to the database."""
+        with self._lock:
+            if self._db is not None and self._touched:
+                self._write_touched()
+                self._db.commit()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns lookup counters and the size of the index.
+
+        Returns:
+            Dict[str, Any]: hits, misses, hit_rate, evictions and entries.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+        }
+
+    def close(self) -> None:
+        """Writes the pending access times and closes the database."""
+        self.flush()
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
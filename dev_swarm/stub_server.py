@@ -0,0 +1,187 @@
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+from dev_swarm.fake_llm import FakeLLM
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # Keep-alive, so clients can reuse their connections
+    protocol_version = "HTTP/1.1"
+
+    def setup(self) -> None:
+        super().setup()
+        self.server.owner._count("connections")
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _send_json(self, status: int, payload: Any) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+
+    def do_GET(self) -> None:
+        if self.path.rstrip("/").endswith("/models"):
+            model = self.server.owner.model
+            self._send_json(
+                200,
+                {
+                    "object": "list",
+                    "data": [
+                        {
+                            "id": getattr(
+                                model, "model_name", "stub"
+                            ),
+                            "object": "model",
+                        }
+                    ],
+                },
+            )
+        else:
+            self._send_json(404, {"error": {"message": "Not found"}})
+
+    def do_POST(self) -> None:
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "Not found"}})
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            request = json.loads(self.rfile.read(length))
+            prompt = request["messages"][-1]["content"]
+        except (ValueError, KeyError, IndexError):
+            self._send_json(
+                400, {"error": {"message": "Invalid request"}}
+            )
+            return
+        self.server.owner._count("requests")
+        model = self.server.owner.model
+
+        if not request.get("stream"):
+            self._send_json(
+                200,
+                {
+                    "object": "chat.completion",
+                    "model": request.get("model"),
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {
+                                "role": "assistant",
+                                "content": model(prompt),
+                            },
+                            "finish_reason": "stop",
+                        }
+                    ],
+                },
+            )
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for piece in model.stream(prompt):
+            event = {
+                "object": "chat.completion.chunk",
+                "choices": [
+                    {"index": 0, "delta": {"content": piece}}
+                ],
+            }
+            self._write_chunk(
+                f"data: {json.dumps(event)}\n\n".encode("utf-8")
+            )
+            self.wfile.flush()
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request: Any, client_address: Any) -> None:
+        # Clients that stop reading a stream close the connection
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class StubServer:
+    """
+    Local OpenAI-compatible chat completion server for tests and
+    benchmarks.
+
+    Answers `POST <url>/chat/completions`, streaming or not, from `model`
+    on a background thread, and counts accepted connections and requests
+    so callers can check that connections are reused. Use it as a context
+    manager, or call `start` and `stop`.
+
+    Args:
+        model (Any, optional): Callable with a `stream` method that produces
+            the completions. Defaults to a `FakeLLM`.
+        host (str, optional): Interface to bind. Defaults to "127.0.0.1".
+        port (int, optional): Port to bind; 0 picks a free one. Defaults to 0.
+    """
+
+    def __init__(
+        self,
+        model: Any = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.model = model if model is not None else FakeLLM()
+        self.host = host
+        self.port = port
+        self.connections = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    @property
+    def url(self) -> str:
+        """Base URL to pass to `ChatBackend`."""
+        return f"http://{self.host}:{self.port}/v1"
+
+    def start(self) -> "StubServer":
+        """
+        Starts serving on a daemon thread.
+
+        Returns:
+            StubServer: The server.
+        """
+        self._server = _Server((self.host, self.port), _Handler)
+        self._server.owner = self
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            name="dev-swarm-stub-server",
+            daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stops the server and waits for its thread."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
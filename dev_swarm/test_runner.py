@@ -0,0 +1,308 @@
+import ast
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Sequence
+
+from loguru import logger
+
+TEST_FILE_NAME = "test_generated.py"
+
+# Runs inside every sandboxed subprocess: apply the resource limits, then
+# hand over to pytest. Doing this in the child avoids preexec_fn, which is
+# unsafe in a threaded parent.
+_BOOTSTRAP = """
+import resource, sys
+memory, cpu, file_size = (int(value) for value in sys.argv[1:4])
+if memory:
+    resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+if cpu:
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu))
+if file_size:
+    resource.setrlimit(resource.RLIMIT_FSIZE, (file_size, file_size))
+import pytest
+sys.exit(pytest.main(sys.argv[4:]))
+"""
+
+# pytest exit codes
+_STATUSES = {0: "passed", 1: "failed", 5: "no_tests"}
+
+
+@dataclass
+class TestOutcome:
+    """
+    Result of one sandboxed test.
+
+    Attributes:
+        test_id (str): The pytest node id.
+        status (str): "passed", "failed", "error", "timeout" or "no_tests".
+        duration (float): Wall-clock duration in seconds.
+        output (str): The tail of the pytest output for tests that did not pass.
+    """
+
+    __test__ = False
+
+    test_id: str
+    status: str
+    duration: float
+    output: str = ""
+
+
+@dataclass
+class TestReport:
+    """
+    Results of a sandboxed run of a generated test file.
+
+    Attributes:
+        outcomes (List[TestOutcome]): One outcome per test, in collection order.
+        duration (float): Wall-clock duration of the whole run in seconds.
+    """
+
+    __test__ = False
+
+    outcomes: List[TestOutcome] = field(default_factory=list)
+    duration: float = 0.0
+
+    @property
+    def passed(self) -> int:
+        """Number of passing tests."""
+        return sum(
+            outcome.status == "passed" for outcome in self.outcomes
+        )
+
+    @property
+    def failures(self) -> List[TestOutcome]:
+        """Every test that did not pass."""
+        return [
+            outcome
+            for outcome in self.outcomes
+            if outcome.status != "passed"
+        ]
+
+    @property
+    def ok(self) -> bool:
+        """Whether at least one test ran and every test passed."""
+        return bool(self.outcomes) and not self.failures
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the report as JSON-serializable data."""
+        return {
+            "passed": self.passed,
+            "failed": len(self.failures),
+            "duration": self.duration,
+            "outcomes": [
+                asdict(outcome) for outcome in self.outcomes
+            ],
+        }
+
+
+def collect_test_ids(
+    tests: str, file_name: str = TEST_FILE_NAME
+) -> List[str]:
+    """
+    Lists the pytest node ids of a test file without importing it.
+
+    Args:
+        tests (str): The test file source.
+        file_name (str, optional): The test file name used in the ids.
+
+    Returns:
+        List[str]: Node ids of top-level `test_*` functions and of the
+            `test_*` methods of `Test*` classes. Empty if the file does not parse.
+    """
+    try:
+        tree = ast.parse(tests)
+    except SyntaxError:
+        return []
+
+    functions = (ast.FunctionDef, ast.AsyncFunctionDef)
+    test_ids = []
+    for node in tree.body:
+        if isinstance(node, functions) and node.name.startswith(
+            "test"
+        ):
+            test_ids.append(f"{file_name}::{node.name}")
+        elif isinstance(node, ast.ClassDef) and node.name.startswith(
+            "Test"
+        ):
+            test_ids.extend(
+                f"{file_name}::{node.name}::{child.name}"
+                for child in node.body
+                if isinstance(child, functions)
+                and child.name.startswith("test")
+            )
+    return test_ids
+
+
+class SandboxedTestRunner:
+    """
+    Runs a generated test file against generated code in isolated,
+    resource-limited subprocesses.
+
+    Every test gets its own temporary directory holding a copy of the code
+    and the tests, and its own `python -m pytest` process in a new session,
+    so tests cannot interfere with each other or with the caller. Up to
+    `max_workers` tests run at the same time. Nothing requires network
+    access.
+
+    Args:
+        max_workers (int, optional): Concurrent test processes. Defaults to the CPU count.
+        timeout (float, optional): Seconds before a test process is killed. Defaults to 60.
+        memory_limit_mb (int, optional): Address-space limit per process. Defaults to 1024.
+        cpu_time_limit (int, optional): CPU seconds per process. Defaults to 60.
+        file_size_limit_mb (int, optional): Largest file a test may write. Defaults to 64.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = None,
+        timeout: float = 60,
+        memory_limit_mb: int = 1024,
+        cpu_time_limit: int = 60,
+        file_size_limit_mb: int = 64,
+    ):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.limits = [
+            str(
+                memory_limit_mb * 1024 * 1024
+                if memory_limit_mb
+                else 0
+            ),
+            str(cpu_time_limit or 0),
+            str(
+                file_size_limit_mb * 1024 * 1024
+                if file_size_limit_mb
+                else 0
+            ),
+        ]
+
+    def run(
+        self,
+        code: str,
+        tests: str,
+        module_names: Sequence[str] = ("main",),
+    ) -> TestReport:
+        """
+        Runs every test of `tests` against `code`.
+
+        Args:
+            code (str): The code under test.
+            tests (str): The pytest file.
+            module_names (Sequence[str], optional): Module names the code is
+                importable as. Defaults to ("main",).
+
+        Returns:
+            TestReport: One outcome per test.
+        """
+        started = time.perf_counter()
+        template = tempfile.mkdtemp(prefix="dev_swarm_tests_")
+        try:
+            files = {f"{name}.py": code for name in module_names}
+            files[TEST_FILE_NAME] = tests
+            for file_name, content in files.items():
+                path = os.path.join(template, file_name)
+                with open(path, "w") as file:
+                    file.write(content)
+
+            # Collection errors surface as a single failing run of the file
+            test_ids = collect_test_ids(tests) or [TEST_FILE_NAME]
+            with ThreadPoolExecutor(
+                max_workers=self.max_workers
+            ) as pool:
+                outcomes = list(
+                    pool.map(
+                        lambda test_id: self._run_one(
+                            template, test_id
+                        ),
+                        test_ids,
+                    )
+                )
+        finally:
+            shutil.rmtree(template, ignore_errors=True)
+
+        report = TestReport(
+            outcomes=outcomes, duration=time.perf_counter() - started
+        )
+        logger.info(
+            f"Generated tests: {report.passed}/{len(outcomes)} passed"
+            f" in {report.duration:.2f}s"
+        )
+        return report
+
+    def _run_one(self, template: str, test_id: str) -> TestOutcome:
+        sandbox = tempfile.mkdtemp(prefix="dev_swarm_test_")
+        try:
+            shutil.copytree(template, sandbox, dirs_exist_ok=True)
+            command = [
+                sys.executable,
+                "-c",
+                _BOOTSTRAP,
+                *self.limits,
+                "-q",
+                "-p",
+                "no:cacheprovider",
+                test_id,
+            ]
+            env = {
+                "PATH": os.environ.get("PATH", ""),
+                "PYTHONPATH": sandbox,
+                "PYTHONDONTWRITEBYTECODE": "1",
+            }
+            began = time.perf_counter()
+            process = subprocess.Popen(
+                command,
+                cwd=sandbox,
+                env=env,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                start_new_session=True,
+            )
+            try:
+                output, _ = process.communicate(timeout=self.timeout)
+                status = _STATUSES.get(process.returncode, "error")
+            except subprocess.TimeoutExpired:
+                os.killpg(process.pid, signal.SIGKILL)
+                output, _ = process.communicate()
+                status = "timeout"
+            duration = time.perf_counter() - began
+        finally:
+            shutil.rmtree(sandbox, ignore_errors=True)
+
+        return TestOutcome(
+            test_id=test_id,
+            status=status,
+            duration=duration,
+            output="" if status == "passed" else output[-4000:],
+        )
+
+
+def run_tests(
+    code: str,
+    tests: str,
+    module_names: Sequence[str] = ("main",),
+    **runner_kwargs,
+) -> TestReport:
+    """
+    Runs generated tests against generated code in sandboxed subprocesses.
+
+    Args:
+        code (str): The code under test.
+        tests (str): The pytest file.
+        module_names (Sequence[str], optional): Module names the code is
+            importable as. Defaults to ("main",).
+        **runner_kwargs: Arguments forwarded to `SandboxedTestRunner`.
+
+    Returns:
+        TestReport: One outcome per test.
+    """
+    return SandboxedTestRunner(**runner_kwargs).run(
+        code, tests, module_names
+    )
@@ -1,35 +1,17 @@
-import os
-import re
-from dotenv import load_dotenv
 from loguru import logger
 from swarms import Agent
-from dev_swarm.documentor_agent import model
-from dev_swarm.prompts import TEST_WRITER_SOP_PROMPT
-from dev_swarm.utils import create_file
-
-load_dotenv()
-# Ensure the log directory exists
-log_directory = "dev_swarm_logs"
-os.makedirs(log_directory, exist_ok=True)
-
-logger.add(
-    os.path.join(log_directory, "tester_agent.log"), rotation="1 MB"
+from dev_swarm.artifacts import ArtifactStore, get_store
+from dev_swarm.journal import StateJournal
+from dev_swarm.llm import get_model
+from dev_swarm.log import add_log_sink
+from dev_swarm.markdown import extract_code_from_markdown
+from dev_swarm.metrics import count_call, span
+from dev_swarm.prompts import (
+    TEST_REPAIR_TEMPLATE,
+    TEST_WRITER_TEMPLATE,
 )
-
-
-def extract_code_from_markdown(markdown_content: str):
-    """
-    Extracts code blocks from a Markdown string and returns them as a single string.
-
-    Args:
-    - markdown_content (str): The Markdown content as a string.
-
-    Returns:
-    - str: A single string containing all the code blocks separated by newlines.
-    """
-    pattern = r"```(?:\w+\n)?(.*?)```"
-    matches = re.findall(pattern, markdown_content, re.DOTALL)
-    return "\n".join(code.strip() for code in matches)
+from dev_swarm.refine import refine_loops
+from dev_swarm.test_runner import TestReport
 
 
 class TesterAgent(Agent):
@@ -39,20 +21,27 @@ class TesterAgent(Agent):
     Args:
         items (List[Any]): A list of items to be tested.
         agent_name (str, optional): The name of the tester agent. Defaults to "TesterAgent".
-        llm (model, optional): The language model to be used. Defaults to model.
+        llm (model, optional): The language model to be used. Defaults to the shared registry model.
         max_loops (int, optional): The maximum number of loops. Defaults to 1.
         module (str, optional): The module to be used. Defaults to "tests/memory".
         tests_folder_path (str, optional): The folder path for storing the tests. Defaults to "tests/memory".
+        prompt_token_budget (int, optional): Maximum prompt tokens; the code to test is truncated to fit. Defaults to the agent's context_length.
+        artifact_store (ArtifactStore, optional): Where the tests are written. Defaults to the store of tests_folder_path.
+        refinement (str, optional): "delta" makes the loops after the first ask for targeted edits to the tests instead of rewriting them. Defaults to None.
+        journal (StateJournal, optional): Journal the conversation turns are appended to. Defaults to None.
 
     Attributes:
         items (List[Any]): A list of items to be tested.
         module (str): The module to be used.
         agent_name (str): The name of the tester agent.
-        max_loops (int): The maximum number of loops.
+        max_loops (int): The maximum number of loops run by the agent itself; 1 with delta refinement.
+        refine_loops (int): Loops requested, the first included, when refinement is "delta".
         tests_folder_path (str): The folder path for storing the tests.
 
     Methods:
         run(task: str, *args, **kwargs): Runs the tester agent for the specified task.
+        repair(code: str, tests: str, report: TestReport): Rewrites the tests that failed when run.
+        refine(task: str, tests: str): Improves the tests with targeted edits over the remaining loops.
         fetch_docs(item): Fetches the documentation and source code for the specified item.
         create_file(item, content: str = None): Creates a test file for the specified item.
 
@@ -61,25 +50,42 @@ class TesterAgent(Agent):
     def __init__(
         self,
         agent_name: str = "TesterAgent",
-        llm=model,
+        llm=None,
         max_loops: int = 1,
         module: str = "tests/memory",
         tests_folder_path: str = "tests/memory",
+        prompt_token_budget: int = None,
+        artifact_store: ArtifactStore = None,
+        refinement: str = None,
+        journal: StateJournal = None,
         *args,
         **kwargs,
     ):
+        add_log_sink("tester_agent")
         super(TesterAgent, self).__init__(
             agent_name=agent_name,
-            llm=model,
-            max_loops=max_loops,
+            llm=llm if llm is not None else get_model(),
+            # Delta refinement runs the later loops itself
+            max_loops=1 if refinement == "delta" else max_loops,
             streaming_on=True,
             *args,
             **kwargs,
         )
         self.module = module
         self.agent_name = agent_name
-        self.max_loops = max_loops
+        # The loops Agent.run performs; with delta refinement the others
+        # are refinement passes
+        self.max_loops = 1 if refinement == "delta" else max_loops
+        self.refinement = refinement
+        self.refine_loops = max_loops
+        self.journal = journal
         self.tests_folder_path = tests_folder_path
+        self.prompt_token_budget = prompt_token_budget or getattr(
+            self, "context_length", None
+        )
+        self.artifact_store = artifact_store or get_store(
+            tests_folder_path or module or "."
+        )
 
     def run(self, task: str, *args, **kwargs):
         """
@@ -91,16 +97,109 @@ class TesterAgent(Agent):
             **kwargs: Arbitrary keyword arguments.
 
         """
-        response = super().run(
-            TEST_WRITER_SOP_PROMPT(task, self.module, *args, **kwargs)
+        prompt = TEST_WRITER_TEMPLATE.build(
+            budget=self.prompt_token_budget,
+            task=task,
+            module=self.module,
+            path=self.tests_folder_path,
+        )
+        logger.info(
+            f"Test prompt: {prompt.prompt_tokens} tokens,"
+            f" {prompt.prefix_tokens} in the static prefix"
+        )
+        with span("test") as record:
+            response = super().run(prompt.text, *args, **kwargs)
+            count_call(record, prompt.text, response)
+        with span("extract"):
+            processed_content = extract_code_from_markdown(response)
+        if self.refinement == "delta":
+            processed_content = self.refine(task, processed_content)
+        self._record_turns(task, processed_content)
+        with span("write", artifact="tests"):
+            artifact = self.artifact_store.write(
+                "tests", f"{processed_content}\n"
+            )
+        logger.info(
+            f"Tests at {artifact.path}"
+            f" ({'updated' if artifact.changed else 'unchanged'})"
         )
-        processed_content = extract_code_from_markdown(response)
-        test_content = f"{processed_content}\n"
-        file_path = create_file(self.module, test_content, ".py")
-        logger.info(f"Test created for item: at {file_path}")
 
         return processed_content
 
+    def refine(self, task: str, tests: str) -> str:
+        """
+        Improves the tests over the remaining `refine_loops - 1` loops. Each
+        loop asks for a diff or replacement test functions, which are
+        applied locally, and regenerates the tests in full when they do
+        not apply.
+
+        Args:
+            task (str): The code under test, or the response containing it.
+            tests (str): The tests of the first loop.
+
+        Returns:
+            str: The refined tests.
+        """
+        return refine_loops(
+            self.llm,
+            tests,
+            task,
+            self.refine_loops - 1,
+            "TESTS",
+            "python",
+            module=self.module,
+            budget=self.prompt_token_budget,
+        )
+
+    def repair(
+        self, code: str, tests: str, report: TestReport
+    ) -> str:
+        """
+        Asks the model to fix the generated tests that failed when run.
+
+        Args:
+            code (str): The code under test.
+            tests (str): The generated test file.
+            report (TestReport): The sandboxed run of `tests`.
+
+        Returns:
+            str: The corrected test file.
+        """
+        failures = "\n\n".join(
+            f"{outcome.test_id} ({outcome.status}):\n{outcome.output}"
+            for outcome in report.failures
+        )
+        prompt = TEST_REPAIR_TEMPLATE.build(
+            budget=self.prompt_token_budget,
+            task=tests,
+            module=self.module,
+            code=code,
+            failures=failures,
+        )
+        logger.info(
+            f"Repairing {len(report.failures)} failing generated tests"
+        )
+        with span("repair") as record:
+            response = self.llm(prompt.text)
+            count_call(record, prompt.text, response)
+        processed_content = extract_code_from_markdown(response)
+        self._record_turns(failures, response)
+        if not processed_content:
+            return tests
+
+        with span("write", artifact="tests"):
+            artifact = self.artifact_store.write(
+                "tests", f"{processed_content}\n"
+            )
+        logger.info(f"Repaired tests written at {artifact.path}")
+        return processed_content
+
+    def _record_turns(self, task: str, response: str) -> None:
+        if self.journal is not None:
+            self.journal.record_exchange(
+                self.agent_name, task, response
+            )
+
 
 # def main(module: str = "tests/memory"):
 #     items = [
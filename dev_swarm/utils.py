@@ -1,4 +1,39 @@
 import os
+import tempfile
+
+
+def atomic_write(file_path: str, content: str) -> str:
+    """
+    Writes a file by renaming a fully written temporary file over it.
+
+    Readers never observe a partially written file, and concurrent writers
+    to the same path cannot interleave their content.
+
+    Args:
+        file_path (str): The destination path.
+        content (str): The content to write.
+
+    Returns:
+        str: The destination path.
+    """
+    directory = os.path.dirname(file_path) or "."
+    os.makedirs(directory, exist_ok=True)
+    descriptor, temporary_path = tempfile.mkstemp(
+        dir=directory,
+        prefix=".tmp-",
+        suffix=os.path.basename(file_path),
+    )
+    try:
+        with os.fdopen(descriptor, "w") as file:
+            file.write(content)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, file_path)
+    except BaseException:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+    return file_path
 
 
 def create_file(
@@ -10,15 +45,20 @@ def create_file(
     Creates a documentation file for the given item.
 
     Args:
-        item: The item to create the documentation file for.
+        module_path (str): The folder to create the file in.
         content (str, optional): The content to be written in the file. Defaults to None.
+        file_extension (str, optional): Either a file name such as "main.py", or an
+            extension such as ".md", in which case the file is named after the folder.
 
     Returns:
         str: The file path of the created documentation file.
 
     """
-    os.makedirs(module_path, exist_ok=True)
-    file_path = os.path.join(module_path, file_extension)
-    with open(file_path, "w") as file:
-        file.write(content)
-    return file_path
+    if "." in file_extension.lstrip("."):
+        file_name = file_extension
+    else:
+        name = os.path.basename(os.path.normpath(module_path))
+        file_name = f"{name}.{file_extension.lstrip('.')}"
+    return atomic_write(
+        os.path.join(module_path, file_name), content or ""
+    )
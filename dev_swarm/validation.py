@@ -0,0 +1,211 @@
+import ast
+import functools
+import importlib.util
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List
+
+from loguru import logger
+
+from dev_swarm.chunking import DEFINITIONS, signature
+
+
+@dataclass
+class ValidationResult:
+    """
+    Result of the local checks of a piece of generated code.
+
+    Attributes:
+        errors (List[str]): Problems found; empty when the code passed.
+        check (str): The check that failed: "empty", "syntax", "symbols",
+            "imports" or "lint"; "" when the code passed.
+        duration (float): Time spent validating in seconds.
+    """
+
+    errors: List[str] = field(default_factory=list)
+    check: str = ""
+    duration: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        """Whether every check passed."""
+        return not self.errors
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the result as JSON-serializable data."""
+        data = asdict(self)
+        data["ok"] = self.ok
+        return data
+
+
+class InvalidCodeError(ValueError):
+    """
+    Raised when generated code fails validation.
+
+    Args:
+        result (ValidationResult): The failed validation.
+    """
+
+    def __init__(self, result: ValidationResult):
+        super().__init__(
+            f"Generated code failed the {result.check} check:"
+            f" {'; '.join(result.errors)}"
+        )
+        self.result = result
+
+
+@functools.lru_cache(maxsize=1024)
+def module_exists(name: str) -> bool:
+    """
+    Tells whether a top-level module can be imported, without importing it.
+
+    Args:
+        name (str): The module name, e.g. "numpy".
+
+    Returns:
+        bool: Whether the module was found.
+    """
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def missing_imports(tree: ast.AST) -> List[str]:
+    """
+    Lists the absolute imports of a module that cannot be resolved.
+
+    Args:
+        tree (ast.AST): The parsed module.
+
+    Returns:
+        List[str]: Top-level names of the missing modules, in order.
+    """
+    names = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and not node.level:
+            names.append(node.module)
+    missing = []
+    for name in names:
+        root = name.partition(".")[0]
+        if root not in missing and not module_exists(root):
+            missing.append(root)
+    return missing
+
+
+def lint(code: str, timeout: float = 10) -> List[str]:
+    """
+    Runs pyflakes on the code in a subprocess.
+
+    Args:
+        code (str): The code.
+        timeout (float, optional): Seconds before giving up. Defaults to 10.
+
+    Returns:
+        List[str]: The reported problems; empty when pyflakes is not
+            installed.
+    """
+    if not module_exists("pyflakes"):
+        logger.debug("pyflakes is not installed, skipping lint")
+        return []
+    try:
+        completed = subprocess.run(
+            [sys.executable, "-m", "pyflakes"],
+            input=code,
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+        )
+    except subprocess.TimeoutExpired:
+        return [f"pyflakes timed out after {timeout}s"]
+    return [
+        line.partition(":")[2].strip()
+        for line in completed.stdout.splitlines()
+        if line.strip()
+    ]
+
+
+def validate_code(
+    code: str,
+    check_imports: bool = True,
+    run_lint: bool = False,
+    require_symbols: bool = False,
+) -> ValidationResult:
+    """
+    Checks generated code without running it: it must be non-empty and
+    compile, and optionally define a top-level function or class, resolve
+    its imports and pass pyflakes. Checks stop at the first failing one.
+
+    Args:
+        code (str): The extracted code.
+        check_imports (bool, optional): Resolve the absolute imports. Defaults to True.
+        run_lint (bool, optional): Run pyflakes when installed. Defaults to False.
+        require_symbols (bool, optional): Require a top-level function or
+            class. Defaults to False.
+
+    Returns:
+        ValidationResult: The outcome.
+    """
+    began = time.perf_counter()
+    result = ValidationResult()
+    if not code.strip():
+        result.errors.append("No code was extracted")
+        result.check = "empty"
+    else:
+        try:
+            tree = ast.parse(code)
+            compile(tree, "<generated>", "exec")
+        except (SyntaxError, ValueError) as error:
+            result.errors.append(f"{type(error).__name__}: {error}")
+            result.check = "syntax"
+        else:
+            missing = missing_imports(tree) if check_imports else []
+            if require_symbols and not any(
+                isinstance(node, DEFINITIONS) for node in tree.body
+            ):
+                result.errors.append(
+                    "The code defines no function or class"
+                )
+                result.check = "symbols"
+            elif missing:
+                result.errors.extend(
+                    f"Cannot import {name}" for name in missing
+                )
+                result.check = "imports"
+            elif run_lint:
+                result.errors.extend(lint(code))
+                if result.errors:
+                    result.check = "lint"
+    result.duration = time.perf_counter() - began
+    return result
+
+
+def symbol_summary(code: str) -> str:
+    """
+    Renders the top-level functions and classes of a module as stubs with
+    their signatures and docstrings, and the public methods of classes,
+    without the implementations.
+
+    Args:
+        code (str): The module source.
+
+    Returns:
+        str: The stubs; the code itself if it does not parse.
+    """
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError):
+        return code
+    lines = []
+    for node in tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            lines.append(ast.unparse(node))
+        elif isinstance(node, DEFINITIONS):
+            if lines:
+                lines.append("")
+            lines.append(signature(node, summary=True))
+    return "\n".join(lines)
@@ -0,0 +1,152 @@
+import json
+import os
+
+import pytest
+
+from dev_swarm import utils
+from dev_swarm.artifacts import (
+    MANIFEST_NAME,
+    ArtifactStore,
+    artifact_scope,
+    task_id_for,
+)
+from dev_swarm.utils import atomic_write, create_file
+
+
+def test_tasks_get_their_own_directories(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    first = task_id_for("Add two numbers")
+    second = task_id_for("Sort a list")
+    assert first.startswith("add-two-numbers-")
+    assert first != task_id_for("Add two numbers!")
+
+    with artifact_scope(first):
+        store.write("code", "def add(a, b): ...\n")
+    store.write("code", "def sort(items): ...\n", task_id=second)
+
+    code = tmp_path / first / "main.py"
+    assert code.read_text() == "def add(a, b): ...\n"
+    code = tmp_path / second / "main.py"
+    assert code.read_text() == "def sort(items): ...\n"
+    # Without a scope, artifacts go to the root
+    assert store.path("docs") == str(tmp_path / "docs.md")
+
+
+def test_manifest_records_hashes_and_skips_unchanged_writes(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    result = store.write("docs", "# Docs\n", task_id="task")
+    assert result.changed
+
+    manifest = json.loads(
+        (tmp_path / "task" / MANIFEST_NAME).read_text()
+    )
+    assert manifest["docs.md"]["sha256"] == result.sha256
+    assert manifest["docs.md"]["size"] == len("# Docs\n")
+
+    modified = os.stat(result.path).st_mtime_ns
+    again = store.write("docs", "# Docs\n", task_id="task")
+    assert not again.changed
+    assert os.stat(result.path).st_mtime_ns == modified
+
+    # A fresh store reads the manifest written by the first one
+    fresh = ArtifactStore(str(tmp_path))
+    assert fresh.read_manifest("task") == manifest
+    assert not fresh.write("docs", "# Docs\n", task_id="task").changed
+    assert fresh.write("docs", "# New\n", task_id="task").changed
+
+
+def test_lookup_returns_content_built_from_the_fingerprint(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    # Nothing to record before the artifact exists
+    store.record_fingerprint("tests", "inputs-1", task_id="task")
+    assert store.lookup("tests", "inputs-1", task_id="task") is None
+
+    store.write("tests", "def test_a(): ...\n", task_id="task")
+    assert store.lookup("tests", "inputs-1", task_id="task") is None
+    store.record_fingerprint("tests", "inputs-1", task_id="task")
+    assert (
+        store.lookup("tests", "inputs-1", task_id="task")
+        == "def test_a(): ...\n"
+    )
+    assert store.lookup("tests", "inputs-2", task_id="task") is None
+
+    # The fingerprint survives a restart
+    fresh = ArtifactStore(str(tmp_path))
+    assert fresh.lookup("tests", "inputs-1", task_id="task")
+
+    # A file edited since it was written is rebuilt
+    (tmp_path / "task" / "test_main.py").write_text("edited\n")
+    assert fresh.lookup("tests", "inputs-1", task_id="task") is None
+
+
+def test_write_many_saves_each_manifest(tmp_path):
+    store = ArtifactStore(str(tmp_path), max_workers=3)
+    artifacts = [
+        (stage, f"{stage} of {task}\n", task)
+        for task in ("a", "b")
+        for stage in ("code", "docs", "tests")
+    ]
+    try:
+        results = store.write_many(artifacts)
+        assert [result.path for result in results] == [
+            store.path(stage, task) for stage, _, task in artifacts
+        ]
+        assert all(result.changed for result in results)
+        for task in ("a", "b"):
+            manifest = json.loads(
+                (tmp_path / task / MANIFEST_NAME).read_text()
+            )
+            assert set(manifest) == {
+                "main.py",
+                "docs.md",
+                "test_main.py",
+            }
+
+        assert not any(
+            result.changed for result in store.write_many(artifacts)
+        )
+        future = store.write_async("code", "changed\n", "a")
+        assert future.result().changed
+    finally:
+        store.close()
+    assert (tmp_path / "a" / "main.py").read_text() == "changed\n"
+
+
+def test_create_file_names(tmp_path):
+    folder = tmp_path / "adder"
+    path = create_file(str(folder), "# Adder\n", ".md")
+    assert path == str(folder / "adder.md")
+    assert (folder / "adder.md").read_text() == "# Adder\n"
+
+    path = create_file(str(folder), "print(1)\n", "main.py")
+    assert path == str(folder / "main.py")
+    assert create_file(str(folder), None, "txt") == str(
+        folder / "adder.txt"
+    )
+    assert (folder / "adder.txt").read_text() == ""
+
+
+@pytest.mark.parametrize("failing", ["fsync", "replace"])
+def test_interrupted_write_leaves_no_partial_file(
+    tmp_path, monkeypatch, failing
+):
+    path = tmp_path / "main.py"
+    atomic_write(str(path), "old\n")
+
+    def interrupt(*args):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(utils.os, failing, interrupt)
+    with pytest.raises(KeyboardInterrupt):
+        atomic_write(str(path), "new content\n" * 1000)
+    monkeypatch.undo()
+
+    assert path.read_text() == "old\n"
+    assert os.listdir(tmp_path) == ["main.py"]
+
+    # A new file is not created at all
+    monkeypatch.setattr(utils.os, failing, interrupt)
+    with pytest.raises(KeyboardInterrupt):
+        atomic_write(str(tmp_path / "docs.md"), "# Docs\n")
+    monkeypatch.undo()
+    assert os.listdir(tmp_path) == ["main.py"]
@@ -0,0 +1,72 @@
+import asyncio
+import json
+
+import pytest
+
+from dev_swarm.backend import BackendError, ChatBackend
+from dev_swarm.fake_llm import FakeLLM
+from dev_swarm.stub_server import StubServer
+
+
+@pytest.fixture
+def server():
+    with StubServer(FakeLLM(code_lines=4, prose_lines=1)) as server:
+        yield server
+
+
+def test_only_request_fields_are_sent():
+    backend = ChatBackend(model_name="model", temperature=0.2)
+    body = json.loads(
+        backend._body(
+            "prompt",
+            False,
+            {
+                "stop": ["```"],
+                "streaming_callback": print,
+                "img": None,
+            },
+        )
+    )
+    assert body == {
+        "model": "model",
+        "messages": [{"role": "user", "content": "prompt"}],
+        "max_tokens": 4000,
+        "stream": False,
+        "temperature": 0.2,
+        "stop": ["```"],
+    }
+
+
+def test_completions_reuse_one_connection(server):
+    backend = ChatBackend(server.url)
+    expected = server.model("Write an add function")
+    # Agent keyword arguments must not reach the endpoint
+    assert backend("Write an add function", img=None) == expected
+    assert (
+        "".join(backend.stream("Write an add function")) == expected
+    )
+    assert backend.run("Write an add function") == expected
+    assert server.requests == 3 and server.connections == 1
+    backend.close()
+
+
+def test_async_completions(server):
+    backend = ChatBackend(server.url)
+
+    async def complete():
+        chunks = [
+            chunk
+            async for chunk in backend.astream("Write a function")
+        ]
+        return await backend.acomplete("Write a function"), chunks
+
+    text, chunks = asyncio.run(complete())
+    assert text == "".join(chunks) == server.model("Write a function")
+
+
+def test_error_status_raises(server):
+    backend = ChatBackend(server.url)
+    backend.path = "/v1/missing"
+    with pytest.raises(BackendError) as error:
+        backend("prompt")
+    assert error.value.status == 404
@@ -0,0 +1,77 @@
+import pytest
+
+from dev_swarm import cache as cache_module
+from dev_swarm.cache import CachedModel, ResponseCache, enable_cache
+from dev_swarm.fake_llm import FakeLLM, use_fake_model
+from dev_swarm.llm import get_model, reset_models
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, "time", clock)
+    return clock
+
+
+@pytest.fixture(autouse=True)
+def registry():
+    yield
+    reset_models()
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+    cache = ResponseCache(
+        str(tmp_path / "cache.sqlite"), max_entries=2
+    )
+    cache.set("a", "A")
+    clock.now += 1
+    cache.set("b", "B")
+    clock.now += 1
+    assert cache.get("a") == "A"
+    clock.now += 1
+    cache.set("c", "C")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "A" and cache.get("c") == "C"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_ttl(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"), ttl=10)
+    cache.set("a", "A")
+    clock.now += 5
+    assert cache.get("a") == "A"
+    clock.now += 6
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_cached_model_calls_the_model_once(tmp_path):
+    model = FakeLLM()
+    cached = CachedModel(
+        model, ResponseCache(str(tmp_path / "cache.sqlite"))
+    )
+    assert cached("prompt") == cached("prompt")
+    assert "".join(cached.stream("prompt")) == cached("prompt")
+    assert model.calls == 1
+
+
+def test_enable_cache_keeps_caches_apart(tmp_path):
+    model = use_fake_model()
+    first = enable_cache(path=str(tmp_path / "a.sqlite"))
+    second = enable_cache(path=str(tmp_path / "b.sqlite"))
+
+    # The registry model itself stays uncached
+    assert get_model() is model
+    assert first.cache.path != second.cache.path
+    first("prompt")
+    second("prompt")
+    assert model.calls == 2
@@ -0,0 +1,96 @@
+import ast
+
+import pytest
+
+from dev_swarm.artifacts import ArtifactStore
+from dev_swarm.chunking import (
+    reference_signatures,
+    signature,
+    split_code,
+)
+from dev_swarm.fake_llm import FakeLLM
+
+CODE = '''import math
+
+TAU = 2 * math.pi
+
+
+def area(radius: float) -> float:
+    """Area of a circle."""
+    return math.pi * radius**2
+
+
+@dataclass
+class Circle:
+    radius: float
+
+    def area(self) -> float:
+        return area(self.radius)
+
+    async def grow(self, by: float = 1.0):
+        self.radius += by
+
+
+def circles(radii):
+    return [Circle(radius) for radius in radii]
+'''
+
+
+def test_code_is_split_into_top_level_definitions():
+    chunks = split_code(CODE)
+    assert [(chunk.name, chunk.kind) for chunk in chunks] == [
+        ("<module>", "module"),
+        ("area", "function"),
+        ("Circle", "class"),
+        ("circles", "function"),
+    ]
+    assert chunks[0].source == "import math\nTAU = 2 * math.pi\n"
+    assert chunks[2].source.startswith("@dataclass\nclass Circle:")
+    assert chunks[2].lineno == 11
+
+
+def test_chunks_reference_other_definitions():
+    chunks = {chunk.name: chunk for chunk in split_code(CODE)}
+    assert chunks["area"].references == []
+    assert chunks["Circle"].references == ["area"]
+    assert chunks["circles"].references == ["Circle"]
+
+
+def test_signatures_leave_out_bodies():
+    signatures = reference_signatures(CODE)
+    assert (
+        signatures["area"] == "def area(radius: float) -> float: ..."
+    )
+    assert signatures["Circle"] == (
+        "@dataclass\n"
+        "class Circle:\n"
+        "    def area(self) -> float: ...\n"
+        "    async def grow(self, by: float=1.0): ..."
+    )
+    # The parsed tree is left untouched
+    tree = ast.parse(CODE)
+    signature(tree.body[3])
+    assert ast.unparse(tree) == ast.unparse(ast.parse(CODE))
+
+
+def test_invalid_code_raises():
+    with pytest.raises(SyntaxError):
+        split_code("def broken(:")
+
+
+def test_chunked_documentation(tmp_path):
+    pytest.importorskip("swarms")
+    from dev_swarm.documentor_agent import DocumentorAgent
+
+    model = FakeLLM(code_lines=4, prose_lines=1)
+    agent = DocumentorAgent(
+        llm=model,
+        module="circles",
+        artifact_store=ArtifactStore(str(tmp_path)),
+    )
+    docs = agent.run_chunked(CODE)
+    # One request per definition, none for the module preamble
+    assert model.calls == 3
+    assert docs.startswith(
+        "# circles\n\n## Contents\n\n- `area`\n- `Circle`\n- `circles`"
+    )
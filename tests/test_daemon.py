@@ -0,0 +1,93 @@
+import json
+import socket
+import threading
+import time
+
+import pytest
+
+from dev_swarm.client import DaemonClient, main
+from dev_swarm.daemon import SwarmDaemon
+from dev_swarm.fake_llm import FakeLLM
+
+
+class BrokenDaemon(SwarmDaemon):
+    """A daemon whose swarms cannot be built."""
+
+    def warm_up(self) -> float:
+        return 0.0
+
+    def swarm(self, project):
+        raise RuntimeError(f"cannot build {project}")
+
+
+@pytest.fixture
+def broken_daemon(tmp_path):
+    daemon = BrokenDaemon(str(tmp_path / "daemon.sock"))
+    thread = threading.Thread(
+        target=daemon.serve_forever, daemon=True
+    )
+    thread.start()
+    client = DaemonClient(daemon.path, timeout=5)
+    deadline = time.monotonic() + 5
+    while not client.ping():
+        assert time.monotonic() < deadline, "the daemon did not start"
+        time.sleep(0.01)
+    yield daemon
+    daemon.shutdown()
+    thread.join(5)
+
+
+def test_errors_keep_the_connection(broken_daemon):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.settimeout(5)
+        conn.connect(broken_daemon.path)
+        conn.sendall(
+            b'{"op": "run", "task": "add", "project": "demo"}\n'
+            b'["not", "an", "object"]\n'
+            b'{"op": "ping"}\n'
+        )
+        with conn.makefile("rb") as file:
+            responses = [
+                json.loads(file.readline()) for _ in range(3)
+            ]
+
+    assert responses[0]["ok"] is False
+    assert responses[0]["error"] == "RuntimeError: cannot build demo"
+    assert responses[1]["error"].startswith("Invalid request")
+    assert responses[2]["ok"] is True
+    assert broken_daemon.stats()["failed"] == 1
+
+
+def test_client_reports_failed_tasks(broken_daemon, capsys):
+    assert main(["--socket", broken_daemon.path, "add"]) == 1
+    assert capsys.readouterr().err == (
+        "error: RuntimeError: cannot build dev_swarm\n"
+    )
+
+
+def test_client_without_daemon(tmp_path, capsys):
+    path = str(tmp_path / "missing.sock")
+    assert main(["--socket", path, "add"]) == 1
+    assert capsys.readouterr().err == (
+        f"error: No DevSwarm daemon is listening on {path}\n"
+    )
+    assert main(["--socket", path, "--stats"]) == 1
+    assert main(["--socket", path, "--ping"]) == 1
+
+
+def test_daemon_runs_tasks(tmp_path, monkeypatch):
+    pytest.importorskip("swarms")
+    monkeypatch.chdir(tmp_path)
+    model = FakeLLM()
+    daemon = SwarmDaemon(swarm_options={"llm": model})
+
+    response = daemon.handle({"task": "Write an add function"})
+    assert response["ok"] and response["error"] is None
+    assert set(response["outputs"]) == {
+        "FunctionGenerator",
+        "DocumentorAgent",
+        "TesterAgent",
+    }
+    daemon.handle({"task": "Write a sub function"})
+    assert model.calls == 6
+    assert daemon.stats()["projects"] == ["dev_swarm"]
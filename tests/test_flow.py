@@ -0,0 +1,216 @@
+import threading
+
+import pytest
+
+from dev_swarm.flow import FlowScheduler, parse_flow
+
+
+def test_parse_flow_builds_the_graph():
+    assert parse_flow("A -> B, C; C -> D\nB -> D") == {
+        "A": [],
+        "B": ["A"],
+        "C": ["A"],
+        "D": ["C", "B"],
+    }
+
+
+@pytest.mark.parametrize(
+    "flow", ["A -> B; B -> A", "A -> B -> C; C -> A", "A -> A"]
+)
+def test_parse_flow_rejects_cycles(flow):
+    with pytest.raises(ValueError):
+        parse_flow(flow)
+
+
+@pytest.mark.parametrize("flow", ["", " ; ", "A -> , -> B"])
+def test_parse_flow_rejects_empty_steps(flow):
+    with pytest.raises(ValueError):
+        parse_flow(flow)
+
+
+def test_unknown_stage_is_rejected():
+    with pytest.raises(ValueError):
+        FlowScheduler(parse_flow("A -> B"), {"A": str})
+
+
+def test_parallel_stages_run_at_the_same_time():
+    barrier = threading.Barrier(2, timeout=5)
+
+    def branch(text):
+        # Deadlocks (and times out) unless both branches run at once
+        barrier.wait()
+        return text.upper()
+
+    result = FlowScheduler(
+        parse_flow("A -> B, C -> D"),
+        {
+            "A": lambda task: task + "!",
+            "B": branch,
+            "C": branch,
+            "D": lambda text: text,
+        },
+    ).run("go")
+    assert result.ok
+    assert result.outputs["D"] == "GO!\n\nGO!"
+
+
+def test_failed_stage_skips_only_its_downstream():
+    def fail(text):
+        raise RuntimeError("boom")
+
+    result = FlowScheduler(
+        parse_flow("A -> B -> D; A -> C"),
+        {"A": str, "B": fail, "C": str.upper, "D": str},
+    ).run("go")
+    statuses = {
+        name: stage.status for name, stage in result.stages.items()
+    }
+    assert statuses == {
+        "A": "completed",
+        "B": "failed",
+        "C": "completed",
+        "D": "skipped",
+    }
+    assert result.stages["B"].error == "RuntimeError: boom"
+    assert not result.ok
+
+
+def test_run_resumes_from_completed_stages():
+    calls = []
+
+    def stage(name):
+        def run(text):
+            calls.append(name)
+            return f"{text} {name}"
+
+        return run
+
+    completed = []
+    result = FlowScheduler(
+        parse_flow("A -> B -> C"),
+        {name: stage(name) for name in "ABC"},
+    ).run(
+        "go",
+        completed={"A": "go A", "B": "go A B"},
+        on_complete=lambda done: completed.append(done.name),
+    )
+    assert calls == ["C"] and completed == ["C"]
+    assert result.resumed == ["A", "B"]
+    assert result.outputs["C"] == "go A B C"
+
+
+def test_published_output_starts_downstream_early():
+    downstream_started = threading.Event()
+
+    def stream(text, publish):
+        publish("draft")
+        # The downstream stage starts while this one still runs
+        assert downstream_started.wait(5)
+        return "final"
+
+    stream.publishes = True
+
+    def downstream(text):
+        downstream_started.set()
+        return text
+
+    result = FlowScheduler(
+        parse_flow("A -> B"), {"A": stream, "B": downstream}
+    ).run("go")
+    assert result.outputs == {"A": "final", "B": "draft"}
+    assert (
+        result.stages["A"].published_at
+        <= result.stages["B"].started_at
+    )
+
+
+def test_swarm_flow_runs_every_agent(tmp_path, monkeypatch):
+    pytest.importorskip("swarms")
+    from dev_swarm.dev_swarm import DevSwarm
+    from dev_swarm.fake_llm import FakeLLM
+
+    monkeypatch.chdir(tmp_path)
+    model = FakeLLM()
+    result = DevSwarm(llm=model).run("Write an add function")
+    assert result.ok
+    assert set(result.outputs) == {
+        "FunctionGenerator",
+        "DocumentorAgent",
+        "TesterAgent",
+    }
+    assert model.calls == 3
+
+
+def test_swarm_run_reports_errors_outside_stages(
+    tmp_path, monkeypatch
+):
+    pytest.importorskip("swarms")
+    from dev_swarm.dev_swarm import DevSwarm
+    from dev_swarm.fake_llm import FakeLLM
+
+    monkeypatch.chdir(tmp_path)
+    swarm = DevSwarm(llm=FakeLLM())
+
+    def broken(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(swarm, "_run_flow", broken)
+    result = swarm.run("Write an add function")
+    assert not result.ok
+    assert result.task == "Write an add function"
+    assert result.error == "OSError: disk full"
+
+
+@pytest.mark.parametrize("validation_gate", [False, True])
+def test_streaming_hands_every_code_block_downstream(
+    tmp_path, monkeypatch, validation_gate
+):
+    pytest.importorskip("swarms")
+    from dev_swarm.dev_swarm import DevSwarm
+    from dev_swarm.documentor_agent import DocumentorAgent
+    from dev_swarm.fake_llm import FakeLLM, make_response
+    from dev_swarm.markdown import extract_code_from_markdown
+    from dev_swarm.tester_agent import TesterAgent
+
+    class TwoBlockModel(FakeLLM):
+        def respond(self, task):
+            return make_response(8, name="first") + make_response(
+                8, name="second"
+            )
+
+    received = {}
+    for agent in (DocumentorAgent, TesterAgent):
+
+        def recording(self, task, *args, run=agent.run, **kwargs):
+            received[self.agent_name] = task
+            return run(self, task, *args, **kwargs)
+
+        monkeypatch.setattr(agent, "run", recording)
+
+    def code(task):
+        return (
+            extract_code_from_markdown(task)
+            if "```" in task
+            else task
+        )
+
+    monkeypatch.chdir(tmp_path)
+    inputs = {}
+    for streaming in (False, True):
+        received.clear()
+        result = DevSwarm(
+            project=f"streaming_{streaming}",
+            llm=TwoBlockModel(),
+            streaming_pipeline=streaming,
+            validation_gate=validation_gate,
+        ).run("Write an add function")
+        assert result.ok
+        inputs[streaming] = {
+            agent: code(task) for agent, task in received.items()
+        }
+
+    assert set(inputs[True]) == {"DocumentorAgent", "TesterAgent"}
+    assert inputs[True] == inputs[False]
+    for downstream_code in inputs[True].values():
+        assert "def first_0" in downstream_code
+        assert "def second_0" in downstream_code
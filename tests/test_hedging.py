@@ -0,0 +1,146 @@
+import threading
+import time
+
+import pytest
+
+from dev_swarm.backend import ChatBackend
+from dev_swarm.fake_llm import FakeLLM
+from dev_swarm.hedging import HedgedModel
+from dev_swarm.llm import (
+    CallCancelled,
+    CancelToken,
+    cancellable,
+    on_cancel,
+)
+from dev_swarm.rate_limit import RateLimiter, limit_model
+from dev_swarm.stub_server import StubServer
+
+
+class StallingModel(FakeLLM):
+    """Waits `stall` seconds before the first token of the listed calls."""
+
+    def __init__(self, stalled_calls, stall, **kwargs):
+        super().__init__(**kwargs)
+        self.stalled_calls = set(stalled_calls)
+        self.stall = stall
+
+    def stream(self, task, *args, **kwargs):
+        self._count()
+        if self.calls in self.stalled_calls:
+            time.sleep(self.stall)
+        yield self.respond(task)
+
+
+def hedged(model):
+    return HedgedModel(
+        model, min_samples=1, min_delay=0.05, max_hedge_ratio=1
+    )
+
+
+def wait_for_hedge_threads(timeout):
+    deadline = time.monotonic() + timeout
+    while any(
+        thread.name.startswith("dev-swarm-hedge")
+        for thread in threading.enumerate()
+    ):
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_no_hedge_without_latency_samples():
+    model = StallingModel([1], stall=0.2)
+    assert hedged(model)("prompt") == model.respond("prompt")
+    assert model.calls == 1
+
+
+def test_hedge_wins_when_the_first_token_is_late():
+    model = StallingModel([2], stall=1)
+    hedged_model = hedged(model)
+    hedged_model("warm up")
+
+    began = time.perf_counter()
+    assert hedged_model("prompt") == model.respond("prompt")
+    assert time.perf_counter() - began < 0.5
+    stats = hedged_model.stats()
+    assert stats["hedges"] == stats["hedge_wins"] == 1
+    # The stalled call cannot be interrupted; it runs to the end and is
+    # discarded
+    assert stats["cancelled"] == 1 and stats["interrupted"] == 0
+
+
+def test_hedges_are_capped():
+    model = StallingModel([2, 3], stall=0.2)
+    hedged_model = HedgedModel(
+        model, min_samples=1, min_delay=0.05, max_hedge_ratio=0.4
+    )
+    hedged_model("warm up")
+    hedged_model("prompt")
+    assert hedged_model.stats()["hedges"] == 0
+    assert model.calls == 2
+
+
+def test_saturated_limiter_does_not_trigger_hedges():
+    model = FakeLLM()
+    # One request every 0.1s
+    limiter = RateLimiter(requests_per_minute=600)
+    hedged_model = hedged(limit_model(model, limiter))
+    hedged_model("warm up")
+
+    # The next call waits 0.3s for the limiter, past the 0.05s threshold
+    limiter.requests.level = -2
+    began = time.perf_counter()
+    assert hedged_model("prompt") == model.respond("prompt")
+    assert time.perf_counter() - began >= 0.25
+    stats = hedged_model.stats()
+    assert stats["hedges"] == 0 and model.calls == 2
+    assert stats["first_token_p95"] < 0.05
+
+
+def test_limited_call_stalled_after_admission_is_hedged():
+    model = StallingModel([2], stall=1)
+    limiter = RateLimiter(requests_per_minute=600)
+    hedged_model = hedged(limit_model(model, limiter))
+    hedged_model("warm up")
+
+    limiter.requests.level = -1
+    began = time.perf_counter()
+    assert hedged_model("prompt") == model.respond("prompt")
+    assert time.perf_counter() - began < 0.9
+    assert hedged_model.stats()["hedge_wins"] == 1
+    # The hedge went through the limiter too
+    assert limiter.admitted == 3
+
+
+def test_stalled_backend_call_is_interrupted():
+    model = StallingModel([2], stall=10, prose_lines=1)
+    with StubServer(model) as server:
+        backend = ChatBackend(server.url)
+        hedged_model = hedged(backend)
+        hedged_model("warm up")
+
+        assert hedged_model("prompt") == model.respond("prompt")
+        stats = hedged_model.stats()
+        assert stats["cancelled"] == stats["interrupted"] == 1
+        # The loser gives its connection up long before the stub answers
+        assert wait_for_hedge_threads(timeout=2)
+        assert backend("prompt") == model.respond("prompt")
+        backend.close()
+
+
+def test_cancel_runs_the_registered_callbacks():
+    token = CancelToken()
+    interrupted = []
+    with cancellable(token):
+        with pytest.raises(CallCancelled):
+            with on_cancel(lambda: interrupted.append(True)):
+                token.cancel()
+        assert interrupted == [True] and token.interrupted
+        with pytest.raises(CallCancelled):
+            with on_cancel(lambda: None):
+                pass
+    # Outside `cancellable` nothing is registered
+    with on_cancel(lambda: interrupted.append(False)):
+        pass
+    assert interrupted == [True]
@@ -0,0 +1,109 @@
+import pytest
+
+from dev_swarm.fake_llm import FakeLLM
+from dev_swarm.incremental import (
+    code_fingerprint,
+    force_rebuild,
+    rebuild_scope,
+    stage_fingerprint,
+)
+
+CODE = "def add(a, b):\n    return a + b\n"
+
+
+def test_code_fingerprint_ignores_formatting():
+    reformatted = "def add(a,  b):  # sum\n\n    return a + b"
+    assert code_fingerprint(CODE) == code_fingerprint(reformatted)
+    assert code_fingerprint(CODE) != code_fingerprint(
+        CODE.replace("+", "-")
+    )
+    assert code_fingerprint("def (") == code_fingerprint("def  (\n")
+
+
+def test_stage_fingerprint_covers_every_input():
+    fingerprint = stage_fingerprint(CODE, "v1", model="m", loops=1)
+    assert fingerprint == stage_fingerprint(
+        CODE, "v1", loops=1, model="m"
+    )
+    assert fingerprint != stage_fingerprint(
+        CODE, "v2", model="m", loops=1
+    )
+    assert fingerprint != stage_fingerprint(
+        CODE, "v1", model="m", loops=2
+    )
+    assert fingerprint != stage_fingerprint(CODE, "v1", model="m")
+
+
+def test_rebuild_scope():
+    assert not force_rebuild()
+    with rebuild_scope(True):
+        assert force_rebuild()
+    assert not force_rebuild()
+
+
+def reused(result):
+    return {
+        name: stage.details.get("reused")
+        for name, stage in result.stages.items()
+        if name != "FunctionGenerator"
+    }
+
+
+def test_unchanged_stages_are_skipped(tmp_path, monkeypatch):
+    pytest.importorskip("swarms")
+    from dev_swarm.dev_swarm import DevSwarm
+
+    monkeypatch.chdir(tmp_path)
+    task = "Write an add function"
+    model = FakeLLM()
+    swarm = DevSwarm(llm=model, incremental=True)
+    first = swarm.run(task)
+    assert reused(first) == {
+        "DocumentorAgent": False,
+        "TesterAgent": False,
+    }
+
+    second = swarm.run(task)
+    assert second.outputs == first.outputs
+    assert reused(second) == {
+        "DocumentorAgent": True,
+        "TesterAgent": True,
+    }
+    # Only the generator called the model again
+    assert model.calls == 4
+
+    forced = swarm.run(task, force=True)
+    assert not any(reused(forced).values())
+    assert model.calls == 7
+
+
+@pytest.mark.parametrize(
+    "options, rebuilt",
+    [
+        ({"summarize_code": True}, {"TesterAgent"}),
+        ({"max_loops": 2}, {"DocumentorAgent", "TesterAgent"}),
+        (
+            {"refinement": "delta"},
+            {"DocumentorAgent", "TesterAgent"},
+        ),
+    ],
+)
+def test_changed_options_rebuild(
+    tmp_path, monkeypatch, options, rebuilt
+):
+    pytest.importorskip("swarms")
+    from dev_swarm.dev_swarm import DevSwarm
+
+    monkeypatch.chdir(tmp_path)
+    task = "Write an add function"
+    DevSwarm(llm=FakeLLM(), incremental=True).run(task)
+
+    result = DevSwarm(llm=FakeLLM(), incremental=True, **options).run(
+        task
+    )
+    assert result.ok
+    assert {
+        name
+        for name, was_reused in reused(result).items()
+        if not was_reused
+    } == rebuilt
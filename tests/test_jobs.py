@@ -0,0 +1,118 @@
+import pytest
+
+from dev_swarm import jobs as jobs_module
+from dev_swarm.fake_llm import use_fake_model
+from dev_swarm.jobs import JobQueue, work
+from dev_swarm.llm import reset_models
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(jobs_module.time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"), max_attempts=2)
+    yield queue
+    queue.close()
+
+
+def test_jobs_are_leased_in_order(queue, clock):
+    first, second = queue.submit_many("demo", ["first", "second"])
+    assert queue.lease("a").id == first
+    assert queue.lease("b").id == second
+    assert queue.lease("c") is None
+    assert queue.stats()["leased"] == 2
+
+
+def test_expired_lease_is_claimed_again(queue, clock):
+    job_id = queue.submit("demo", "task")
+    assert queue.lease("a", lease_seconds=10).attempts == 1
+
+    clock.now += 5
+    assert queue.lease("b", lease_seconds=10) is None
+    assert queue.renew(job_id, "a", lease_seconds=10)
+
+    clock.now += 11
+    assert queue.stats()["queue_depth"] == 1
+    job = queue.lease("b", lease_seconds=10)
+    assert (job.id, job.attempts) == (job_id, 2)
+    # The first worker lost its lease and cannot end the job
+    assert not queue.renew(job_id, "a")
+    assert queue.finish(job_id, "a", ok=True) == "lost"
+    assert queue.finish(job_id, "b", ok=True) == "done"
+    assert queue.job(job_id)["worker"] is None
+
+
+def test_job_fails_once_its_attempts_are_used(queue, clock):
+    expired = queue.submit("demo", "stalls")
+    failing = queue.submit("demo", "fails")
+    for attempt in (1, 2):
+        job = queue.lease("a", lease_seconds=10)
+        assert (job.id, job.attempts) == (expired, attempt)
+        clock.now += 11
+
+    # The expired job used both attempts and is failed instead of leased
+    assert queue.lease("a").id == failing
+    assert queue.job(expired)["status"] == "failed"
+    assert queue.finish(failing, "a", False, "boom") == "queued"
+    assert queue.lease("a").attempts == 2
+    assert queue.finish(failing, "a", False, "boom") == "failed"
+    assert queue.job(failing)["error"] == "boom"
+    assert queue.lease("a") is None
+
+
+def test_completed_stages_are_kept_across_attempts(queue, clock):
+    job_id = queue.submit("demo", "task")
+    queue.lease("a")
+    queue.record_stage(
+        job_id, "FunctionGenerator", "def add(): ...", 1
+    )
+    assert queue.completed_stages(job_id) == {
+        "FunctionGenerator": "def add(): ..."
+    }
+
+
+def test_worker_resumes_after_completed_stages(tmp_path, monkeypatch):
+    pytest.importorskip("swarms")
+    monkeypatch.chdir(tmp_path)
+    path = str(tmp_path / "jobs.sqlite")
+    queue = JobQueue(path)
+    fresh = queue.submit("demo", "Write an add function")
+    resumed = queue.submit("demo", "Write a sub function")
+    queue.record_stage(
+        resumed, "FunctionGenerator", "def sub(a, b): ...", 1
+    )
+    models = []
+    try:
+        done = work(
+            path,
+            worker="test",
+            setup=lambda: models.append(use_fake_model()),
+            stop_when_empty=True,
+        )
+    finally:
+        reset_models()
+
+    assert done == 2
+    assert queue.job(fresh)["status"] == "done"
+    assert queue.job(resumed)["status"] == "done"
+    # Three agents for the first job, two for the resumed one
+    assert models[0].calls == 5
+    assert set(queue.completed_stages(resumed)) == {
+        "FunctionGenerator",
+        "DocumentorAgent",
+        "TesterAgent",
+    }
+    queue.close()
@@ -0,0 +1,139 @@
+import threading
+
+import pytest
+
+from dev_swarm.fake_llm import FakeLLM
+from dev_swarm.journal import StateJournal
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "state" / "journal.jsonl")
+
+
+def test_torn_last_line_is_repaired(path):
+    journal = StateJournal(path)
+    journal.start_run("run", "task")
+    journal.record_stage("run", "FunctionGenerator", "code", 1.0)
+    journal.close()
+    # A crash in the middle of an append
+    with open(path, "a", encoding="utf-8") as file:
+        file.write('{"type": "stage", "run_id": "run", "sta')
+
+    journal = StateJournal(path)
+    journal.record_stage("run", "DocumentorAgent", "docs", 2.0)
+    assert len(list(journal.records())) == 3
+    assert journal.completed_stages("run") == {
+        "FunctionGenerator": "code",
+        "DocumentorAgent": "docs",
+    }
+    journal.close()
+
+
+def test_completed_stages_reset_after_success(path):
+    journal = StateJournal(path)
+    journal.start_run("run", "task")
+    journal.record_stage("run", "FunctionGenerator", "code", 1.0)
+    journal.finish_run("run", ok=False)
+    journal.start_run("other", "task")
+    journal.record_stage("other", "FunctionGenerator", "other", 1.0)
+    assert journal.completed_stages("run") == {
+        "FunctionGenerator": "code"
+    }
+
+    journal.start_run("run", "task")
+    journal.record_stage("run", "TesterAgent", "tests", 1.0)
+    journal.finish_run("run", ok=True)
+    assert journal.completed_stages("run") == {}
+
+    journal.start_run("run", "task")
+    journal.record_stage("run", "DocumentorAgent", "docs", 1.0)
+    assert journal.completed_stages("run") == {
+        "DocumentorAgent": "docs"
+    }
+    assert journal.completed_stages("other") == {
+        "FunctionGenerator": "other"
+    }
+    journal.close()
+
+
+def test_background_compaction_keeps_concurrent_appends(path):
+    journal = StateJournal(path, max_turns=1000, fsync=False)
+    for index in range(50):
+        journal.start_run(f"done-{index}", "task")
+        journal.record_stage(f"done-{index}", "stage", "x" * 100, 1.0)
+        journal.finish_run(f"done-{index}", ok=True)
+    journal.start_run("failed", "task")
+    journal.record_stage("failed", "FunctionGenerator", "code", 1.0)
+    journal.finish_run("failed", ok=False)
+    # Every further append starts a compaction unless one is running
+    journal.compact_bytes = 1
+
+    def append_turns(agent: str) -> None:
+        for index in range(100):
+            journal.record_turn(agent, "user", str(index))
+
+    threads = [
+        threading.Thread(target=append_turns, args=(f"agent-{n}",))
+        for n in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    journal.close()
+
+    journal = StateJournal(path)
+    records = list(journal.records())
+    for n in range(4):
+        assert [
+            turn["content"] for turn in journal.turns(f"agent-{n}")
+        ] == [str(index) for index in range(100)]
+    assert not any(
+        record["type"] == "stage"
+        and record["run_id"].startswith("done")
+        for record in records
+    )
+    assert journal.completed_stages("failed") == {
+        "FunctionGenerator": "code"
+    }
+    finished = [
+        record for record in records if record["type"] == "run"
+    ]
+    assert len(finished) == 50 + 2
+    journal.close()
+
+
+def test_compaction_keeps_the_latest_turns(path):
+    journal = StateJournal(path, max_turns=2)
+    for index in range(5):
+        journal.record_exchange("agent", f"task {index}", "answer")
+    journal.compact()
+    assert [turn["content"] for turn in journal.turns("agent")] == [
+        "task 4",
+        "answer",
+    ]
+    journal.close()
+
+
+def test_every_agent_records_its_turns(tmp_path, monkeypatch):
+    pytest.importorskip("swarms")
+    from dev_swarm.dev_swarm import DevSwarm
+
+    monkeypatch.chdir(tmp_path)
+    path = str(tmp_path / "journal.jsonl")
+    swarm = DevSwarm(llm=FakeLLM(), journal_path=path)
+    result = swarm.run("Write an add function")
+    assert result.ok
+
+    journal = swarm.journal
+    generated = result.outputs["FunctionGenerator"]
+    for agent, output in (
+        ("FunctionGenerator", generated),
+        ("DocumentorAgent", result.outputs["DocumentorAgent"]),
+        ("TesterAgent", result.outputs["TesterAgent"]),
+    ):
+        turns = journal.turns(agent)
+        assert [turn["role"] for turn in turns] == ["user", agent]
+        assert turns[1]["content"] == output
+    assert journal.turns("DocumentorAgent")[0]["content"] == generated
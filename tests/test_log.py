@@ -0,0 +1,87 @@
+import os
+
+import pytest
+from loguru import logger
+
+from dev_swarm import log
+from dev_swarm.fake_llm import FakeLLM
+from dev_swarm.flow import FlowScheduler, parse_flow
+from dev_swarm.log import LogSettings, configure_logging, log_payload
+
+
+@pytest.fixture
+def records():
+    records = []
+    handler = logger.add(
+        lambda message: records.append(message.record), level="INFO"
+    )
+    yield records
+    logger.remove(handler)
+
+
+@pytest.fixture(autouse=True)
+def default_settings(monkeypatch):
+    monkeypatch.setattr(log, "settings", LogSettings())
+
+
+def test_payload_is_logged_as_a_summary(records):
+    response = FakeLLM(prose_lines=1)("Write an add function")
+    log_payload("Generated code", response)
+
+    (record,) = records
+    assert record["extra"]["payload_size"] == len(response)
+    assert len(record["extra"]["payload_sha256"]) == 12
+    assert record["message"].startswith(
+        f"Generated code: {len(response)} chars, sha256 "
+    )
+    assert response not in record["message"]
+    assert len(record["extra"]["payload_preview"]) <= 123
+
+
+def test_payload_is_not_summarized_below_the_sink_level(records):
+    class Payload:
+        def __str__(self):
+            raise AssertionError("summarized a dropped record")
+
+    # No sink accepts TRACE, not even the default stderr one
+    log_payload("Prompt", Payload(), level="TRACE")
+    assert records == []
+
+
+def test_full_payloads_are_saved(records, tmp_path):
+    configure_logging(
+        full_payloads=True, payload_directory=str(tmp_path)
+    )
+    log_payload("Task", "Write an add function")
+
+    path = records[0]["extra"]["payload_path"]
+    assert os.path.dirname(path) == str(tmp_path)
+    with open(path) as file:
+        assert file.read() == "Write an add function"
+
+
+def test_stage_sample_rates(records):
+    configure_logging(sample_rates={"Quiet": 0.0})
+
+    def stage(name):
+        def run(task):
+            log_payload(name, task)
+            return task
+
+        return run
+
+    FlowScheduler(
+        parse_flow("Quiet, Loud"),
+        {"Quiet": stage("Quiet"), "Loud": stage("Loud")},
+    ).run("task")
+    payloads = [
+        record["extra"]["stage"]
+        for record in records
+        if "payload_size" in record["extra"]
+    ]
+    assert payloads == ["Loud"]
+
+
+def test_unknown_option_is_rejected():
+    with pytest.raises(TypeError):
+        configure_logging(colour=True)
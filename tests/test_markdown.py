@@ -0,0 +1,92 @@
+import pytest
+
+from dev_swarm.fake_llm import FakeLLM
+from dev_swarm.markdown import (
+    CodeBlock,
+    CodeBlockExtractor,
+    extract_code_from_markdown,
+    iter_code_blocks,
+)
+
+RESPONSE = """Here is the code.
+
+```python
+def add(a, b):
+    return a + b
+```
+
+And its tests:
+
+~~~~python
+def test_add():
+    assert add(1, 2) == 3
+~~~~
+"""
+
+
+def test_blocks_are_extracted_with_their_language():
+    assert list(iter_code_blocks([RESPONSE])) == [
+        CodeBlock("python", "def add(a, b):\n    return a + b"),
+        CodeBlock(
+            "python", "def test_add():\n    assert add(1, 2) == 3"
+        ),
+    ]
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, 64])
+def test_chunked_input_gives_the_same_blocks(size):
+    chunks = [
+        RESPONSE[start : start + size]
+        for start in range(0, len(RESPONSE), size)
+    ]
+    assert list(iter_code_blocks(chunks)) == list(
+        iter_code_blocks([RESPONSE])
+    )
+
+
+def test_block_is_returned_as_soon_as_its_fence_closes():
+    extractor = CodeBlockExtractor()
+    assert extractor.feed("```python\nx = 1\n") == []
+    assert extractor.in_block
+    assert extractor.feed("```\nmore prose") == [
+        CodeBlock("python", "x = 1")
+    ]
+    assert not extractor.in_block
+    assert extractor.close() == []
+    assert extractor.blocks == [CodeBlock("python", "x = 1")]
+
+
+def test_inner_fences_do_not_close_a_longer_fence():
+    markdown = "````markdown\n```python\nprint(1)\n```\n~~~\n````\n"
+    assert list(iter_code_blocks([markdown])) == [
+        CodeBlock("markdown", "```python\nprint(1)\n```\n~~~")
+    ]
+
+
+def test_unterminated_block():
+    markdown = "Truncated:\n```python\ndef add(a, b):"
+    assert extract_code_from_markdown(markdown) == "def add(a, b):"
+
+    extractor = CodeBlockExtractor(include_unterminated=False)
+    extractor.feed(markdown)
+    assert extractor.close() == []
+
+
+def test_language_filter():
+    markdown = "```bash\npip install x\n```\n" + RESPONSE
+    assert extract_code_from_markdown(markdown, "bash") == (
+        "pip install x"
+    )
+    assert extract_code_from_markdown(markdown).startswith(
+        "pip install x\ndef add"
+    )
+
+
+def test_streamed_model_response():
+    model = FakeLLM(code_lines=8, chunk_size=5)
+    blocks = list(iter_code_blocks(model.stream("Write a function")))
+    assert len(blocks) == 1 and blocks[0].language == "python"
+    assert blocks[0].code == extract_code_from_markdown(
+        model("Write a function")
+    )
+    assert blocks[0].code.startswith("def ")
@@ -0,0 +1,147 @@
+from types import SimpleNamespace
+
+import pytest
+
+from dev_swarm.fake_llm import FakeLLM
+from dev_swarm.memory import (
+    SUMMARY_ROLE,
+    MemoryPolicy,
+    ResetMemory,
+    SummarizeMemory,
+    TokenWindow,
+    memory_policy,
+    memory_usage,
+)
+from dev_swarm.prompt_builder import count_tokens
+
+SYSTEM = {"role": "System", "content": "You write Python functions."}
+
+
+def turn(index: int) -> dict:
+    role = "User" if index % 2 == 0 else "Agent"
+    return {"role": role, "content": f"turn {index} " + "word " * 20}
+
+
+TURN_TOKENS = count_tokens(turn(10)["content"])
+
+
+class StubAgent:
+    def __init__(self, turns: int, llm=None):
+        self.history = [SYSTEM] + [
+            turn(index) for index in range(turns)
+        ]
+        self.short_memory = SimpleNamespace(
+            conversation_history=self.history
+        )
+        self.llm = llm or FakeLLM(code_lines=4, prose_lines=1)
+
+
+def test_reset_keeps_only_the_system_prompt():
+    agent = StubAgent(turns=6)
+    ResetMemory().apply(agent)
+    assert agent.short_memory.conversation_history is agent.history
+    assert agent.history == [SYSTEM]
+
+
+def test_window_keeps_the_last_turns():
+    agent = StubAgent(turns=10)
+    TokenWindow(max_tokens=3 * TURN_TOKENS).apply(agent)
+    assert agent.short_memory.conversation_history is agent.history
+    assert agent.history == [SYSTEM] + [turn(i) for i in (7, 8, 9)]
+
+    # A history within the budget is left alone
+    TokenWindow(max_tokens=3 * TURN_TOKENS).apply(agent)
+    assert len(agent.history) == 4
+
+
+def test_summarize_replaces_older_turns_with_one_summary():
+    prompts = []
+
+    def summarizer(prompt):
+        prompts.append(prompt)
+        return f"summary {len(prompts)}"
+
+    agent = StubAgent(turns=10)
+    policy = SummarizeMemory(
+        max_tokens=5 * TURN_TOKENS,
+        keep_tokens=2 * TURN_TOKENS,
+        summarizer=summarizer,
+    )
+    policy.apply(agent)
+
+    assert agent.short_memory.conversation_history is agent.history
+    assert agent.history == [
+        SYSTEM,
+        {"role": SUMMARY_ROLE, "content": "summary 1"},
+        turn(8),
+        turn(9),
+    ]
+    # Only the newest older turns fit in the summary prompt
+    assert "turn 3 " in prompts[0] and "turn 7 " in prompts[0]
+    assert "turn 2 " not in prompts[0] and "turn 8 " not in prompts[0]
+
+    # The summary is folded into the next one once the history grows
+    agent.history.extend(turn(index) for index in range(10, 16))
+    policy.apply(agent)
+    assert agent.history == [
+        SYSTEM,
+        {"role": SUMMARY_ROLE, "content": "summary 2"},
+        turn(14),
+        turn(15),
+    ]
+    assert f"{SUMMARY_ROLE}: summary 1" in prompts[1]
+    assert "turn 13 " in prompts[1] and "turn 8 " not in prompts[1]
+
+
+def test_summarize_uses_the_agent_model():
+    model = FakeLLM(code_lines=4, prose_lines=1)
+    agent = StubAgent(turns=10, llm=model)
+    SummarizeMemory(
+        max_tokens=5 * TURN_TOKENS, keep_tokens=2 * TURN_TOKENS
+    ).apply(agent)
+    assert model.calls == 1
+    assert [message["role"] for message in agent.history] == [
+        "System",
+        SUMMARY_ROLE,
+        "User",
+        "Agent",
+    ]
+
+
+def test_summarize_below_the_limit_does_not_call_the_model():
+    model = FakeLLM()
+    agent = StubAgent(turns=4, llm=model)
+    SummarizeMemory(max_tokens=100 * TURN_TOKENS).apply(agent)
+    assert len(agent.history) == 5 and model.calls == 0
+
+
+def test_failed_summary_drops_the_older_turns():
+    def broken(prompt):
+        raise ConnectionError("offline")
+
+    agent = StubAgent(turns=10)
+    SummarizeMemory(
+        max_tokens=5 * TURN_TOKENS,
+        keep_tokens=2 * TURN_TOKENS,
+        summarizer=broken,
+    ).apply(agent)
+    assert agent.history == [SYSTEM, turn(8), turn(9)]
+
+
+def test_usage_and_policy_names():
+    agent = StubAgent(turns=2)
+    usage = memory_usage(agent)
+    assert usage.messages == 3
+    assert usage.tokens == sum(
+        count_tokens(message["content"]) for message in agent.history
+    )
+    assert memory_usage(object()).messages == 0
+    # Agents without a history are left alone
+    ResetMemory().apply(object())
+
+    assert isinstance(memory_policy("window"), TokenWindow)
+    assert memory_policy(None) is None
+    policy = MemoryPolicy()
+    assert memory_policy(policy) is policy
+    with pytest.raises(ValueError):
+        memory_policy("forget")
@@ -0,0 +1,224 @@
+import json
+import re
+
+import pytest
+
+from dev_swarm.fake_llm import FakeLLM
+from dev_swarm.flow import (
+    FlowResult,
+    FlowScheduler,
+    StageResult,
+    parse_flow,
+)
+from dev_swarm.metrics import (
+    MetricsRegistry,
+    Span,
+    count_call,
+    export_jsonl,
+    metered_stream,
+    record_cache_hit,
+    record_retry,
+    span,
+)
+
+SAMPLE = re.compile(
+    r"^(?P<name>[a-zA-Z_:][a-zA-Z0-9_:]*)"
+    r'(?:\{(?P<labels>[a-zA-Z_]\w*="(?:[^"\\]|\\.)*"'
+    r'(?:,[a-zA-Z_]\w*="(?:[^"\\]|\\.)*")*)\})?'
+    r" (?P<value>\S+)$"
+)
+TYPE = re.compile(
+    r"^# TYPE (?P<name>[a-zA-Z_:][a-zA-Z0-9_:]*)"
+    r" (?P<kind>counter|gauge|summary)$"
+)
+
+
+def parse_exposition(text):
+    """Checks the exposition format and returns its samples."""
+    assert text.endswith("\n")
+    types, samples = {}, {}
+    for line in text.splitlines():
+        declared = TYPE.match(line)
+        if declared:
+            assert declared["name"] not in types, line
+            types[declared["name"]] = declared["kind"]
+            continue
+        sample = SAMPLE.match(line)
+        assert sample, line
+        name = sample["name"]
+        family = re.sub(r"_(sum|count)$", "", name)
+        if types.get(family) == "summary":
+            assert name != family, line
+        else:
+            # Every sample follows the TYPE line of its family
+            assert name in types, line
+        samples[(name, sample["labels"] or "")] = float(
+            sample["value"]
+        )
+    return samples
+
+
+def fake_run(model, task, fail=False):
+    def generate(task):
+        with span("generate") as record:
+            chunks = model.stream(task)
+            response = "".join(metered_stream(record, task, chunks))
+        return response
+
+    def document(code):
+        with span("document") as record:
+            record_cache_hit()
+            record_retry()
+            response = model(code)
+            count_call(record, code, response)
+        if fail:
+            raise RuntimeError("no documentation")
+        return response
+
+    return FlowScheduler(
+        parse_flow("Generate -> Document"),
+        {"Generate": generate, "Document": document},
+    ).run(task)
+
+
+def test_prometheus_exposition_after_fake_runs():
+    model = FakeLLM(code_lines=8, prose_lines=1)
+    first = fake_run(model, "Write an add function")
+    second = fake_run(model, "Write a sort function", fail=True)
+    assert first.ok and not second.ok
+
+    registry = MetricsRegistry()
+    registry.observe(first)
+    registry.observe(second)
+    registry.set_gauge(
+        "dev_swarm_agent_memory_tokens", 12, agent='Tester "2"\n'
+    )
+    samples = parse_exposition(registry.to_prometheus())
+
+    assert samples[("dev_swarm_runs_total", "")] == 2
+    assert samples[("dev_swarm_failed_runs_total", "")] == 1
+    generate = 'stage="Generate",span="generate"'
+    document = 'stage="Document",span="document"'
+    assert (
+        samples[("dev_swarm_span_duration_seconds_count", generate)]
+        == 2
+    )
+    assert samples[
+        ("dev_swarm_span_duration_seconds_sum", generate)
+    ] == pytest.approx(
+        sum(
+            record.duration
+            for result in (first, second)
+            for record in result.spans
+            if record.name == "generate"
+        )
+    )
+    assert samples[
+        ("dev_swarm_completion_tokens_total", generate)
+    ] == sum(
+        record.completion_tokens
+        for result in (first, second)
+        for record in result.spans
+        if record.name == "generate"
+    )
+    # Only the streamed step has a time to first token
+    assert (
+        samples[
+            ("dev_swarm_time_to_first_token_seconds_count", generate)
+        ]
+        == 2
+    )
+    assert (
+        samples[
+            ("dev_swarm_time_to_first_token_seconds_count", document)
+        ]
+        == 0
+    )
+    assert samples[("dev_swarm_cache_hits_total", document)] == 2
+    assert samples[("dev_swarm_retries_total", document)] == 2
+    assert (
+        samples[
+            (
+                "dev_swarm_agent_memory_tokens",
+                'agent="Tester \\"2\\"\\n"',
+            )
+        ]
+        == 12
+    )
+
+
+def test_large_counters_keep_every_digit():
+    stage = StageResult("Generate", status="completed")
+    stage.details["spans"] = [
+        Span("generate", stage="Generate", completion_tokens=1234567)
+    ]
+    registry = MetricsRegistry()
+    registry.observe(FlowResult("task", stages={"Generate": stage}))
+    samples = parse_exposition(registry.to_prometheus())
+    assert (
+        samples[
+            (
+                "dev_swarm_completion_tokens_total",
+                'stage="Generate",span="generate"',
+            )
+        ]
+        == 1234567
+    )
+
+
+def test_export_jsonl_appends_one_record_per_span(tmp_path):
+    model = FakeLLM(code_lines=8, prose_lines=1)
+    path = tmp_path / "metrics" / "spans.jsonl"
+    for task in ("Write an add function", "Write a sort function"):
+        export_jsonl(fake_run(model, task), str(path))
+
+    records = [
+        json.loads(line) for line in path.read_text().splitlines()
+    ]
+    assert [
+        (record["task"], record["stage"], record["name"])
+        for record in records
+    ] == [
+        ("Write an add function", "Generate", "generate"),
+        ("Write an add function", "Document", "document"),
+        ("Write a sort function", "Generate", "generate"),
+        ("Write a sort function", "Document", "document"),
+    ]
+    generate = records[0]
+    assert generate["prompt_tokens"] > 0
+    assert generate["completion_tokens"] > 0
+    assert generate["time_to_first_token"] is not None
+    assert generate["tokens_per_second"] > 0
+    assert records[1]["cache_hits"] == 1
+    assert records[1]["time_to_first_token"] is None
+
+
+def test_swarm_writes_metrics_files(tmp_path, monkeypatch):
+    pytest.importorskip("swarms")
+    from dev_swarm.dev_swarm import DevSwarm
+
+    monkeypatch.chdir(tmp_path)
+    swarm = DevSwarm(
+        llm=FakeLLM(),
+        metrics_path="metrics/spans.jsonl",
+        prometheus_path="metrics/dev_swarm.prom",
+    )
+    assert swarm.run("Write an add function").ok
+
+    records = [
+        json.loads(line)
+        for line in (tmp_path / "metrics" / "spans.jsonl")
+        .read_text()
+        .splitlines()
+    ]
+    assert {"generate", "document", "test"} <= {
+        record["name"] for record in records
+    }
+    samples = parse_exposition(
+        (tmp_path / "metrics" / "dev_swarm.prom").read_text()
+    )
+    assert samples[("dev_swarm_runs_total", "")] == 1
+    assert any(
+        name == "dev_swarm_agent_memory_tokens" for name, _ in samples
+    )
+    assert samples[("dev_swarm_process_max_rss_bytes", "")] > 0
@@ -0,0 +1,51 @@
+import pytest
+
+from dev_swarm import prompt_builder
+from dev_swarm.prompt_builder import (
+    PromptTemplate,
+    count_tokens,
+    split_to_tokens,
+    truncate_to_tokens,
+)
+
+
+@pytest.fixture(autouse=True)
+def local_estimate(monkeypatch):
+    # Test the estimate used when tiktoken is not installed
+    monkeypatch.setattr(prompt_builder, "_encoding", lambda: None)
+
+
+def test_estimate_counts_words_and_punctuation():
+    assert count_tokens("def add(a, b):") == 8
+
+
+def test_estimate_never_undercounts_long_words():
+    identifier = "very_long_identifier_name_" * 4
+    assert count_tokens(identifier) == len(identifier) // 3
+    assert count_tokens("数" * 30) == 10
+
+
+def test_truncated_text_fits_the_budget():
+    text = "x" * 100 + " hello, world"
+    head, dropped = truncate_to_tokens(text, 10)
+    assert count_tokens(head) <= 10
+    assert text.startswith(head) and head
+    assert dropped == count_tokens(text) - count_tokens(head)
+    assert truncate_to_tokens("a b c d e f", 3) == ("a b c", 3)
+    assert truncate_to_tokens("a b", 3) == ("a b", 0)
+
+
+def test_split_parts_fit_the_budget():
+    text = "word " * 20 + "\n" + "y" * 80 + "\nshort line\n"
+    parts = split_to_tokens(text, 10)
+    assert "".join(parts) == text
+    assert all(count_tokens(part) <= 10 for part in parts)
+
+
+def test_built_prompt_stays_within_budget():
+    template = PromptTemplate(
+        "Test", "You write code.\n\n", "Task: $task"
+    )
+    prompt = template.build(budget=40, task="z" * 600)
+    assert prompt.truncated_tokens > 0
+    assert prompt.prompt_tokens <= 40
@@ -0,0 +1,136 @@
+import threading
+import time
+
+import pytest
+
+from dev_swarm.cache import CachedModel, ResponseCache
+from dev_swarm.fake_llm import FakeLLM
+from dev_swarm.prompt_builder import count_tokens
+from dev_swarm.rate_limit import (
+    GENERATOR_PRIORITY,
+    RateLimitedModel,
+    RateLimiter,
+    TokenBucket,
+    is_retryable,
+    limit_model,
+)
+
+
+class StatusError(Exception):
+    def __init__(self, status):
+        super().__init__(f"status {status}")
+        self.status = status
+
+
+class FlakyModel(FakeLLM):
+    """Fails with the given errors before answering."""
+
+    def __init__(self, *errors, **kwargs):
+        super().__init__(**kwargs)
+        self.errors = list(errors)
+
+    def __call__(self, task, *args, **kwargs):
+        if self.errors:
+            raise self.errors.pop(0)
+        return super().__call__(task, *args, **kwargs)
+
+
+def test_bucket_refills_continuously():
+    bucket = TokenBucket(60)
+    now = bucket.updated
+    assert bucket.delay(60, now) == 0
+    bucket.take(60)
+    assert bucket.delay(1, now) == pytest.approx(1)
+    assert bucket.delay(1, now + 0.5) == pytest.approx(0.5)
+    # Requests larger than the bucket only wait for a full bucket
+    assert bucket.delay(600, now + 30) == pytest.approx(30)
+
+
+@pytest.mark.parametrize(
+    "error, retryable",
+    [
+        (StatusError(429), True),
+        (StatusError(503), True),
+        (StatusError(400), False),
+        (ConnectionResetError(), True),
+        (TimeoutError(), True),
+        (type("RateLimitError", (Exception,), {})(), True),
+        (ValueError(), False),
+    ],
+)
+def test_retryable_errors(error, retryable):
+    assert is_retryable(error) is retryable
+
+
+def test_retryable_failures_are_retried():
+    limiter = RateLimiter(base_delay=0)
+    model = FlakyModel(StatusError(429), ConnectionResetError())
+    response = RateLimitedModel(model, limiter)("prompt")
+    assert response == FakeLLM()("prompt")
+    assert limiter.stats()["retries"] == 2
+    assert limiter.stats()["admitted"] == 3
+
+
+def test_permanent_failures_are_raised():
+    limiter = RateLimiter(base_delay=0)
+    model = FlakyModel(StatusError(400))
+    with pytest.raises(StatusError):
+        RateLimitedModel(model, limiter)("prompt")
+    assert limiter.stats()["retries"] == 0
+
+
+def test_tokens_are_charged_for_the_real_completion():
+    limiter = RateLimiter(tokens_per_minute=1000)
+    model = FakeLLM(code_lines=8, prose_lines=1)
+    response = RateLimitedModel(model, limiter)("prompt")
+    used = count_tokens("prompt") + count_tokens(response)
+    assert limiter.tokens.level == pytest.approx(1000 - used, abs=1)
+
+    chunks = list(RateLimitedModel(model, limiter).stream("prompt"))
+    assert "".join(chunks) == response
+    assert limiter.tokens.level == pytest.approx(
+        1000 - 2 * used, abs=1
+    )
+
+
+def test_higher_priority_is_admitted_first():
+    # One request per 100ms, with the bucket empty
+    limiter = RateLimiter(requests_per_minute=600)
+    limiter.requests.take(limiter.requests.level)
+    admitted = []
+
+    def request(name, priority):
+        limiter.acquire(1, priority)
+        admitted.append(name)
+
+    def queue_depth(depth):
+        while limiter.stats()["queue_depth"] < depth:
+            time.sleep(0.001)
+
+    threads = [
+        threading.Thread(target=request, args=("docs", 1)),
+        threading.Thread(
+            target=request, args=("generator", GENERATOR_PRIORITY)
+        ),
+    ]
+    threads[0].start()
+    queue_depth(1)
+    threads[1].start()
+    queue_depth(2)
+    for thread in threads:
+        thread.join(5)
+    assert admitted == ["generator", "docs"]
+    assert limiter.stats()["max_queue_depth"] == 2
+
+
+def test_cache_hits_are_not_limited(tmp_path):
+    limiter = RateLimiter(requests_per_minute=600)
+    model = FakeLLM()
+    cached = CachedModel(
+        model, ResponseCache(str(tmp_path / "cache.sqlite"))
+    )
+    limited = limit_model(cached, limiter)
+    assert isinstance(limited, CachedModel)
+    assert limited("prompt") == limited("prompt")
+    assert model.calls == 1
+    assert limiter.stats()["admitted"] == 1
@@ -0,0 +1,144 @@
+import pytest
+
+from dev_swarm.artifacts import ArtifactStore
+from dev_swarm.fake_llm import FakeLLM
+from dev_swarm.prompt_builder import count_tokens
+from dev_swarm.refine import (
+    PatchError,
+    apply_edits,
+    apply_unified_diff,
+    refine_artifact,
+    replace_symbols,
+)
+
+TESTS = """import pytest
+from main import add
+
+
+def test_add():
+    assert add(1, 2) == 3
+
+
+@pytest.mark.parametrize("a", [1, 2])
+def test_add_zero(a):
+    assert add(a, 0) == a"""
+
+
+def test_diff_is_located_by_context():
+    diff = """```diff
+--- a/test_main.py
++++ b/test_main.py
+@@ -40,2 +40,3 @@
+ def test_add():
+     assert add(1, 2) == 3
++    assert add(-1, 1) == 0
+```"""
+    patched = apply_unified_diff(TESTS, diff)
+    assert "    assert add(-1, 1) == 0\n\n\n@pytest" in patched
+
+
+def test_diff_without_line_numbers_and_trailing_spaces():
+    diff = "@@ @@\n def test_add():   \n-    assert add(1, 2) == 3\n+    assert add(2, 2) == 4"
+    assert "add(2, 2) == 4" in apply_unified_diff(TESTS, diff)
+
+
+def test_diff_that_does_not_match_raises():
+    with pytest.raises(PatchError):
+        apply_unified_diff(
+            TESTS, "@@ @@\n-def test_missing():\n+pass"
+        )
+    with pytest.raises(PatchError):
+        apply_unified_diff(TESTS, "no hunks here")
+
+
+def test_symbols_are_replaced_and_appended():
+    patched = replace_symbols(
+        TESTS,
+        "import math\n\n"
+        '@pytest.mark.parametrize("a", [1, 2, 3])\n'
+        "def test_add_zero(a):\n"
+        "    assert add(a, 0) == a\n\n"
+        "def test_close():\n"
+        "    assert math.isclose(add(0.1, 0.2), 0.3)\n",
+    )
+    assert patched.count("def test_add_zero") == 1
+    assert "[1, 2, 3]" in patched and "[1, 2]]" not in patched
+    assert patched.index("import math") < patched.index(
+        "def test_add"
+    )
+    assert patched.rstrip().endswith("0.3)")
+
+
+def test_edits_forms():
+    assert apply_edits(TESTS, "NO CHANGES")[1] == "unchanged"
+    with pytest.raises(PatchError):
+        apply_edits(TESTS, "I rewrote it all.")
+    # A diff that breaks the syntax is rejected
+    with pytest.raises(PatchError):
+        apply_edits(
+            TESTS,
+            "@@ @@\n-    assert add(1, 2) == 3\n+    assert add(1, 2 == 3",
+        )
+    markdown = "# Usage\n\n```python\nadd(1, 2)\n```\n"
+    patched, form = apply_edits(
+        markdown,
+        "@@ @@\n # Usage\n+\n+Adds numbers.",
+        language="markdown",
+    )
+    assert form == "diff" and "Adds numbers." in patched
+
+
+def test_edits_that_do_not_apply_fall_back_to_full_regeneration():
+    full = "```python\ndef test_new():\n    assert True\n```"
+    model = FakeLLM()
+    replies = iter(["prose without edits", full])
+    model.respond = lambda task: next(replies)
+
+    refined, form = refine_artifact(
+        model, TESTS, "def add(a, b): ...", "TESTS"
+    )
+    assert form == "full"
+    assert refined == "def test_new():\n    assert True"
+    assert model.calls == 2
+
+
+def test_artifact_over_budget_is_regenerated_in_full():
+    full = "```python\ndef test_new():\n    assert True\n```"
+    model = FakeLLM()
+    prompts = []
+
+    def respond(task):
+        prompts.append(task)
+        return full
+
+    model.respond = respond
+    previous = TESTS * 200
+    code = "def add(a, b):\n    return a + b\n" * 20
+
+    refined, form = refine_artifact(
+        model, previous, code, "TESTS", budget=1000
+    )
+    assert form == "full"
+    assert refined == "def test_new():\n    assert True"
+    # No edit prompt is sent, and the full one fits in the budget
+    assert model.calls == 1
+    assert count_tokens(prompts[0]) <= 1000
+    assert "truncated" in prompts[0]
+    assert code in prompts[0]
+
+
+def test_delta_refinement_replaces_full_loops(tmp_path):
+    pytest.importorskip("swarms")
+    from dev_swarm.tester_agent import TesterAgent
+
+    model = FakeLLM(code_lines=4, prose_lines=1)
+    agent = TesterAgent(
+        llm=model,
+        max_loops=3,
+        refinement="delta",
+        artifact_store=ArtifactStore(str(tmp_path)),
+    )
+    agent.run("def add(a, b):\n    return a + b")
+    # One full generation and two refinement passes
+    assert model.calls == 3
+    assert agent.max_loops == 1 and agent.refine_loops == 3
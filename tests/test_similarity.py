@@ -0,0 +1,108 @@
+import pytest
+
+from dev_swarm.fake_llm import FakeLLM
+from dev_swarm.similarity import SimilarTaskIndex, shingles
+
+TASKS = [
+    "Write a function that adds two integers and returns the sum",
+    "Parse a CSV file of orders and total the amounts per customer",
+    "Implement a thread-safe LRU cache with a maximum size",
+]
+
+
+@pytest.fixture
+def model():
+    return FakeLLM(code_lines=4, prose_lines=1)
+
+
+def test_shingles_ignore_case_and_punctuation():
+    assert shingles("Add two numbers!") == shingles(
+        "add  two, NUMBERS"
+    )
+    assert shingles("add two") != shingles("two add")
+
+
+def test_similar_task_is_found(model):
+    index = SimilarTaskIndex(None)
+    for task in TASKS:
+        index.add(task, model(task))
+
+    match = index.lookup(
+        "Write a function that adds two integers and returns their sum"
+    )
+    assert match.task == TASKS[0]
+    assert match.response == model(TASKS[0])
+    assert 0.5 <= match.similarity < 1
+    assert index.lookup(TASKS[2], threshold=1.0).similarity == 1.0
+    assert (
+        index.lookup("Render a bar chart of monthly rainfall") is None
+    )
+    assert index.stats()["hits"] == 2
+    assert index.stats()["misses"] == 1
+
+
+def test_least_recently_used_task_is_evicted(model):
+    index = SimilarTaskIndex(None, max_entries=2)
+    index.add(TASKS[0], model(TASKS[0]))
+    index.add(TASKS[1], model(TASKS[1]))
+    assert index.lookup(TASKS[0]) is not None
+    index.add(TASKS[2], model(TASKS[2]))
+
+    assert len(index) == 2 and index.stats()["evictions"] == 1
+    assert index.lookup(TASKS[1]) is None
+    assert index.lookup(TASKS[0]) is not None
+
+
+def test_lookups_do_not_write(tmp_path, model):
+    index = SimilarTaskIndex(str(tmp_path / "tasks.sqlite"))
+    index.add(TASKS[0], model(TASKS[0]))
+    changes = index._db.total_changes
+    for _ in range(10):
+        assert index.lookup(TASKS[0]) is not None
+    assert index._db.total_changes == changes
+    index.close()
+
+
+def test_responses_stay_in_sqlite(tmp_path, model):
+    path = str(tmp_path / "tasks.sqlite")
+    index = SimilarTaskIndex(path)
+    for task in TASKS:
+        index.add(task, model(task))
+    index.close()
+
+    index = SimilarTaskIndex(path)
+    index.add("Sort a list of names", model("Sort a list of names"))
+    assert all(
+        response is None for _, _, response in index._entries.values()
+    )
+    assert index.lookup(TASKS[1]).response == model(TASKS[1])
+    assert index.lookup("Sort a list of names").response == model(
+        "Sort a list of names"
+    )
+    index.close()
+
+    # Without a database the responses are kept inline
+    index = SimilarTaskIndex(None)
+    index.add(TASKS[0], model(TASKS[0]))
+    assert index.lookup(TASKS[0]).response == model(TASKS[0])
+
+
+def test_recency_survives_a_restart(tmp_path, model):
+    path = str(tmp_path / "tasks.sqlite")
+    index = SimilarTaskIndex(path)
+    for task in TASKS:
+        index.add(task, model(task))
+    assert index.lookup(TASKS[0]) is not None
+    index.close()
+
+    # Reopened with room for two tasks, the one looked up last is kept
+    index = SimilarTaskIndex(path, max_entries=2)
+    assert index.lookup(TASKS[0]) is not None
+    assert index.lookup(TASKS[1]) is None
+    assert index.lookup(TASKS[2]).response == model(TASKS[2])
+    index.close()
+
+
+def test_bands_must_divide_permutations():
+    with pytest.raises(ValueError):
+        SimilarTaskIndex(None, permutations=64, bands=10)
@@ -0,0 +1,102 @@
+import time
+
+import pytest
+
+from dev_swarm.fake_llm import FakeLLM, make_response
+
+VALID = make_response(code_lines=8, prose_lines=1, name="valid")
+OTHER = make_response(code_lines=8, prose_lines=1, name="other")
+BROKEN = "Here it is.\n```python\ndef broken(:\n    pass\n```\n"
+MISSING_IMPORT = "```python\nimport no_such_module_here\n```\n"
+
+
+class ScriptedLLM(FakeLLM):
+    """Streams one scripted (delay, response) pair per call, in order."""
+
+    def __init__(self, script):
+        super().__init__(chunk_size=16)
+        self.script = list(script)
+
+    def stream(self, task, *args, **kwargs):
+        with self._lock:
+            index = self.calls
+            self.calls += 1
+        if index < len(self.script):
+            delay, response = self.script[index]
+        else:
+            delay, response = 0.0, self.respond(task)
+        time.sleep(delay)
+        for start in range(0, len(response), self.chunk_size):
+            yield response[start : start + self.chunk_size]
+
+
+@pytest.fixture
+def agent_for(tmp_path, monkeypatch):
+    pytest.importorskip("swarms")
+    from dev_swarm.function_generator_agent import (
+        FunctionGeneratorAgent,
+    )
+
+    monkeypatch.chdir(tmp_path)
+
+    def build(script):
+        return FunctionGeneratorAgent(
+            llm=ScriptedLLM(script), candidates=len(script)
+        )
+
+    return build
+
+
+def test_candidate_that_fails_validation_is_discarded(agent_for):
+    agent = agent_for(
+        [(0.0, BROKEN), (0.0, MISSING_IMPORT), (0.3, VALID)]
+    )
+    assert agent.speculate("Write a function") == VALID
+    assert agent.llm.calls == 3
+
+
+def test_first_valid_candidate_wins_without_waiting(agent_for):
+    agent = agent_for([(0.0, VALID), (2.0, OTHER)])
+    began = time.perf_counter()
+    assert agent.speculate("Write a function") == VALID
+    assert time.perf_counter() - began < 1.5
+
+
+def test_first_response_is_used_when_none_validates(agent_for):
+    agent = agent_for([(0.0, BROKEN), (0.3, MISSING_IMPORT)])
+    assert agent.speculate("Write a function") == BROKEN
+
+
+def test_candidates_are_recorded_as_spans(tmp_path, monkeypatch):
+    pytest.importorskip("swarms")
+    from dev_swarm.dev_swarm import DevSwarm
+
+    monkeypatch.chdir(tmp_path)
+    swarm = DevSwarm(
+        llm=ScriptedLLM([(0.0, BROKEN), (0.3, VALID)]), candidates=2
+    )
+    result = swarm.run("Write a function")
+    assert result.ok
+    assert "def valid_0" in result.outputs["FunctionGenerator"]
+
+    candidates = [
+        record
+        for record in result.spans
+        if record.name == "candidate"
+    ]
+    assert sorted(record.extra["ok"] for record in candidates) == [
+        False,
+        True,
+    ]
+    (generate,) = [
+        record for record in result.spans if record.name == "generate"
+    ]
+    assert (
+        generate.extra["valid"] and generate.extra["candidates"] == 2
+    )
+    winner = generate.extra["winner"]
+    assert [
+        record.extra["ok"]
+        for record in candidates
+        if record.extra["index"] == winner
+    ] == [True]
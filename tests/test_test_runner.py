@@ -0,0 +1,160 @@
+import os
+import time
+
+import pytest
+
+from dev_swarm.test_runner import (
+    TEST_FILE_NAME,
+    SandboxedTestRunner,
+    collect_test_ids,
+    run_tests,
+)
+
+CODE = "def add(a, b):\n    return a + b\n"
+
+TESTS = """
+import time
+
+from main import add
+
+
+def test_passes():
+    assert add(1, 2) == 3
+
+
+def test_fails():
+    assert add(1, 2) == 4
+
+
+def test_sleeps():
+    time.sleep(30)
+"""
+
+
+def process_gone(pid: int, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with open(f"/proc/{pid}/stat") as file:
+                # Killed but not yet reaped
+                if file.read().split(") ")[1].startswith("Z"):
+                    return True
+        except FileNotFoundError:
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_collect_test_ids():
+    tests = (
+        "def test_a(): ...\n"
+        "async def test_b(): ...\n"
+        "def helper(): ...\n"
+        "class TestGroup:\n"
+        "    def test_c(self): ...\n"
+        "    def setup_method(self): ...\n"
+    )
+    assert collect_test_ids(tests) == [
+        f"{TEST_FILE_NAME}::test_a",
+        f"{TEST_FILE_NAME}::test_b",
+        f"{TEST_FILE_NAME}::TestGroup::test_c",
+    ]
+    assert collect_test_ids("def test_(:") == []
+
+
+def test_statuses_and_timeout():
+    runner = SandboxedTestRunner(max_workers=3, timeout=3)
+    began = time.perf_counter()
+    report = runner.run(CODE, TESTS)
+    assert time.perf_counter() - began < 15
+
+    statuses = {
+        outcome.test_id.split("::")[1]: outcome.status
+        for outcome in report.outcomes
+    }
+    assert statuses == {
+        "test_passes": "passed",
+        "test_fails": "failed",
+        "test_sleeps": "timeout",
+    }
+    assert report.passed == 1 and not report.ok
+    failed = report.failures[0]
+    assert "assert 3 == 4" in failed.output
+    assert report.to_dict()["failed"] == 2
+
+
+def test_timeout_kills_the_whole_process_group(tmp_path):
+    pid_file = tmp_path / "pid"
+    tests = f"""
+import subprocess, sys, time
+
+
+def test_spawns():
+    child = subprocess.Popen(
+        [sys.executable, "-c", "import time; time.sleep(60)"]
+    )
+    with open({str(pid_file)!r}, "w") as file:
+        file.write(str(child.pid))
+    time.sleep(60)
+"""
+    report = run_tests(CODE, tests, timeout=3)
+    assert [outcome.status for outcome in report.outcomes] == [
+        "timeout"
+    ]
+    assert process_gone(int(pid_file.read_text()), timeout=5)
+
+
+@pytest.mark.parametrize(
+    "tests, status",
+    [
+        ("def test_broken(:\n    pass\n", "error"),
+        ("VALUE = 1\n", "no_tests"),
+    ],
+)
+def test_whole_file_runs_when_collection_fails(tests, status):
+    report = run_tests(CODE, tests)
+    assert [
+        (outcome.test_id, outcome.status)
+        for outcome in report.outcomes
+    ] == [(TEST_FILE_NAME, status)]
+    assert not report.ok
+
+
+def test_import_errors_fail_each_test():
+    tests = "from main import missing\n\ndef test_a(): ...\n"
+    outcome = run_tests(CODE, tests).outcomes[0]
+    assert outcome.status == "error"
+    assert "ImportError" in outcome.output
+
+
+def test_resource_limits_apply():
+    tests = """
+import resource
+
+MB = 1024 * 1024
+
+
+def test_limits():
+    assert resource.getrlimit(resource.RLIMIT_AS)[0] == 512 * MB
+    assert resource.getrlimit(resource.RLIMIT_CPU)[0] == 7
+    assert resource.getrlimit(resource.RLIMIT_FSIZE)[0] == 1 * MB
+
+
+def test_large_files_cannot_be_written():
+    with open("big.bin", "wb") as file:
+        try:
+            file.write(b"0" * (2 * 1024 * 1024))
+            file.flush()
+        except OSError:
+            return
+    raise AssertionError("wrote past the file size limit")
+"""
+    report = run_tests(
+        CODE,
+        tests,
+        memory_limit_mb=512,
+        cpu_time_limit=7,
+        file_size_limit_mb=1,
+    )
+    assert report.ok, [outcome.output for outcome in report.failures]
+    assert not os.path.exists("big.bin")
@@ -0,0 +1,69 @@
+import pytest
+
+from dev_swarm.fake_llm import FakeLLM
+from dev_swarm.markdown import extract_code_from_markdown
+from dev_swarm.validation import symbol_summary, validate_code
+
+CODE = '''import math
+
+
+def area(radius: float) -> float:
+    """Area of a circle."""
+    return math.pi * radius**2
+
+
+class Circle:
+    """A circle."""
+
+    def __init__(self, radius: float):
+        self.radius = radius
+
+    @property
+    def area(self) -> float:
+        return area(self.radius)
+
+    def _scale(self, by: float):
+        self.radius *= by
+'''
+
+
+def test_generated_code_passes():
+    response = FakeLLM(code_lines=8)("Write a function")
+    result = validate_code(
+        extract_code_from_markdown(response), require_symbols=True
+    )
+    assert result.ok and result.check == ""
+
+
+@pytest.mark.parametrize(
+    "code, check",
+    [
+        ("  \n", "empty"),
+        ("def broken(:\n    pass", "syntax"),
+        ("x = 1", "symbols"),
+        ("import not_a_module_xyz\n\ndef f(): ...", "imports"),
+    ],
+)
+def test_failed_checks(code, check):
+    result = validate_code(code, require_symbols=True)
+    assert not result.ok and result.check == check
+    assert result.to_dict()["ok"] is False
+
+
+def test_summary_keeps_the_public_api():
+    assert symbol_summary(CODE) == (
+        "import math\n"
+        "\n"
+        "def area(radius: float) -> float:\n"
+        '    """Area of a circle."""\n'
+        "\n"
+        "class Circle:\n"
+        '    """A circle."""\n'
+        "    def __init__(self, radius: float): ...\n"
+        "    @property\n"
+        "    def area(self) -> float: ..."
+    )
+
+
+def test_summary_of_invalid_code_is_the_code():
+    assert symbol_summary("def broken(:") == "def broken(:"